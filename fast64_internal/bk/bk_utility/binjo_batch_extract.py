@@ -0,0 +1,133 @@
+import contextlib
+import io
+import json
+import os
+import traceback
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from timeit import default_timer as timer
+
+from . import binjo_model_LU
+from . import binjo_utils
+from . binjo_model_bin import ModelBIN
+from . binjo_rom_reader import ROM_Reader
+
+# NOTE: nothing in here touches bpy, so this runs in a plain python interpreter
+#       (see scripts/bk/extract_all_models.py); the TexSeg simply skips creating Blender images then
+
+
+
+MANIFEST_NAME = "manifest.json"
+
+# extract, decompress and parse a single model; this runs inside the worker processes,
+# so it opens its own (memory-mapped) view of the ROM and only returns plain data
+def extract_model_entry(rom_path, model_index, output_dir, quiet=True):
+    PT_Address = binjo_model_LU.map_model_lookup[model_index][1]
+    entry = {
+        "index": model_index,
+        "pointer_table_address": binjo_utils.to_decal_hex(PT_Address, 4),
+        "file": None,
+        "timings": {},
+    }
+    # the binjo modules are very chatty; dont let every worker spam the console
+    console = io.StringIO() if quiet else None
+    entry_timer = timer()
+    try:
+        with contextlib.redirect_stdout(console) if quiet else contextlib.nullcontext():
+            with ROM_Reader(rom_path) as rom:
+                model_start_address = binjo_utils.read_bytes(rom.data, PT_Address + 0x00, 4) + binjo_utils.extra_file_offset
+                model_end_address   = binjo_utils.read_bytes(rom.data, PT_Address + 0x08, 4) + binjo_utils.extra_file_offset
+                entry["rom_start"] = binjo_utils.to_decal_hex(model_start_address, 4)
+                entry["rom_end"] = binjo_utils.to_decal_hex(model_end_address, 4)
+                entry["compressed_size"] = (model_end_address - model_start_address)
+
+                running_timer = timer()
+                model_data = binjo_utils.extract_model(rom.data, model_index)
+                entry["timings"]["decompress"] = (timer() - running_timer)
+            # some indices in the LU dont point to any data; thats not an error
+            if (model_data is None):
+                entry["empty"] = True
+                return entry
+            entry["decompressed_size"] = len(model_data)
+
+            file_path = os.path.join(output_dir, f"extracted_{binjo_utils.to_decal_hex(PT_Address, 4)}.bin")
+            with open(file_path, "wb") as model_file:
+                model_file.write(model_data)
+            entry["file"] = os.path.basename(file_path)
+
+            running_timer = timer()
+            model_object = ModelBIN()
+            model_object.populate_from_data(model_data)
+            entry["timings"]["populate"] = (timer() - running_timer)
+    except Exception as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+        entry["traceback"] = traceback.format_exc()
+        return entry
+    finally:
+        entry["timings"]["total"] = (timer() - entry_timer)
+
+    header = model_object.Header
+    entry["segments"] = {
+        "geo_offset":       header.geo_offset,
+        "tex_offset":       header.tex_offset,
+        "DL_offset":        header.DL_offset,
+        "vtx_offset":       header.vtx_offset,
+        "bone_offset":      header.bone_offset,
+        "coll_offset":      header.coll_offset,
+        "FX_offset":        header.FX_offset,
+        "FX_END":           header.FX_END,
+        "anim_tex_offset":  header.anim_tex_offset,
+    }
+    entry["counts"] = {
+        "vtx_cnt":          (model_object.VtxSeg.vtx_cnt if model_object.VtxSeg.valid else 0),
+        "tex_cnt":          (model_object.TexSeg.tex_cnt if model_object.TexSeg.valid else 0),
+        "coll_tri_cnt":     (model_object.ColSeg.tri_cnt if model_object.ColSeg.valid else 0),
+        "DL_command_cnt":   (model_object.DLSeg.command_cnt if model_object.DLSeg.valid else 0),
+        "complete_tri_cnt": len(model_object.complete_tri_list),
+    }
+    return entry
+
+# extract every model in binjo_model_LU.map_model_lookup (or only model_indices) from the ROM
+# into output_dir, fanning the work out over a process pool, and write a JSON manifest next to them
+def extract_all_models(rom_path, output_dir, model_indices=None, max_workers=None, quiet=True):
+    if (model_indices is None):
+        model_indices = list(binjo_model_LU.map_model_lookup.keys())
+    os.makedirs(output_dir, exist_ok=True)
+
+    batch_timer = timer()
+    with ROM_Reader(rom_path) as rom:
+        rom_hash = rom.get_hash()
+        rom_size = len(rom)
+
+    entries = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(extract_model_entry, rom_path, model_index, output_dir, quiet)
+            for model_index in model_indices
+        ]
+        for future in as_completed(futures):
+            entry = future.result()
+            # entries that failed before decompressing have no size
+            if ("error" in entry):
+                status = entry["error"]
+            elif (entry.get("empty")):
+                status = "empty"
+            else:
+                status = f"{entry['decompressed_size']} bytes"
+            print(f">>> ({entry['timings']['total']:.3f}s) -- Model {binjo_utils.to_decal_hex(entry['index'], 1)}: {status}")
+            entries.append(entry)
+    entries.sort(key=lambda entry: entry["index"])
+
+    manifest = {
+        "rom": os.path.abspath(rom_path),
+        "rom_hash": rom_hash,
+        "rom_size": rom_size,
+        "model_cnt": len(entries),
+        "failed_cnt": sum(1 for entry in entries if "error" in entry),
+        "total_time": (timer() - batch_timer),
+        "models": entries,
+    }
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+    binjo_utils.report_time(batch_timer, f"Extracted {len(entries)} models into {output_dir}")
+    return manifest
@@ -1,9 +1,11 @@
 
+import numpy as np
+
 from . import binjo_utils
 from .binjo_model_bin_header import ModelBIN_Header
 from .binjo_model_bin_texture_seg import ModelBIN_TexSeg
 from .binjo_model_bin_vertex_seg import ModelBIN_VtxSeg, ModelBIN_VtxElem
-from .binjo_model_bin_collision_seg import ModelBIN_ColSeg, ModelBIN_TriElem
+from .binjo_model_bin_collision_seg import ModelBIN_ColSeg, ModelBIN_TriElem, ModelBIN_TriArrays
 from .binjo_model_bin_displaylist_seg import ModelBIN_DLSeg, TileDescriptor
 from .binjo_model_bin_geolayout_seg import ModelBIN_GeoSeg, ModelBIN_GeoCommandChain
 
@@ -130,12 +132,20 @@ class ModelBIN:
         if (DLSeg == None):
             DLSeg = self.DLSeg
         
+        # all tris of the model are kept in one columnar storage; complete_tri_list holds views onto it
+        self.complete_tri_arrays = ModelBIN_TriArrays()
         if (ColSeg.valid == True):
             # start of by grabbing all the tris from the coll segment
-            self.complete_tri_list = ColSeg.unique_tri_list.copy()
+            self.complete_tri_list = self.complete_tri_arrays.extend_from_tris(ColSeg.unique_tri_list)
         else:
             self.complete_tri_list = []
 
+        # index the tris by their rotation-key, so DL tris can be matched against them in O(1);
+        # only the earliest tri per key is indexed, because that's the one a linear scan would find
+        self.complete_tri_index = {}
+        for (row, (idx1, idx2, idx3)) in enumerate(self.complete_tri_arrays.indices[:len(self.complete_tri_list)].tolist()):
+            self.complete_tri_index.setdefault(ModelBIN_TriElem.get_rotation_key_from_indices(idx1, idx2, idx3), row)
+
         if (DLSeg.valid == True):
             # then walk through the DLs with a TileDescriptor and a simulated VTX-Buffer to scan for visual tris;
             # the descriptor holds meta data for the GPU and handles the VTX-Buffer, which has a capacity of 32 tri-IDs
@@ -144,6 +154,8 @@ class ModelBIN:
                 descriptor_array.append(TileDescriptor())
             active_descriptor = 0
             vertex_buffer = [0] * 0x20
+            # every drawn tri is only recorded while walking the DLs, and all of them are applied at once afterwards
+            drawn_tris = {"rows": [], "vtx_ids": [], "descriptors": []}
             for cmd in DLSeg.command_list:
 
                 if (cmd.command_name == "G_TEXTURE"):
@@ -184,94 +196,134 @@ class ModelBIN:
                     continue
 
                 if (cmd.command_name == "G_TRI1"):
-                    tmp_tri = ModelBIN_TriElem()
-                    tmp_tri.build_from_parameters(
+                    tri_vtx_ids = (
                         vertex_buffer[cmd.parameters[0]],
                         vertex_buffer[cmd.parameters[1]],
                         vertex_buffer[cmd.parameters[2]]
                     )
-                    self.add_and_transform_tri(tmp_tri, descriptor_array[active_descriptor])
+                    self.add_and_transform_tri(tri_vtx_ids, descriptor_array[active_descriptor], drawn_tris)
                     continue
 
                 if (cmd.command_name == "G_TRI2"):
-                    tmp_tri = ModelBIN_TriElem()
-                    tmp_tri.build_from_parameters(
+                    tri_vtx_ids = (
                         vertex_buffer[cmd.parameters[0]],
                         vertex_buffer[cmd.parameters[1]],
                         vertex_buffer[cmd.parameters[2]]
                     )
-                    self.add_and_transform_tri(tmp_tri, descriptor_array[active_descriptor])
-                    tmp_tri = ModelBIN_TriElem()
-                    tmp_tri.build_from_parameters(
+                    self.add_and_transform_tri(tri_vtx_ids, descriptor_array[active_descriptor], drawn_tris)
+                    tri_vtx_ids = (
                         vertex_buffer[cmd.parameters[3]],
                         vertex_buffer[cmd.parameters[4]],
                         vertex_buffer[cmd.parameters[5]]
                     )
-                    self.add_and_transform_tri(tmp_tri, descriptor_array[active_descriptor])
+                    self.add_and_transform_tri(tri_vtx_ids, descriptor_array[active_descriptor], drawn_tris)
                     continue
 
+            self.apply_drawn_tris(drawn_tris)
+
     # this func figures out if the new DL-Segment tri is already part of the tri-list (from ColSeg), and if
-    # so, applys all the visual information to this already existing tri instead of using the new one.
-    # this is VERY slow unfortunately...
+    # so, records all the visual information for this already existing tri instead of adding a new one.
+    # the lookup goes through complete_tri_index (built in build_complete_tri_list), which maps the
+    # rotation-key of every listed tri to the row of the earliest tri with that key.
     # this func also needs the entire existing-tri list aswell as the vtx-seg, so its in the collection class...
-    def add_and_transform_tri(self, new_tri, tile_descriptor):
+    def add_and_transform_tri(self, tri_vtx_ids, tile_descriptor, drawn_tris):
         # first, check if the tri already exists in our list
-        # matching_tri_index = -1
-        # for idx, existing_tri in enumerate(self.complete_tri_list):
-        #     if (existing_tri.compare_only_indices(new_tri) == True):
-        #         matching_tri_index = idx
-        #         new_tri = existing_tri
-        #         break
-        
-        # python trick to find the "next" (or earliest in this case) matching element from a list OR a default
-        matching_tri = next((existing_tri for existing_tri in self.complete_tri_list if existing_tri.compare_only_indices(new_tri)), None)
+        rotation_key = ModelBIN_TriElem.get_rotation_key_from_indices(*tri_vtx_ids)
+        row = self.complete_tri_index.get(rotation_key, None)
 
         # if the tri wasnt found, it's new; So the vertex objects wont be linked yet and we have to add it
-        if (matching_tri is None):
-            matching_tri = new_tri
-            matching_tri.link_vertex_objects(self.VtxSeg.vtx_list)
-            self.complete_tri_list.append(matching_tri)
+        if (row is None):
+            row = self.complete_tri_arrays.append()
+            self.complete_tri_arrays.indices[row] = tri_vtx_ids
+            new_tri = ModelBIN_TriElem(self.complete_tri_arrays, row)
+            new_tri.link_vertex_objects(self.VtxSeg.vtx_list)
+            self.complete_tri_list.append(new_tri)
+            self.complete_tri_index[rotation_key] = row
+        # snapshot the descriptor, because it will keep changing while walking the DLs
+        drawn_tris["rows"].append(row)
+        drawn_tris["vtx_ids"].append(tri_vtx_ids)
+        drawn_tris["descriptors"].append((
+            (-1 if tile_descriptor.tex_idx is None else tile_descriptor.tex_idx),
+            tile_descriptor.T_clamp, tile_descriptor.T_mirror, tile_descriptor.T_wrap, tile_descriptor.T_shift,
+            tile_descriptor.S_clamp, tile_descriptor.S_mirror, tile_descriptor.S_wrap, tile_descriptor.S_shift,
+            tile_descriptor.tex_width, tile_descriptor.tex_height
+        ))
+
+    # apply all the flaggage of the recorded tris in one go; if a tri (or vertex) was drawn multiple times,
+    # the last draw wins, just like it did when applying the descriptors tri by tri
+    def apply_drawn_tris(self, drawn_tris):
+        if (len(drawn_tris["rows"]) == 0):
+            return
+        rows = np.array(drawn_tris["rows"], dtype=np.int64)
+        descriptors = np.array(drawn_tris["descriptors"], dtype=np.float64)
+        # find the last draw of every tri
+        (unique_rows, reversed_first) = np.unique(rows[::-1], return_index=True)
+        last = (len(rows) - 1) - reversed_first
+
+        tri_arrays = self.complete_tri_arrays
         # this is ALWAYS true if the tri was found in the DLs; Textured or not
-        matching_tri.visible = True
-        # apply all the flaggage:
-        matching_tri.T_clamp    = tile_descriptor.T_clamp
-        matching_tri.T_mirror   = tile_descriptor.T_mirror
-        matching_tri.T_wrap     = tile_descriptor.T_wrap
-        matching_tri.T_shift    = tile_descriptor.T_shift
-        matching_tri.S_clamp    = tile_descriptor.S_clamp
-        matching_tri.S_mirror   = tile_descriptor.S_mirror
-        matching_tri.S_wrap     = tile_descriptor.S_wrap
-        matching_tri.S_shift    = tile_descriptor.S_shift
-        # finally, link the tex ID and calculate the Blender-UVs with the help of the descriptor
-        matching_tri.tex_idx = tile_descriptor.tex_idx
-        matching_tri.vtx_1.calc_transformed_UVs(tile_descriptor)
-        matching_tri.vtx_2.calc_transformed_UVs(tile_descriptor)
-        matching_tri.vtx_3.calc_transformed_UVs(tile_descriptor)
-
-
-    # arrange the model data into lists that Blender can convert into a mesh
+        tri_arrays.visible[unique_rows] = True
+        # finally, link the tex ID
+        tri_arrays.tex_idx[unique_rows] = descriptors[last, 0]
+        for (column, column_name) in enumerate(("T_clamp", "T_mirror", "T_wrap", "T_shift", "S_clamp", "S_mirror", "S_wrap", "S_shift"), start=1):
+            getattr(tri_arrays, column_name)[unique_rows] = descriptors[last, column]
+
+        # and calculate the Blender-UVs with the help of the descriptors; untextured tris use a 32x32 default
+        textured = (descriptors[:, 0] != -1)
+        S_shifts    = np.where(textured, descriptors[:, 8],  0)
+        T_shifts    = np.where(textured, descriptors[:, 4],  0)
+        tex_widths  = np.where(textured, descriptors[:, 9],  32.0)
+        tex_heights = np.where(textured, descriptors[:, 10], 32.0)
+        self.VtxSeg.vtx_arrays.calc_transformed_UVs(
+            np.array(drawn_tris["vtx_ids"], dtype=np.int64).reshape(-1),
+            np.repeat(S_shifts, 3), np.repeat(T_shifts, 3),
+            np.repeat(tex_widths, 3), np.repeat(tex_heights, 3)
+        )
+
+
+    # arrange the model data into arrays that Blender can convert into a mesh
     def arrange_mesh_data(self):
-        self.vertex_coord_list = []
-        self.vertex_shade_list = []
         scale_factor = 1.0
-        for vtx in self.VtxSeg.vtx_list:
-            # NOTE: Im swapping Y and Z in here, and flipping Z afterwards,
-            #       because BK uses a different coord system than blender
-            self.vertex_coord_list.append((
-                + vtx.x * scale_factor,
-                - vtx.z * scale_factor, # swapped and flipped
-                + vtx.y * scale_factor  # swapped
-            ))
-
-        self.face_idx_list = []
-        self.edge_idx_list = []
+        coords = self.VtxSeg.vtx_arrays.coords.astype(np.float64) * scale_factor
+        # NOTE: Im swapping Y and Z in here, and flipping Z afterwards,
+        #       because BK uses a different coord system than blender
+        self.vertex_coord_list = np.column_stack((
+            + coords[:, 0],
+            - coords[:, 2], # swapped and flipped
+            + coords[:, 1]  # swapped
+        ))
+        self.vertex_shade_list = []
+
+        tri_arrays = self.complete_tri_arrays
+        tri_cnt = len(self.complete_tri_list)
+        self.face_idx_list = tri_arrays.indices[:tri_cnt].copy()
+        self.edge_idx_list = self.face_idx_list[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+        # per-loop (== per tri-corner) data, in the same order Blender creates the loops of the faces
+        loop_vtx_ids = self.face_idx_list.reshape(-1)
+        self.loop_uv_list = self.VtxSeg.vtx_arrays.transformed_uvs[loop_vtx_ids]
+        self.loop_shade_list = self.VtxSeg.vtx_arrays.shades[loop_vtx_ids] / 255
         self.mat_list = []
-        for tri in self.complete_tri_list:
-            self.face_idx_list.append((tri.index_1, tri.index_2, tri.index_3))
-            self.edge_idx_list.append((tri.index_1, tri.index_2))
-            self.edge_idx_list.append((tri.index_2, tri.index_3))
-            self.edge_idx_list.append((tri.index_3, tri.index_1))
+        if (tri_cnt == 0):
+            self.mat_index_list = np.zeros(0, dtype=np.int32)
+            return
 
+        # every distinct combination of these columns becomes its own material;
+        # the TS params are only relevant for visible tris, and tex_idx is only ever set for those
+        visible = tri_arrays.visible[:tri_cnt]
+        mat_keys = np.column_stack([visible, tri_arrays.tex_idx[:tri_cnt], tri_arrays.collision_type[:tri_cnt]] + [
+            np.where(visible, getattr(tri_arrays, column_name)[:tri_cnt], 0)
+            for column_name in ("T_clamp", "T_mirror", "T_wrap", "T_shift", "S_clamp", "S_mirror", "S_wrap", "S_shift")
+        ]).astype(np.int64)
+        (_, first_tri_ids, mat_ids) = np.unique(mat_keys, axis=0, return_index=True, return_inverse=True)
+        # np.unique() sorts the keys, but the materials are listed in the order of their first tri
+        order = np.argsort(first_tri_ids)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        tri_arrays.mat_index[:tri_cnt] = rank[mat_ids.reshape(-1)]
+        self.mat_index_list = tri_arrays.mat_index[:tri_cnt].copy()
+
+        for tri_id in first_tri_ids[order].tolist():
+            tri = self.complete_tri_list[tri_id]
             if (tri.visible == False):
                 img_alias = "INVIS"
             if (tri.visible == True and tri.tex_idx == None):
@@ -296,11 +348,8 @@ class ModelBIN:
                     False, False, 0, 0,
                     False, False, 0, 0
                 )
-            
-            if mat not in self.mat_list:
-                mat.link_image_object(self.TexSeg)
-                self.mat_list.append(mat)
-            tri.mat_index = self.mat_list.index(mat)
+            mat.link_image_object(self.TexSeg)
+            self.mat_list.append(mat)
         return
 
 class BinjoMaterial:
@@ -1,33 +1,29 @@
 
 import numpy as np
 import re
+import struct
 
 from . import binjo_utils
 from . binjo_dicts import Dicts
 
 class ModelBIN_ColSeg:
     HEADER_SIZE = 0x18
+    # min cube xyz, max cube xyz (signed), stride_y, stride_z, geo_cube_cnt, geo_cube_scale, tri_cnt, unk_1 (unsigned)
+    HEADER_LAYOUT = struct.Struct(">6h6H")
 
     def __init__(self):
         self.valid = False
 
     def populate_from_collision_tri_list(self, tri_list, cube_scale=1000):
-        x_coords = []
-        y_coords = []
-        z_coords = []
-        for tri in tri_list:
-            x_coords.extend([tri.vtx_1.x, tri.vtx_2.x, tri.vtx_3.x])
-            y_coords.extend([tri.vtx_1.y, tri.vtx_2.y, tri.vtx_3.y])
-            z_coords.extend([tri.vtx_1.z, tri.vtx_2.z, tri.vtx_3.z])
-
-        # using floor() for both min and max, because I consider the cubes to start in the lower-left corner
+        tri_coords = ModelBIN_ColSeg.get_tri_coords(tri_list)
+
+        # using floor() for both min and max, because I consider the cubes to start in the lower-left corner;
+        # these are the bounding cube IDs of every single tri, aswell as of the entire model
+        tri_min_geo_cube_ids = np.floor(tri_coords.min(axis=1) / cube_scale).astype(np.int64)
+        tri_max_geo_cube_ids = np.floor(tri_coords.max(axis=1) / cube_scale).astype(np.int64)
         self.geo_cube_scale = cube_scale
-        self.min_geo_cube_x = int(np.floor(np.min(x_coords) / cube_scale))
-        self.min_geo_cube_y = int(np.floor(np.min(y_coords) / cube_scale))
-        self.min_geo_cube_z = int(np.floor(np.min(z_coords) / cube_scale))
-        self.max_geo_cube_x = int(np.floor(np.max(x_coords) / cube_scale))
-        self.max_geo_cube_y = int(np.floor(np.max(y_coords) / cube_scale))
-        self.max_geo_cube_z = int(np.floor(np.max(z_coords) / cube_scale))
+        (self.min_geo_cube_x, self.min_geo_cube_y, self.min_geo_cube_z) = tri_min_geo_cube_ids.min(axis=0).tolist()
+        (self.max_geo_cube_x, self.max_geo_cube_y, self.max_geo_cube_z) = tri_max_geo_cube_ids.max(axis=0).tolist()
         # the strides determine how many indices we need to jump if we jump along another axis than the x axis
         x_count = (self.max_geo_cube_x - self.min_geo_cube_x + 1)
         y_count = (self.max_geo_cube_y - self.min_geo_cube_y + 1)
@@ -45,54 +41,63 @@ class ModelBIN_ColSeg:
                     self.geo_cube_list.append(ModelBIN_GeoCubeElem(x_id=x_id, y_id=y_id, z_id=z_id, cube_scale=cube_scale))
 
         # now comes the hard part: sort EVERY collision tri into EVERY intersected geocube...
-        self.tri_cnt = 0
-        for tri in tri_list:
-            # find the bounding cube IDs for the tri; using these to drastically limit the search space
-            # of possible containing cube candidates in the next step
-            x_coords = [tri.vtx_1.x, tri.vtx_2.x, tri.vtx_3.x]
-            y_coords = [tri.vtx_1.y, tri.vtx_2.y, tri.vtx_3.y]
-            z_coords = [tri.vtx_1.z, tri.vtx_2.z, tri.vtx_3.z]
-            tri_min_geo_cube_x = int(np.floor(np.min(x_coords) / cube_scale))
-            tri_min_geo_cube_y = int(np.floor(np.min(y_coords) / cube_scale))
-            tri_min_geo_cube_z = int(np.floor(np.min(z_coords) / cube_scale))
-            tri_max_geo_cube_x = int(np.floor(np.max(x_coords) / cube_scale))
-            tri_max_geo_cube_y = int(np.floor(np.max(y_coords) / cube_scale))
-            tri_max_geo_cube_z = int(np.floor(np.max(z_coords) / cube_scale))
-            
-            for z_id in range(tri_min_geo_cube_z, tri_max_geo_cube_z + 1):
-                enum_z_id = (z_id - self.min_geo_cube_z)
-
-                for y_id in range(tri_min_geo_cube_y, tri_max_geo_cube_y + 1):
-                    enum_y_id = (y_id - self.min_geo_cube_y)
-
-                    for x_id in range(tri_min_geo_cube_x, tri_max_geo_cube_x + 1):
-                        enum_x_id = (x_id - self.min_geo_cube_x)
-                        cube_id = (enum_x_id + (enum_y_id * self.stride_y) + (enum_z_id * self.stride_z))
-
-                        if (binjo_utils.tri_intersects_cube(tri, self.geo_cube_list[cube_id]) == True):
-                            self.geo_cube_list[cube_id].intersecting_tri_list.append(tri)
-                            self.tri_cnt += 1
-
-        # now all the tris are signed in into their respective lists;
+        # the bounding cubes of a tri drastically limit the search space of possible containing cube candidates,
+        # so enumerate all (tri, candidate cube) pairs at once; in z-y-x order per tri, just like the cubes
+        min_ids = (tri_min_geo_cube_ids - [self.min_geo_cube_x, self.min_geo_cube_y, self.min_geo_cube_z])
+        candidate_counts = (tri_max_geo_cube_ids - tri_min_geo_cube_ids + 1)
+        candidate_cnt_per_tri = np.prod(candidate_counts, axis=1)
+        pair_tri_ids = np.repeat(np.arange(len(tri_coords)), candidate_cnt_per_tri)
+        pair_offsets = np.arange(len(pair_tri_ids)) - np.repeat(np.cumsum(candidate_cnt_per_tri) - candidate_cnt_per_tri, candidate_cnt_per_tri)
+        pair_x_cnt = candidate_counts[pair_tri_ids, 0]
+        pair_y_cnt = candidate_counts[pair_tri_ids, 1]
+        enum_ids = min_ids[pair_tri_ids] + np.column_stack((
+            pair_offsets % pair_x_cnt,
+            (pair_offsets // pair_x_cnt) % pair_y_cnt,
+            pair_offsets // (pair_x_cnt * pair_y_cnt)
+        ))
+        pair_cube_ids = (enum_ids[:, 0] + (enum_ids[:, 1] * self.stride_y) + (enum_ids[:, 2] * self.stride_z))
+
+        # tris that sit within a single cube trivially intersect it, so only the others need the SAT check
+        intersecting = np.ones(len(pair_tri_ids), dtype=bool)
+        needs_SAT = (candidate_cnt_per_tri[pair_tri_ids] > 1)
+        if (np.any(needs_SAT) == True):
+            cube_mins = np.array([self.min_geo_cube_x, self.min_geo_cube_y, self.min_geo_cube_z])
+            cube_centers = cube_scale * (cube_mins + enum_ids[needs_SAT] + 0.5)
+            intersecting[needs_SAT] = binjo_utils.tris_intersect_cubes(tri_coords[pair_tri_ids[needs_SAT]], cube_centers, cube_scale)
+        pair_tri_ids = pair_tri_ids[intersecting]
+        pair_cube_ids = pair_cube_ids[intersecting]
+        self.tri_cnt = len(pair_tri_ids)
+
+        # now all the tris are signed in into their respective cubes;
         # next, write all the tris into a long list (with duplicates) to index into, and set the starting indices
-        self.tri_list = []
-        listed_tris = 0
-        for cube in self.geo_cube_list:
-            # set starting ID to current count
-            cube.starting_tri_ID = listed_tris
-            cube.tri_cnt = len(cube.intersecting_tri_list)
+        order = np.lexsort((pair_tri_ids, pair_cube_ids))
+        pair_tri_ids = pair_tri_ids[order].tolist()
+        cube_tri_cnts = np.bincount(pair_cube_ids, minlength=self.geo_cube_cnt)
+        cube_starting_tri_IDs = (np.cumsum(cube_tri_cnts) - cube_tri_cnts)
 
-            for tri in cube.intersecting_tri_list:
-                self.tri_list.append(tri)
-                listed_tris += 1
+        self.tri_list = [tri_list[tri_id] for tri_id in pair_tri_ids]
+        for (cube, starting_tri_ID, tri_cnt) in zip(self.geo_cube_list, cube_starting_tri_IDs.tolist(), cube_tri_cnts.tolist()):
+            # set starting ID to current count
+            cube.starting_tri_ID = starting_tri_ID
+            cube.tri_cnt = tri_cnt
+            cube.intersecting_tri_list = self.tri_list[starting_tri_ID:(starting_tri_ID + tri_cnt)]
 
-        if (self.tri_cnt != listed_tris):
-            print(f"Something went wrong within ColSeg() building; listed_tri_cnt != assigned tri_cnt")
-            self.valid = False
-            return
         self.valid = True
         return
 
+    # gather the vertex coords of all tris into an (n, 3, 3) array;
+    # if all the vertices are views onto the same storage, this is a single fancy-index
+    def get_tri_coords(tri_list):
+        vtx_list = [vtx for tri in tri_list for vtx in (tri.vtx_1, tri.vtx_2, tri.vtx_3)]
+        if (len(vtx_list) == 0):
+            return np.zeros((0, 3, 3), dtype=np.float64)
+        vtx_arrays = vtx_list[0].arrays
+        if all((vtx.arrays is vtx_arrays) for vtx in vtx_list):
+            coords = vtx_arrays.coords[[vtx.idx for vtx in vtx_list]]
+        else:
+            coords = np.array([vtx.arrays.coords[vtx.idx] for vtx in vtx_list])
+        return coords.astype(np.float64).reshape(-1, 3, 3)
+
 
     def populate_from_data(self, file_data, file_offset):
         if file_offset == 0:
@@ -101,18 +106,13 @@ class ModelBIN_ColSeg:
             return
 
         # parsing properties
-        self.min_geo_cube_x = binjo_utils.read_bytes(file_data, file_offset + 0x00, 2, type="signed")
-        self.min_geo_cube_y = binjo_utils.read_bytes(file_data, file_offset + 0x02, 2, type="signed")
-        self.min_geo_cube_z = binjo_utils.read_bytes(file_data, file_offset + 0x04, 2, type="signed")
-        self.max_geo_cube_x = binjo_utils.read_bytes(file_data, file_offset + 0x06, 2, type="signed")
-        self.max_geo_cube_y = binjo_utils.read_bytes(file_data, file_offset + 0x08, 2, type="signed")
-        self.max_geo_cube_z = binjo_utils.read_bytes(file_data, file_offset + 0x0A, 2, type="signed")
-        self.stride_y       = binjo_utils.read_bytes(file_data, file_offset + 0x0C, 2)
-        self.stride_z       = binjo_utils.read_bytes(file_data, file_offset + 0x0E, 2)
-        self.geo_cube_cnt   = binjo_utils.read_bytes(file_data, file_offset + 0x10, 2)
-        self.geo_cube_scale = binjo_utils.read_bytes(file_data, file_offset + 0x12, 2)
-        self.tri_cnt        = binjo_utils.read_bytes(file_data, file_offset + 0x14, 2)
-        self.unk_1          = binjo_utils.read_bytes(file_data, file_offset + 0x16, 2)
+        (
+            self.min_geo_cube_x, self.min_geo_cube_y, self.min_geo_cube_z,
+            self.max_geo_cube_x, self.max_geo_cube_y, self.max_geo_cube_z,
+            self.stride_y, self.stride_z,
+            self.geo_cube_cnt, self.geo_cube_scale,
+            self.tri_cnt, self.unk_1
+        ) = ModelBIN_ColSeg.HEADER_LAYOUT.unpack_from(file_data, file_offset)
 
         # calculated properties
         self.unique_tri_cnt = 0
@@ -121,22 +121,22 @@ class ModelBIN_ColSeg:
         self.file_offset_cubes  = file_offset + ModelBIN_ColSeg.HEADER_SIZE
         self.file_offset_tris   = file_offset + ModelBIN_ColSeg.HEADER_SIZE + (self.geo_cube_cnt * ModelBIN_GeoCubeElem.SIZE)
 
-        self.geo_cube_list = []
-        for idx in range(0, self.geo_cube_cnt):
-            file_offset_geo_cube = self.file_offset_cubes + (idx * ModelBIN_GeoCubeElem.SIZE)
-            cube = ModelBIN_GeoCubeElem()
-            cube.populate_from_data(file_data, file_offset_geo_cube)
-            self.geo_cube_list.append(cube)
-
-        self.tri_list = []
-        for idx in range(0, self.tri_cnt):
-            file_offset_tri = self.file_offset_tris + (idx * ModelBIN_TriElem.SIZE)
-            tri = ModelBIN_TriElem()
-            tri.build_from_binary_data(file_data, file_offset_tri)
-            self.tri_list.append(tri)
-
-        # python trick to remove duplicates; sets are always unique
-        self.unique_tri_list = list(frozenset(self.tri_list))
+        # decode the cubes and tris in one go each, and only then wrap them into their Elem classes
+        cube_array = np.frombuffer(file_data, dtype=ModelBIN_GeoCubeElem.DTYPE, count=self.geo_cube_cnt, offset=self.file_offset_cubes)
+        self.geo_cube_list = ModelBIN_GeoCubeElem.build_list_from_array(cube_array)
+
+        tri_array = np.frombuffer(file_data, dtype=ModelBIN_TriElem.DTYPE, count=self.tri_cnt, offset=self.file_offset_tris)
+        self.tri_arrays = ModelBIN_TriArrays.build_from_array(tri_array)
+        self.tri_list = self.tri_arrays.get_views()
+
+        # python trick to remove duplicates; sets are always unique. The set is built from the hash-tuples
+        # of the tris instead of the tris themselves, which results in the same order (same hashes, same
+        # insertion order), but doesnt need to go through the views for every single hash
+        tri_keys = list(zip(*self.tri_arrays.indices[:self.tri_cnt].T.tolist(), tri_array["collision_type"].tolist(), [None] * self.tri_cnt))
+        first_tri_ids = {}
+        for (idx, tri_key) in enumerate(tri_keys):
+            first_tri_ids.setdefault(tri_key, idx)
+        self.unique_tri_list = [self.tri_list[first_tri_ids[tri_key]] for tri_key in frozenset(tri_keys)]
         self.unique_tri_cnt = len(self.unique_tri_list)
 
         print(f"parsed {self.tri_cnt} collision tris within {self.geo_cube_cnt} cubes.")
@@ -225,6 +225,8 @@ class ModelBIN_ColSeg:
 
 class ModelBIN_GeoCubeElem:
     SIZE = 0x04
+    LAYOUT = struct.Struct(">HH")
+    DTYPE = np.dtype([("starting_tri_ID", ">u2"), ("tri_cnt", ">u2")])
 
     def __init__(self, x_id=0, y_id=0, z_id=0, cube_scale=1000):
         self.scale = cube_scale
@@ -236,10 +238,19 @@ class ModelBIN_GeoCubeElem:
 
     def populate_from_data(self, file_data, file_offset):
         # parsing properties
-        self.starting_tri_ID    = binjo_utils.read_bytes(file_data, file_offset + 0x00, 2)
-        self.tri_cnt            = binjo_utils.read_bytes(file_data, file_offset + 0x02, 2)
+        (self.starting_tri_ID, self.tri_cnt) = ModelBIN_GeoCubeElem.LAYOUT.unpack_from(file_data, file_offset)
         return
 
+    # cube_array is a structured array of DTYPE
+    def build_list_from_array(cube_array):
+        cube_list = []
+        for (starting_tri_ID, tri_cnt) in zip(cube_array["starting_tri_ID"].tolist(), cube_array["tri_cnt"].tolist()):
+            cube = ModelBIN_GeoCubeElem()
+            cube.starting_tri_ID = starting_tri_ID
+            cube.tri_cnt = tri_cnt
+            cube_list.append(cube)
+        return cube_list
+
     def get_bytes(self):
         output = bytearray()
         output += binjo_utils.int_to_bytes(self.starting_tri_ID, 2)
@@ -249,24 +260,145 @@ class ModelBIN_GeoCubeElem:
 
 
 
+# columnar storage for tris; the ModelBIN_TriElem objects are only thin views onto a single row of these
+# arrays. The storage grows on demand (see append()), so only the first tri_cnt rows are actually in use
+class ModelBIN_TriArrays:
+    # column name: (dtype, default value, component count); None-able values are stored as -1
+    COLUMNS = {
+        "indices":          (np.int32, 0,       3),
+        "unk_1":            (np.int32, 0,       1),
+        "collision_type":   (np.int64, -1,      1),
+        "tex_idx":          (np.int32, -1,      1),
+        "visible":          (np.bool_, False,   1),
+        # TS params
+        "T_clamp":          (np.bool_, False,   1),
+        "T_mirror":         (np.bool_, False,   1),
+        "T_wrap":           (np.int32, 0,       1),
+        "T_shift":          (np.int32, 0,       1),
+        "S_clamp":          (np.bool_, False,   1),
+        "S_mirror":         (np.bool_, False,   1),
+        "S_wrap":           (np.int32, 0,       1),
+        "S_shift":          (np.int32, 0,       1),
+        # assigned in ModelBIN.arrange_mesh_data()
+        "mat_index":        (np.int32, 0,       1),
+    }
+
+    def __init__(self, tri_cnt=0):
+        self.tri_cnt = tri_cnt
+        self.capacity = tri_cnt
+        for (column_name, (dtype, default, components)) in ModelBIN_TriArrays.COLUMNS.items():
+            shape = (tri_cnt, components) if (components > 1) else (tri_cnt,)
+            setattr(self, column_name, np.full(shape, default, dtype=dtype))
+
+    def __len__(self):
+        return self.tri_cnt
+
+    # tri_array is a structured array of ModelBIN_TriElem.DTYPE
+    def build_from_array(tri_array):
+        arrays = ModelBIN_TriArrays(len(tri_array))
+        for (column, name) in enumerate(("index_1", "index_2", "index_3")):
+            arrays.indices[:, column] = tri_array[name]
+        arrays.unk_1[:] = tri_array["unk_1"]
+        arrays.collision_type[:] = tri_array["collision_type"]
+        return arrays
+
+    # add cnt defaulted rows at the end (growing the storage if needed), and return the ID of the first one
+    def append(self, cnt=1):
+        first_idx = self.tri_cnt
+        if (self.tri_cnt + cnt > self.capacity):
+            self.capacity = max(self.tri_cnt + cnt, 2 * self.capacity, 0x100)
+            for (column_name, (dtype, default, components)) in ModelBIN_TriArrays.COLUMNS.items():
+                shape = (self.capacity, components) if (components > 1) else (self.capacity,)
+                column = np.full(shape, default, dtype=dtype)
+                column[:self.tri_cnt] = getattr(self, column_name)[:self.tri_cnt]
+                setattr(self, column_name, column)
+        self.tri_cnt += cnt
+        return first_idx
+
+    def get_views(self):
+        return [ModelBIN_TriElem(self, idx) for idx in range(0, self.tri_cnt)]
+
+    # copy the given tris (views onto any storage) to the end of this storage, and return views onto the copies
+    def extend_from_tris(self, tri_list):
+        first_idx = self.append(len(tri_list))
+        for (offset, tri) in enumerate(tri_list):
+            for column_name in ModelBIN_TriArrays.COLUMNS.keys():
+                getattr(self, column_name)[first_idx + offset] = getattr(tri.arrays, column_name)[tri.idx]
+        views = [ModelBIN_TriElem(self, first_idx + offset) for offset in range(0, len(tri_list))]
+        for (view, tri) in zip(views, tri_list):
+            view.vtx_1, view.vtx_2, view.vtx_3 = tri.vtx_1, tri.vtx_2, tri.vtx_3
+        return views
+
+
+
+# property that reads/writes a single cell of the ModelBIN_TriArrays column behind a ModelBIN_TriElem;
+# for none_able columns, None is stored as -1
+def tri_column_property(column_name, component=None, none_able=False):
+    def getter(self):
+        column = getattr(self.arrays, column_name)
+        value = (column[self.idx] if (component is None) else column[self.idx, component]).item()
+        if (none_able == True and value == -1):
+            return None
+        return value
+    def setter(self, value):
+        if (none_able == True and value is None):
+            value = -1
+        if (component is None):
+            getattr(self.arrays, column_name)[self.idx] = value
+        else:
+            getattr(self.arrays, column_name)[self.idx, component] = value
+    return property(getter, setter)
+
+
+
 class ModelBIN_TriElem:
     # NOTE: this is strictly the size of a tri in the binary collision segment !
     SIZE = 0x0C
+    LAYOUT = struct.Struct(">4HI")
+    DTYPE = np.dtype([
+        ("index_1", ">u2"), ("index_2", ">u2"), ("index_3", ">u2"), ("unk_1", ">u2"),
+        ("collision_type", ">u4")
+    ])
+
+    # the linked VTX objects are the only per-tri data that isn't stored in the ModelBIN_TriArrays
+    __slots__ = ("arrays", "idx", "vtx_1", "vtx_2", "vtx_3")
+
+    index_1         = tri_column_property("indices", 0)
+    index_2         = tri_column_property("indices", 1)
+    index_3         = tri_column_property("indices", 2)
+    unk_1           = tri_column_property("unk_1")
+    collision_type  = tri_column_property("collision_type", none_able=True)
+    tex_idx         = tri_column_property("tex_idx", none_able=True)
+    visible         = tri_column_property("visible")
+    # TS params
+    T_clamp         = tri_column_property("T_clamp")
+    T_mirror        = tri_column_property("T_mirror")
+    T_wrap          = tri_column_property("T_wrap")
+    T_shift         = tri_column_property("T_shift")
+    S_clamp         = tri_column_property("S_clamp")
+    S_mirror        = tri_column_property("S_mirror")
+    S_wrap          = tri_column_property("S_wrap")
+    S_shift         = tri_column_property("S_shift")
+    mat_index       = tri_column_property("mat_index")
 
     # NOTE: the existance of coll_type determines if this tri is collidable;
     #       the existance of tex_id determines if this tri is visible
-    def __init__(self):
+    # without any arrays, the element gets a (defaulted) storage of its own
+    def __init__(self, arrays=None, idx=0):
+        if (arrays is None):
+            arrays = ModelBIN_TriArrays(1)
+            idx = 0
+        self.arrays = arrays
+        self.idx = idx
         self.vtx_1 = None
         self.vtx_2 = None
         self.vtx_3 = None
         
     def build_from_binary_data(self, file_data, file_offset):
         # parsing properties
-        self.index_1        = binjo_utils.read_bytes(file_data, file_offset + 0x00, 2)
-        self.index_2        = binjo_utils.read_bytes(file_data, file_offset + 0x02, 2)
-        self.index_3        = binjo_utils.read_bytes(file_data, file_offset + 0x04, 2)
-        self.unk_1          = binjo_utils.read_bytes(file_data, file_offset + 0x06, 2)
-        self.collision_type = binjo_utils.read_bytes(file_data, file_offset + 0x08, 4)
+        (
+            self.index_1, self.index_2, self.index_3, self.unk_1, self.collision_type
+        ) = ModelBIN_TriElem.LAYOUT.unpack_from(file_data, file_offset)
         self.tex_idx        = None
         self.visible        = False
         return
@@ -335,6 +467,19 @@ class ModelBIN_TriElem:
             return True
         return False
 
+    # canonical key for all cyclic permutations of the indices; two tris share this key
+    # exactly when compare_only_indices() would consider them identical, so it can be used
+    # to look up matching tris in a dict instead of scanning a list
+    def get_rotation_key(self):
+        return ModelBIN_TriElem.get_rotation_key_from_indices(self.index_1, self.index_2, self.index_3)
+
+    def get_rotation_key_from_indices(idx1, idx2, idx3):
+        return min(
+            (idx1, idx2, idx3),
+            (idx2, idx3, idx1),
+            (idx3, idx1, idx2)
+        )
+
     # built-in equals() method; used to evaluate (A == B) expressions
     def __eq__(self, other):
         if not isinstance(other, ModelBIN_TriElem):
@@ -403,6 +403,8 @@ class TileDescriptor:
 
 class ModelBIN_DLSeg:
     HEADER_SIZE = 0x08
+    # the RSP vertex buffer can hold 32 vertices at once
+    VTX_BUFFER_SIZE = 0x20
 
     def __init__(self):
         self.valid = False
@@ -418,12 +420,11 @@ class ModelBIN_DLSeg:
         # parsing properties
         self.command_cnt = binjo_utils.read_bytes(file_data, file_offset + 0x00, 4)
 
-        self.command_list = []
-        for idx in range(0, self.command_cnt):
-            file_offset_cmd = file_offset + ModelBIN_DLSeg.HEADER_SIZE + (0x08 * idx)
-            upper = binjo_utils.read_bytes(file_data, file_offset_cmd + 0x00, 4)
-            lower = binjo_utils.read_bytes(file_data, file_offset_cmd + 0x04, 4)
-            self.command_list.append(DisplayList_Command(upper, lower))
+        # decode all (upper, lower) word-pairs in one go
+        command_words = np.frombuffer(
+            file_data, dtype=">u4", count=(2 * self.command_cnt), offset=(file_offset + ModelBIN_DLSeg.HEADER_SIZE)
+        ).reshape(-1, 2).tolist()
+        self.command_list = [DisplayList_Command(upper, lower) for (upper, lower) in command_words]
 
         self.valid = True
         return
@@ -450,30 +451,122 @@ class ModelBIN_DLSeg:
             output += binjo_utils.int_to_bytes(cmd.full, 8)
         return output
 
-    # build the command-chunk that first loads the corresponding VTXs and then draws the TRIs
+    # build the drawing commands for the tris of a single material (see group_tris_by_material()).
+    # the tris are split into batches whose vertices fit into the vertex buffer together; tris that share vertices
+    # with the current batch are preferred, so shared vertices only have to be loaded once. Every batch loads its
+    # vertices with one G_VTX per contiguous run of vertex IDs (G_VTX can only load consecutive vertices from the
+    # VTX segment), and then draws its tris in G_TRI2 pairs (and a G_TRI1 for an odd tri out).
     # NOTE: A maximum of 0x20 = 32 VTXs can be loaded at once !
-    #       This also assumes that all VTX IDs are ordered and unique for now <-- bad !
-    def build_tri_drawing_commands(tri_list):
+    # with verbose, the command and vertex load counts are printed against the ones of the previous builder
+    def build_tri_drawing_commands(tri_list, verbose=False):
+        tri_cnt = len(tri_list)
+        tri_vtx_ids = [(tri.index_1, tri.index_2, tri.index_3) for tri in tri_list]
+        vtx_to_tris = {}
+        for (tri_id, vtx_ids) in enumerate(tri_vtx_ids):
+            for vtx_id in set(vtx_ids):
+                vtx_to_tris.setdefault(vtx_id, []).append(tri_id)
+
+        drawn = [False] * tri_cnt
+        batches = []
+        next_undrawn = 0
+        while (next_undrawn < tri_cnt):
+            batch_vtx = set()
+            batch_tris = []
+            candidates = {next_undrawn}
+            while True:
+                # pick the adjacent tri that needs the fewest new vertices (and the earliest one on a tie)
+                best = None
+                for tri_id in candidates:
+                    new_vtx_cnt = len(set(tri_vtx_ids[tri_id]) - batch_vtx)
+                    if (len(batch_vtx) + new_vtx_cnt <= ModelBIN_DLSeg.VTX_BUFFER_SIZE):
+                        if (best is None or (new_vtx_cnt, tri_id) < best):
+                            best = (new_vtx_cnt, tri_id)
+                # if no adjacent tri fits anymore, fill up the buffer with the next undrawn tris that still fit
+                if (best is None):
+                    tri_id = next_undrawn
+                    while (tri_id < tri_cnt and len(batch_vtx) + 3 <= ModelBIN_DLSeg.VTX_BUFFER_SIZE):
+                        if (drawn[tri_id] == False):
+                            new_vtx_cnt = len(set(tri_vtx_ids[tri_id]) - batch_vtx)
+                            if (len(batch_vtx) + new_vtx_cnt <= ModelBIN_DLSeg.VTX_BUFFER_SIZE):
+                                best = (new_vtx_cnt, tri_id)
+                                break
+                        tri_id += 1
+                if (best is None):
+                    break
+                # and add it to the batch
+                tri_id = best[1]
+                drawn[tri_id] = True
+                batch_tris.append(tri_id)
+                batch_vtx.update(tri_vtx_ids[tri_id])
+                candidates.discard(tri_id)
+                for vtx_id in tri_vtx_ids[tri_id]:
+                    candidates.update(adj_id for adj_id in vtx_to_tris[vtx_id] if drawn[adj_id] == False)
+            batches.append((batch_vtx, batch_tris))
+            while (next_undrawn < tri_cnt and drawn[next_undrawn] == True):
+                next_undrawn += 1
+
         DL_command_chunk = []
-        # the smallest index should probably be calculated as the actual min later
-        smallest_index = tri_list[0].index_1
-        DL_command_chunk.append(DisplayList_Command(full=
-            DisplayList_Command.G_VTX(0, (3 * len(tri_list)), smallest_index)
-        ))
-        for tri in tri_list:
-            # its guaranteed that I have an even number of tris at this point
-            DL_command_chunk.append(DisplayList_Command(full=
-                DisplayList_Command.G_TRI2(
-                    (tri.index_1 - smallest_index),
-                    (tri.index_2 - smallest_index),
-                    (tri.index_3 - smallest_index),
-                    (tri.index_1 - smallest_index),
-                    (tri.index_2 - smallest_index),
-                    (tri.index_3 - smallest_index)
-                )
-            ))
+        for (batch_vtx, batch_tris) in batches:
+            # split the vertices into contiguous runs, and load each run right behind the previous one
+            buffer_slots = {}
+            buffer_target = 0
+            vtx_ids = sorted(batch_vtx)
+            run_start = 0
+            for idx in range(1, len(vtx_ids) + 1):
+                if (idx == len(vtx_ids) or vtx_ids[idx] != vtx_ids[idx - 1] + 1):
+                    run_length = (idx - run_start)
+                    DL_command_chunk.append(DisplayList_Command(full=
+                        DisplayList_Command.G_VTX(buffer_target, run_length, vtx_ids[run_start])
+                    ))
+                    for offset in range(0, run_length):
+                        buffer_slots[vtx_ids[run_start + offset]] = (buffer_target + offset)
+                    buffer_target += run_length
+                    run_start = idx
+            # then draw the tris, two at a time
+            for idx in range(0, len(batch_tris), 2):
+                slots_A = [buffer_slots[vtx_id] for vtx_id in tri_vtx_ids[batch_tris[idx]]]
+                if (idx + 1 < len(batch_tris)):
+                    slots_B = [buffer_slots[vtx_id] for vtx_id in tri_vtx_ids[batch_tris[idx + 1]]]
+                    DL_command_chunk.append(DisplayList_Command(full=
+                        DisplayList_Command.G_TRI2(*slots_A, *slots_B)
+                    ))
+                else:
+                    DL_command_chunk.append(DisplayList_Command(full=
+                        DisplayList_Command.G_TRI1(*slots_A)
+                    ))
+
+        if (verbose == True):
+            # the previous builder loaded 3 vertices per tri with a single G_VTX, and drew every tri in its own G_TRI2
+            (cmd_cnt, vtx_load_cnt) = ModelBIN_DLSeg.get_DL_stats(DL_command_chunk)
+            print(f"built drawing commands for {tri_cnt} tris in {len(batches)} vertex batches:")
+            print(f" ==> DL commands: {1 + tri_cnt} -> {cmd_cnt}; vertex loads: {3 * tri_cnt} -> {vtx_load_cnt}")
         return DL_command_chunk
 
+    # count the commands and the loaded vertices of a DL; both translate directly into RSP time
+    def get_DL_stats(command_list):
+        vtx_load_cnt = 0
+        for cmd in command_list:
+            # NOTE: decoding from cmd.upper, which is right for parsed commands and commands built with full=
+            #       alike (cmd.full is wrong for parsed ones, and cmd.command_byte for built ones)
+            if ((cmd.upper >> 24) == Dicts.F3DEX_CMD_NAMES["G_VTX"]):
+                vtx_load_cnt += binjo_utils.apply_bitmask(cmd.upper, (0b11_1111 << 10))
+        return (len(command_list), vtx_load_cnt)
+
+    # group the visible tris by their material (texture and TS params), keeping the order in which they appear;
+    # each of the groups can then be passed to build_tri_drawing_commands()
+    def group_tris_by_material(tri_list):
+        tri_groups = {}
+        for tri in tri_list:
+            if (tri.visible == False):
+                continue
+            material_key = (
+                tri.tex_idx,
+                tri.T_clamp, tri.T_mirror, tri.T_wrap, tri.T_shift,
+                tri.S_clamp, tri.S_mirror, tri.S_wrap, tri.S_shift
+            )
+            tri_groups.setdefault(material_key, []).append(tri)
+        return tri_groups
+
 
     def build_setup_commands(tex_element, mode=0):
         command_list = []
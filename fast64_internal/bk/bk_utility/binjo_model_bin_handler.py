@@ -1,6 +1,7 @@
 
 from . import binjo_utils
 from . binjo_model_bin import ModelBIN
+from . binjo_rom_reader import ROM_Reader, ModelBIN_Cache
 
 import os
 
@@ -9,29 +10,34 @@ import os
 class ModelBIN_Handler:
 
     def __init__(self, rom_filename=None):
-        self.ROM_name = rom_filename
+        self.ROM_name = None
+        self.ROM_reader = None
         self.ROM_data = None
         self.model_object = None
-
-        if (rom_filename is None):
-            return
-        with open(rom_filename, mode="rb") as rom_file:
-            self.ROM_data = rom_file.read()
+        self.change_source_ROM(rom_filename)
 
 
-    # change to a different ROM
+    # change to a different ROM; the ROM is memory-mapped, so this doesnt read the whole file
     def change_source_ROM(self, rom_filename):
+        if (self.ROM_reader is not None):
+            self.ROM_reader.close()
         self.ROM_name = rom_filename
+        self.ROM_reader = None
         self.ROM_data = None
         if (rom_filename is None):
             return
-        with open(rom_filename, mode="rb") as rom_file:
-            self.ROM_data = rom_file.read()
-
-
-    # load a model file from a ROM via model-filename
-    def load_model_file_from_ROM(self, model_filename):
-        model_file_data = binjo_utils.extract_model(self.ROM_data, model_filename)
+        self.ROM_reader = ROM_Reader(rom_filename)
+        self.ROM_data = self.ROM_reader.data
+
+
+    # load a model file from a ROM via model-filename; decompressed models are cached in
+    # asset_dir (next to the ROM by default), so loading the same model again skips the ROM
+    def load_model_file_from_ROM(self, model_filename, asset_dir=None):
+        if (asset_dir is None):
+            asset_dir = os.path.dirname(self.ROM_name)
+        model_cache = ModelBIN_Cache(asset_dir)
+        extracted = binjo_utils.extract_model_cached(self.ROM_reader, model_filename, model_cache)
+        model_file_data = (None if extracted is None else extracted[1])
         if (model_file_data is None or len(model_file_data) == 0):
             print(f"Model File \"{model_filename}\" could not be loaded !")
             print(f"Either Binjo straight up failed on it, or its empty !")
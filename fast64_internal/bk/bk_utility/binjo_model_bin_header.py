@@ -1,7 +1,12 @@
 
+import struct
+
 from . import binjo_utils
 
 class ModelBIN_Header:
+    SIZE = 0x38
+    # the whole header in one go; field order matches the ADDR_ offsets below
+    LAYOUT = struct.Struct(">IIHHI IIII IIII HHI")
 
     ADDR_geo_offset      = 0x04    
     ADDR_tex_offset      = 0x08
@@ -51,26 +56,16 @@ class ModelBIN_Header:
             return        
             
         # parsed properties
-        # === 0x00 ========================================================
-        self.start_identifier   = binjo_utils.read_bytes(bin_data, 0x00,                                4)
-        self.geo_offset         = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_geo_offset,     4)
-        self.tex_offset         = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_tex_offset,     2)
-        self.geo_type           = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_geo_type,       2)
-        self.DL_offset          = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_DL_offset,      4)
-        # === 0x10 ========================================================
-        self.vtx_offset         = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_vtx_offset,     4)
-        self.unk_1              = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_unk_1,          4)
-        self.bone_offset        = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_bone_offset,    4)
-        self.coll_offset        = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_coll_offset,    4)
-        # === 0x20 ========================================================
-        self.FX_END             = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_FX_END,         4)
-        self.FX_offset          = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_FX_offset,      4)
-        self.unk_2              = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_unk_2,          4)
-        self.anim_tex_offset    = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_anim_tex_offset,4)
-        # === 0x30 ========================================================
-        self.tri_cnt            = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_tri_cnt,        2)
-        self.vtx_cnt            = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_vtx_cnt,        2)
-        self.unk_3              = binjo_utils.read_bytes(bin_data, ModelBIN_Header.ADDR_unk_3,          4)
+        (
+            # === 0x00 ========================================================
+            self.start_identifier, self.geo_offset, self.tex_offset, self.geo_type, self.DL_offset,
+            # === 0x10 ========================================================
+            self.vtx_offset, self.unk_1, self.bone_offset, self.coll_offset,
+            # === 0x20 ========================================================
+            self.FX_END, self.FX_offset, self.unk_2, self.anim_tex_offset,
+            # === 0x30 ========================================================
+            self.tri_cnt, self.vtx_cnt, self.unk_3
+        ) = ModelBIN_Header.LAYOUT.unpack_from(bin_data, 0x00)
 
         # PARSING COMPLETE
         self.valid = True
@@ -1,12 +1,20 @@
 
 from . import binjo_utils
 from . binjo_dicts import Dicts
+import numpy as np
 import os
+import struct
 import sys
-import bpy
+# bpy is only needed to create the Blender images; without it (e.g. for headless batch
+# extraction), the texture data is still parsed but no Blender_IMG is created
+try:
+    import bpy
+except ImportError:
+    bpy = None
 
 class ModelBIN_TexSeg:
     HEADER_SIZE = 0x08
+    HEADER_LAYOUT = struct.Struct(">IHH")
 
     def __init__(self):
         self.valid = False
@@ -23,9 +31,7 @@ class ModelBIN_TexSeg:
 
         # parsed properties
         # === 0x00 ===============================
-        self.data_size  = binjo_utils.read_bytes(data, file_offset + 0x00, 4)
-        self.tex_cnt    = binjo_utils.read_bytes(data, file_offset + 0x04, 2)
-        self.unk_1      = binjo_utils.read_bytes(data, file_offset + 0x06, 2)
+        (self.data_size, self.tex_cnt, self.unk_1) = ModelBIN_TexSeg.HEADER_LAYOUT.unpack_from(data, file_offset)
 
         # computing properties
         self.meta_data_size = (self.tex_cnt * ModelBIN_TexElem.META_SIZE)
@@ -33,10 +39,8 @@ class ModelBIN_TexSeg:
         self.file_offset_data = file_offset + self.full_header_size
 
         # now get all the tex elements; first, grab all the data offsets though
-        img_data_offsets = []
-        for idx in range(0, self.tex_cnt):
-            file_offset_meta = file_offset + ModelBIN_TexSeg.HEADER_SIZE + (idx * ModelBIN_TexElem.META_SIZE)
-            img_data_offsets.append(binjo_utils.read_bytes(data, file_offset_meta + 0x00, 4))
+        meta_array = np.frombuffer(data, dtype=ModelBIN_TexElem.META_DTYPE, count=self.tex_cnt, offset=self.file_offset_meta)
+        img_data_offsets = meta_array["datasection_offset_data"].tolist()
         # the final entry is slightly "fake" because its just the end of all img data, but I need this for size-calc
         img_data_offsets.append(self.data_size - self.full_header_size)
         self.tex_elements = []
@@ -103,6 +107,11 @@ class ModelBIN_TexSeg:
 class ModelBIN_TexElem:
     # not calling this just "SIZE" because the element itself also contains the (disjunct) data..
     META_SIZE = 0x10
+    META_LAYOUT = struct.Struct(">IHHBBHI")
+    META_DTYPE = np.dtype([
+        ("datasection_offset_data", ">u4"), ("tex_type", ">u2"), ("unk_1", ">u2"),
+        ("width", "u1"), ("height", "u1"), ("unk_2", ">u2"), ("unk_3", ">u4")
+    ])
 
     # input the file_offset to the meta element
     def __init__(self):
@@ -124,13 +133,10 @@ class ModelBIN_TexElem:
     def build_from_data(self, data, file_offset_meta, file_offset_data, img_data_size):
         # parsed properties (META elements)
         # === 0x00 ===============================
-        self.datasection_offset_data = binjo_utils.read_bytes(data, file_offset_meta + 0x00, 4)
-        self.tex_type                = binjo_utils.read_bytes(data, file_offset_meta + 0x04, 2)
-        self.unk_1                   = binjo_utils.read_bytes(data, file_offset_meta + 0x06, 2)
-        self.width                   = binjo_utils.read_bytes(data, file_offset_meta + 0x08, 1)
-        self.height                  = binjo_utils.read_bytes(data, file_offset_meta + 0x09, 1)
-        self.unk_2                   = binjo_utils.read_bytes(data, file_offset_meta + 0x0A, 2)
-        self.unk_3                   = binjo_utils.read_bytes(data, file_offset_meta + 0x0C, 4)
+        (
+            self.datasection_offset_data, self.tex_type, self.unk_1,
+            self.width, self.height, self.unk_2, self.unk_3
+        ) = ModelBIN_TexElem.META_LAYOUT.unpack_from(data, file_offset_meta)
 
         # locators
         self.file_offset_meta = file_offset_meta
@@ -168,6 +174,9 @@ class ModelBIN_TexElem:
             self.width, self.height
         )
 
+        if (bpy is None):
+            self.Blender_IMG = None
+            return
         self.Blender_IMG = bpy.data.images.new("tmp", width=self.width, height=self.height)
         self.Blender_IMG.file_format = 'PNG'
         # Blenders bpy.data.images expects the RGBA values to range inbetween (0.0, 1.0) instead of (0, 255)
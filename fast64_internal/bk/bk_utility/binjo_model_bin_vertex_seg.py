@@ -2,9 +2,12 @@
 from . import binjo_utils
 
 import numpy as np
+import struct
 
 class ModelBIN_VtxSeg:
     HEADER_SIZE = 0x18
+    # min xyz, max xyz, center xyz, local_norm (signed), vtx_cnt (unsigned), global_norm (signed)
+    HEADER_LAYOUT = struct.Struct(">10hHh")
 
     # it's not guaranteed that there is a proper VTX count inside this segment,
     # so pass over the one from the BIN Header segment instead
@@ -22,18 +25,12 @@ class ModelBIN_VtxSeg:
         self.file_offset = file_offset
         self.file_offset_data = file_offset + ModelBIN_VtxSeg.HEADER_SIZE
         # parsing properties
-        self.min_x =        binjo_utils.read_bytes(file_data, file_offset + 0x00, 2, type="signed")
-        self.min_y =        binjo_utils.read_bytes(file_data, file_offset + 0x02, 2, type="signed")
-        self.min_z =        binjo_utils.read_bytes(file_data, file_offset + 0x04, 2, type="signed")
-        self.max_x =        binjo_utils.read_bytes(file_data, file_offset + 0x06, 2, type="signed")
-        self.max_y =        binjo_utils.read_bytes(file_data, file_offset + 0x08, 2, type="signed")
-        self.max_z =        binjo_utils.read_bytes(file_data, file_offset + 0x0A, 2, type="signed")
-        self.center_x =     binjo_utils.read_bytes(file_data, file_offset + 0x0C, 2, type="signed")
-        self.center_y =     binjo_utils.read_bytes(file_data, file_offset + 0x0E, 2, type="signed")
-        self.center_z =     binjo_utils.read_bytes(file_data, file_offset + 0x10, 2, type="signed")
-        self.local_norm =   binjo_utils.read_bytes(file_data, file_offset + 0x12, 2, type="signed")
-        self.vtx_cnt =      binjo_utils.read_bytes(file_data, file_offset + 0x14, 2)
-        self.global_norm =  binjo_utils.read_bytes(file_data, file_offset + 0x16, 2, type="signed")
+        (
+            self.min_x, self.min_y, self.min_z,
+            self.max_x, self.max_y, self.max_z,
+            self.center_x, self.center_y, self.center_z,
+            self.local_norm, self.vtx_cnt, self.global_norm
+        ) = ModelBIN_VtxSeg.HEADER_LAYOUT.unpack_from(file_data, file_offset)
 
         # if the vtx_cnt parsed from the VTX-Seg Header is different from the one from the BIN-Header,
         # assume this is a mistake and give a warning on the console window
@@ -43,40 +40,31 @@ class ModelBIN_VtxSeg:
         if (bin_header_vtx_cnt != 0):
             self.vtx_cnt = bin_header_vtx_cnt
 
-        self.vtx_list = []
-        for idx in range(0, self.vtx_cnt):
-            file_offset_vtx = self.file_offset_data + (idx * ModelBIN_VtxElem.SIZE)
-            vtx = ModelBIN_VtxElem.build_from_binary_data(file_data, file_offset_vtx)
-            self.vtx_list.append(vtx)
+        # decode all vertices in one go into the columnar storage; the VtxElems are only views onto it
+        vtx_array = np.frombuffer(file_data, dtype=ModelBIN_VtxElem.DTYPE, count=self.vtx_cnt, offset=self.file_offset_data)
+        self.vtx_arrays = ModelBIN_VtxArrays.build_from_array(vtx_array)
+        self.vtx_list = self.vtx_arrays.get_views()
 
         print(f"parsed {self.vtx_cnt} vertices.")
         self.valid = True
         return
 
     def populate_from_vtx_list(self, vtx_list):
-        # take on the supplied vtx list
+        # take on the supplied vtx list; its elements are moved into our own columnar storage
         self.vtx_list = vtx_list
         self.vtx_cnt = len(vtx_list)
+        self.vtx_arrays = ModelBIN_VtxArrays.build_from_vtx_list(vtx_list)
         # infer minmax coords and center coords from the list
-        x_coords = [vtx.x for vtx in vtx_list]
-        y_coords = [vtx.y for vtx in vtx_list]
-        z_coords = [vtx.z for vtx in vtx_list]
-        self.min_x = int(np.min(x_coords))
-        self.min_y = int(np.min(y_coords))
-        self.min_z = int(np.min(z_coords))
-        self.max_x = int(np.max(x_coords))
-        self.max_y = int(np.max(y_coords))
-        self.max_z = int(np.max(z_coords))
+        coords = self.vtx_arrays.coords.astype(np.int64)
+        (self.min_x, self.min_y, self.min_z) = coords.min(axis=0).tolist()
+        (self.max_x, self.max_y, self.max_z) = coords.max(axis=0).tolist()
         self.center_x = int((self.min_x + self.max_x) / 2)
         self.center_y = int((self.min_y + self.max_y) / 2)
         self.center_z = int((self.min_z + self.max_z) / 2)
         # aswell as the maximum local (distance to center) and global (distance to origin) norms
-        center = ModelBIN_VtxElem()
-        center.x, center.y, center.z = self.center_x, self.center_y, self.center_z
-        origin = ModelBIN_VtxElem()
-        origin.x, origin.y, origin.z = 0, 0, 0
-        local_norms = [vtx.distance_to(center) for vtx in vtx_list]
-        global_norms = [vtx.distance_to(origin) for vtx in vtx_list]
+        center = np.array([self.center_x, self.center_y, self.center_z], dtype=np.int64)
+        local_norms = np.sqrt(np.sum((coords - center) ** 2, axis=1))
+        global_norms = np.sqrt(np.sum(coords ** 2, axis=1))
         self.local_norm = int(np.max(local_norms))
         self.global_norm = int(np.max(global_norms))
         # and donezo
@@ -104,37 +92,114 @@ class ModelBIN_VtxSeg:
 
 
 
+# columnar storage for the vertices of a model; the ModelBIN_VtxElem objects are only thin views onto
+# a single row of these arrays, so whole-model operations (like arrange_mesh_data) can work on the arrays directly
+class ModelBIN_VtxArrays:
+
+    def __init__(self, vtx_cnt=0):
+        # actual Coords (xyz)
+        self.coords = np.zeros((vtx_cnt, 3), dtype=np.int32)
+        # UV Tex Coords (uv)
+        self.uvs = np.zeros((vtx_cnt, 2), dtype=np.int32)
+        # RGBA Vtx-Shading
+        self.shades = np.full((vtx_cnt, 4), 0xFF, dtype=np.uint8)
+        # intrinsics (Blender UVs)
+        self.transformed_uvs = np.zeros((vtx_cnt, 2), dtype=np.float64)
+
+    def __len__(self):
+        return len(self.coords)
+
+    # vtx_array is a structured array of ModelBIN_VtxElem.DTYPE
+    def build_from_array(vtx_array):
+        arrays = ModelBIN_VtxArrays(len(vtx_array))
+        for (column, name) in enumerate(("x", "y", "z")):
+            arrays.coords[:, column] = vtx_array[name]
+        for (column, name) in enumerate(("u", "v")):
+            arrays.uvs[:, column] = vtx_array[name]
+        for (column, name) in enumerate(("r", "g", "b", "a")):
+            arrays.shades[:, column] = vtx_array[name]
+        return arrays
+
+    # gather the data of (possibly standalone) VtxElems into one storage, and turn them into views onto it
+    def build_from_vtx_list(vtx_list):
+        arrays = ModelBIN_VtxArrays(len(vtx_list))
+        for (idx, vtx) in enumerate(vtx_list):
+            arrays.coords[idx]          = vtx.arrays.coords[vtx.idx]
+            arrays.uvs[idx]             = vtx.arrays.uvs[vtx.idx]
+            arrays.shades[idx]          = vtx.arrays.shades[vtx.idx]
+            arrays.transformed_uvs[idx] = vtx.arrays.transformed_uvs[vtx.idx]
+        for (idx, vtx) in enumerate(vtx_list):
+            vtx.arrays = arrays
+            vtx.idx = idx
+        return arrays
+
+    def get_views(self):
+        return [ModelBIN_VtxElem(self, idx) for idx in range(0, len(self))]
+
+    # same as ModelBIN_VtxElem.calc_transformed_UVs(), but for many vertices at once; every entry of the
+    # other arrays belongs to the vertex at the same position in vtx_ids. If a vertex is listed more than
+    # once, the last entry wins (just like calling calc_transformed_UVs() on it repeatedly)
+    def calc_transformed_UVs(self, vtx_ids, S_shifts, T_shifts, tex_widths, tex_heights):
+        vtx_ids = np.asarray(vtx_ids, dtype=np.int64)
+        if (len(vtx_ids) == 0):
+            return
+        # find the last occurrence of every vertex
+        (unique_ids, reversed_first) = np.unique(vtx_ids[::-1], return_index=True)
+        last = (len(vtx_ids) - 1) - reversed_first
+        uvs = self.uvs[unique_ids].astype(np.float64)
+        self.transformed_uvs[unique_ids, 0] = ((uvs[:, 0] / 64.0) + np.asarray(S_shifts)[last] + 0.5) / np.asarray(tex_widths)[last]
+        self.transformed_uvs[unique_ids, 1] = ((uvs[:, 1] / 64.0) + np.asarray(T_shifts)[last] + 0.5) / np.asarray(tex_heights)[last]
+
+
+
+# property that reads/writes a single cell of the ModelBIN_VtxArrays column behind a ModelBIN_VtxElem
+def vtx_column_property(column_name, component):
+    def getter(self):
+        return getattr(self.arrays, column_name)[self.idx, component].item()
+    def setter(self, value):
+        getattr(self.arrays, column_name)[self.idx, component] = value
+    return property(getter, setter)
+
+
+
 class ModelBIN_VtxElem:
     SIZE = 0x10
+    LAYOUT = struct.Struct(">3hxx2h4B")
+    DTYPE = np.dtype([
+        ("x", ">i2"), ("y", ">i2"), ("z", ">i2"), ("pad", ">i2"),
+        ("u", ">i2"), ("v", ">i2"),
+        ("r", "u1"), ("g", "u1"), ("b", "u1"), ("a", "u1")
+    ])
 
-    def __init__(self):
-        # actual Coords
-        self.x = 0
-        self.y = 0
-        self.z = 0
-        # UV Tex Coords
-        self.u = 0
-        self.v = 0
-        # RGBA Vtx-Shading
-        self.r = 0xFF
-        self.g = 0xFF
-        self.b = 0xFF
-        self.a = 0xFF
-        # intrinsics
-        self.transformed_U = 0.0
-        self.transformed_V = 0.0
+    __slots__ = ("arrays", "idx")
+
+    # actual Coords
+    x = vtx_column_property("coords", 0)
+    y = vtx_column_property("coords", 1)
+    z = vtx_column_property("coords", 2)
+    # UV Tex Coords
+    u = vtx_column_property("uvs", 0)
+    v = vtx_column_property("uvs", 1)
+    # RGBA Vtx-Shading
+    r = vtx_column_property("shades", 0)
+    g = vtx_column_property("shades", 1)
+    b = vtx_column_property("shades", 2)
+    a = vtx_column_property("shades", 3)
+    # intrinsics
+    transformed_U = vtx_column_property("transformed_uvs", 0)
+    transformed_V = vtx_column_property("transformed_uvs", 1)
+
+    # without any arrays, the element gets a (defaulted) storage of its own
+    def __init__(self, arrays=None, idx=0):
+        if (arrays is None):
+            arrays = ModelBIN_VtxArrays(1)
+            idx = 0
+        self.arrays = arrays
+        self.idx = idx
 
     def build_from_binary_data(file_data, file_offset):
         vtx = ModelBIN_VtxElem()
-        vtx.x = binjo_utils.read_bytes(file_data, file_offset + 0x00, 2, type="signed")
-        vtx.y = binjo_utils.read_bytes(file_data, file_offset + 0x02, 2, type="signed")
-        vtx.z = binjo_utils.read_bytes(file_data, file_offset + 0x04, 2, type="signed")
-        vtx.u = binjo_utils.read_bytes(file_data, file_offset + 0x08, 2, type="signed")
-        vtx.v = binjo_utils.read_bytes(file_data, file_offset + 0x0A, 2, type="signed")
-        vtx.r = binjo_utils.read_bytes(file_data, file_offset + 0x0C, 1)
-        vtx.g = binjo_utils.read_bytes(file_data, file_offset + 0x0D, 1)
-        vtx.b = binjo_utils.read_bytes(file_data, file_offset + 0x0E, 1)
-        vtx.a = binjo_utils.read_bytes(file_data, file_offset + 0x0F, 1)
+        (vtx.x, vtx.y, vtx.z, vtx.u, vtx.v, vtx.r, vtx.g, vtx.b, vtx.a) = ModelBIN_VtxElem.LAYOUT.unpack_from(file_data, file_offset)
         # print(f"v {vtx.x:+5d}, {vtx.y:+5d}, {vtx.z:+5d}")
         return vtx
 
@@ -186,13 +251,14 @@ class ModelBIN_VtxElem:
         self.u = int(64.0 * ((self.transformed_U * w_factor) - 0.5))
         self.v = int(64.0 * ((self.transformed_V * h_factor) - 0.5))
 
+    # the clone gets a storage of its own, so it can be modified without touching the original
     def clone(self):
-        return self.__class__(
-            self.x, self.y, self.z,
-            self.u, self.v,
-            self.r, self.g, self.b, self.a,
-            self.transformed_U, self.transformed_V
-        )
+        vtx = ModelBIN_VtxElem()
+        vtx.arrays.coords[0]            = self.arrays.coords[self.idx]
+        vtx.arrays.uvs[0]               = self.arrays.uvs[self.idx]
+        vtx.arrays.shades[0]            = self.arrays.shades[self.idx]
+        vtx.arrays.transformed_uvs[0]   = self.arrays.transformed_uvs[self.idx]
+        return vtx
 
     def __eq__(self, other):
         if not isinstance(other, ModelBIN_VtxElem):
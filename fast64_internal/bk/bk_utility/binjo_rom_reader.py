@@ -0,0 +1,152 @@
+import hashlib
+import mmap
+import os
+import re
+import weakref
+
+
+
+# the ROM is memory-mapped instead of read into a bytes object; slicing self.data
+# returns memoryviews into the mapping, so nothing is copied until its actually needed
+class ROM_Reader:
+
+    # hashing a 16+ MB ROM is not free, so remember the hash per (path, size, mtime)
+    known_hashes = {}
+
+    def __init__(self, rom_filename):
+        self.ROM_name = rom_filename
+        self.rom_file = open(rom_filename, mode="rb")
+        self.rom_map = mmap.mmap(self.rom_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = memoryview(self.rom_map)
+        # live views handed out by get_slice(), released on close(); views that were
+        # already dropped by their users fall out of the set on their own
+        self.slices = weakref.WeakSet()
+
+    def __enter__(self):
+        return self
+
+    # while an exception is on its way out, its traceback frames can still hold views into the
+    # data (ex. a failed decompression); closing must not hide that exception behind a BufferError
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(strict=(exc_type is None))
+
+    def __len__(self):
+        return len(self.data)
+
+    # the mapping can only be closed once no view into it is alive anymore; the views handed out
+    # by get_slice() are released here, any other view still in use (or a numpy array built on top
+    # of one) raises a BufferError instead of leaking the mapping silently. Without strict, the
+    # mapping is left to be closed by the garbage collector once those other views are gone.
+    def close(self, strict=True):
+        if (self.data is None):
+            return
+        try:
+            for view in list(self.slices):
+                view.release()
+            self.slices.clear()
+            self.data.release()
+            self.rom_map.close()
+        except BufferError as err:
+            if (strict == True):
+                raise BufferError(
+                    f"Cannot close the ROM \"{self.ROM_name}\", a view into its data is still in use !"
+                ) from err
+        finally:
+            self.rom_file.close()
+            self.data = None
+
+    # zero-copy view onto [start, end); only valid until the reader is closed
+    def get_slice(self, start, end):
+        view = self.data[start:end]
+        self.slices.add(view)
+        return view
+
+    def get_hash(self):
+        stat = os.stat(self.ROM_name)
+        hash_key = (os.path.abspath(self.ROM_name), stat.st_size, stat.st_mtime_ns)
+        if (hash_key not in ROM_Reader.known_hashes):
+            ROM_Reader.known_hashes[hash_key] = hashlib.sha1(self.data).hexdigest()
+        return ROM_Reader.known_hashes[hash_key]
+
+
+
+# on-disk cache of decompressed model BINs; every entry is addressed by the hash of the ROM it was
+# extracted from, and the pointer-table address of the model within that ROM. Once the cache grows
+# past max_size, the least recently used entries are evicted.
+class ModelBIN_Cache:
+
+    DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+    ENTRY_PATTERN = re.compile(r"extracted_(0x[0-9A-F]{8})_([0-9a-f]{16})\.bin")
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def get_entry_path(self, rom_hash, PT_Address):
+        return os.path.join(self.cache_dir, f"extracted_0x{PT_Address:08X}_{rom_hash[:16]}.bin")
+
+    # entries that were written before the cache existed only know their pointer-table address
+    def get_legacy_entry_path(self, PT_Address):
+        return os.path.join(self.cache_dir, f"extracted_0x{PT_Address:08X}.bin")
+
+    def list_entries(self):
+        if (os.path.isdir(self.cache_dir) == False):
+            return []
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if (ModelBIN_Cache.ENTRY_PATTERN.fullmatch(file_name) is None):
+                continue
+            file_path = os.path.join(self.cache_dir, file_name)
+            stat = os.stat(file_path)
+            entries.append((stat.st_mtime, stat.st_size, file_path))
+        return entries
+
+    def read_entry(self, file_path):
+        with open(file_path, mode="rb") as model_file:
+            model_data = model_file.read()
+        # touch the entry, so eviction knows it was used recently
+        os.utime(file_path)
+        return model_data
+
+    # returns (file_path, model_data), or None if the model isn't cached yet;
+    # without a rom_hash, the most recently used entry for that address is returned
+    def get(self, PT_Address, rom_hash=None):
+        if (rom_hash is not None):
+            file_path = self.get_entry_path(rom_hash, PT_Address)
+            if (os.path.isfile(file_path) == False):
+                return None
+            return file_path, self.read_entry(file_path)
+
+        legacy_path = self.get_legacy_entry_path(PT_Address)
+        if (os.path.isfile(legacy_path) == True):
+            with open(legacy_path, mode="rb") as model_file:
+                return legacy_path, model_file.read()
+        prefix = f"extracted_0x{PT_Address:08X}_"
+        matches = [entry for entry in self.list_entries() if os.path.basename(entry[2]).startswith(prefix)]
+        if (len(matches) == 0):
+            return None
+        file_path = max(matches)[2]
+        return file_path, self.read_entry(file_path)
+
+    def put(self, PT_Address, rom_hash, model_data):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        file_path = self.get_entry_path(rom_hash, PT_Address)
+        # write to a temp file first, so an interrupted write never leaves a broken entry behind
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "wb") as model_file:
+            model_file.write(model_data)
+        os.replace(tmp_path, file_path)
+        self.evict(keep=file_path)
+        return file_path
+
+    # drop the least recently used entries until the cache fits into max_size again
+    def evict(self, keep=None):
+        entries = sorted(self.list_entries())
+        total_size = sum(entry[1] for entry in entries)
+        for (_, size, file_path) in entries:
+            if (total_size <= self.max_size):
+                break
+            if (file_path == keep):
+                continue
+            os.remove(file_path)
+            total_size -= size
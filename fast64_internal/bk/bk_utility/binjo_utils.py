@@ -8,6 +8,7 @@ import os.path
 from . import binjo_model_LU
 # from .. import bk_constants
 from . binjo_dicts import Dicts
+from . binjo_rom_reader import ROM_Reader, ModelBIN_Cache
 
 from timeit import default_timer as timer
 
@@ -54,17 +55,11 @@ def to_decal_hex(val, dig, prefix="0x"):
         return f"{prefix}{val:02X}"
 
 def read_bytes(data, offset, cnt, type="uint"):
-    result = 0x00
-    for i in range(0, cnt):
-        result *= 0x100
-        result += data[offset + i]
-
+    # int.from_bytes() does the byte-wise accumulation (and the 2s complement) in C
     if (type == "uint" or type =="u"):
-        return result
+        return int.from_bytes(data[offset:(offset + cnt)], byteorder="big", signed=False)
     if (type == "signed" or type == "s"):
-        if (result >> ((cnt * 8) - 1) == 0b01):
-            result = int(result - np.power(2.0, (cnt * 8)))
-        return result
+        return int.from_bytes(data[offset:(offset + cnt)], byteorder="big", signed=True)
 
 def get_bytes(data, offset, cnt):
     return data[offset:(offset+cnt)]
@@ -89,11 +84,8 @@ def apply_bitmask(value, mask):
     # apply mask
     tmp_val = (value & mask)
     # and shift the value according to the masks position
-    # (== r-shifting both until the lowest mask-bit is set)
-    while (mask & 0b01 == 0):
-        tmp_val = tmp_val >> 1
-        mask = mask >> 1
-    return tmp_val
+    # (== r-shifting both until the lowest mask-bit is set; (mask & -mask) isolates that bit)
+    return tmp_val >> ((mask & -mask).bit_length() - 1)
 
 # cut VALUE in the shape of BIT_LEN and shift it by BIT_OFFSET to the left
 def shift_cut(value, bit_offset, bit_len):
@@ -160,118 +152,75 @@ def create_IMG_from_bytes(pixel_data, w, h):
 
 
     
+# expand an array of RGBA5551 texels into an (n, 4) array of RGBA8888 colors
+def convert_RGBA5551_to_RGBA8888(color_values):
+    color_values = color_values.astype(np.uint16)
+    colors = np.empty((len(color_values), 4), dtype=np.uint8)
+    # NOTE: keeping the exact float math here (instead of integer math) so the results
+    #       are bit-identical to the per-texel conversion that was used before
+    colors[:, 0] = (((color_values >> 0xB) & 0b011111) / 0b011111 * 0xFF).astype(np.uint8)  # R
+    colors[:, 1] = (((color_values >> 0x6) & 0b011111) / 0b011111 * 0xFF).astype(np.uint8)  # G
+    colors[:, 2] = (((color_values >> 0x1) & 0b011111) / 0b011111 * 0xFF).astype(np.uint8)  # B
+    # and grab alpha from final bit
+    colors[:, 3] = (color_values & 0b0001) * 0xFF
+    return colors
+
 # https://n64squid.com/homebrew/n64-sdk/textures/image-formats/
+# NOTE: all formats are decoded as whole arrays; the N64 is big-endian, so every
+#       multi-byte texel is read through a ">u2" dtype
 def convert_img_data_to_pixels(bin_data, tex_type, w, h):
+    px_cnt = (w * h)
+
     if (tex_type == Dicts.TEX_TYPES["CI4"]): # C4 or CI4; 16 RGB5551-colors, pixels are encoded per row as 4bit IDs
-        
         # first parse the color palette
-        color_palette = np.zeros((0x10, 4), dtype=np.uint8)
-        for i in range(0, 0x10):
-            color_value = read_bytes(bin_data, (i*2), 2)
-            # RGB5551
-            color_palette[i, 0] = int(((color_value >> 0xB) & 0b011111) / 0b011111 * 0xFF)  # R
-            color_palette[i, 1] = int(((color_value >> 0x6) & 0b011111) / 0b011111 * 0xFF)  # G
-            color_palette[i, 2] = int(((color_value >> 0x1) & 0b011111) / 0b011111 * 0xFF)  # B
-            # and grab alpha from final bit
-            color_palette[i, 3] = (color_value & 0b0001) * 0xFF
-
-        # then parse the image data
-        pixel_data = np.zeros((h, w, 4), dtype=np.uint8)
-        for y in range(0, h):
-            for x in range(0, w):
-                # calc the pixel index
-                px_id = (y * w) + x
-                # NOTE: this grabs the full byte, but the actual ID is only one nibble of that -> split it
-                pal_id = read_bytes(bin_data, (0x20 + (px_id // 2)), 1)
-                if px_id % 2 == 0:
-                    pal_id = (pal_id >> 4) & 0b1111
-                else:
-                    pal_id = (pal_id >> 0) & 0b1111
-                # NOTE: the python Image constructors expect the colors to be in RGB...
-                pixel_data[y, x, 0] = color_palette[pal_id, 0]
-                pixel_data[y, x, 1] = color_palette[pal_id, 1]
-                pixel_data[y, x, 2] = color_palette[pal_id, 2]
-                pixel_data[y, x, 3] = color_palette[pal_id, 3]
+        color_palette = convert_RGBA5551_to_RGBA8888(np.frombuffer(bin_data, dtype=">u2", count=0x10, offset=0))
+
+        # then parse the image data; every byte holds 2 IDs, with the first pixel in the upper nibble
+        packed_ids = np.frombuffer(bin_data, dtype=np.uint8, count=((px_cnt + 1) // 2), offset=0x20)
+        pal_ids = np.empty((len(packed_ids) * 2), dtype=np.uint8)
+        pal_ids[0::2] = (packed_ids >> 4) & 0b1111
+        pal_ids[1::2] = (packed_ids >> 0) & 0b1111
+        # NOTE: the python Image constructors expect the colors to be in RGB...
+        pixel_data = color_palette[pal_ids[:px_cnt]].reshape((h, w, 4))
         return color_palette, pixel_data
 
     if (tex_type == Dicts.TEX_TYPES["CI8"]): # C8 or CI8; 32 RGBA5551-colors, pixels are encoded per row as 8bit IDs
-        
         # first parse the color palette
-        color_palette = np.zeros((0x100, 4), dtype=np.uint8)
-        for i in range(0, 0x100):
-            color_value = read_bytes(bin_data, (i*2), 2)
-            # RGB5551
-            color_palette[i, 0] = int(((color_value >> 0xB) & 0b011111) / 0b011111 * 0xFF)  # R
-            color_palette[i, 1] = int(((color_value >> 0x6) & 0b011111) / 0b011111 * 0xFF)  # G
-            color_palette[i, 2] = int(((color_value >> 0x1) & 0b011111) / 0b011111 * 0xFF)  # B
-            # and grab alpha from final bit
-            color_palette[i, 3] = (color_value & 0b0001) * 0xFF
+        color_palette = convert_RGBA5551_to_RGBA8888(np.frombuffer(bin_data, dtype=">u2", count=0x100, offset=0))
 
         # then parse the image data
-        pixel_data = np.zeros((h, w, 4), dtype=np.uint8)
-        for y in range(0, h):
-            for x in range(0, w):
-                # calc the pixel index
-                px_id = (y * w) + x
-                pal_id = read_bytes(bin_data, (0x200 + px_id), 1)
-                # NOTE: the python Image constructors expect the colors to be in RGB...
-                pixel_data[y, x, 0] = color_palette[pal_id, 0] # R
-                pixel_data[y, x, 1] = color_palette[pal_id, 1] # G
-                pixel_data[y, x, 2] = color_palette[pal_id, 2] # B
-                pixel_data[y, x, 3] = color_palette[pal_id, 3] # A
+        pal_ids = np.frombuffer(bin_data, dtype=np.uint8, count=px_cnt, offset=0x200)
+        # NOTE: the python Image constructors expect the colors to be in RGB...
+        pixel_data = color_palette[pal_ids].reshape((h, w, 4))
         return color_palette, pixel_data
 
     if (tex_type == Dicts.TEX_TYPES["RGBA16"]): # RGBA16 or RGBA5551 without a palette; pixels stored as a 16bit texel
-
         # parse the image data
-        pixel_data = np.zeros((h, w, 4), dtype=np.uint8)
-        for y in range(0, h):
-            for x in range(0, w):
-                # calc the pixel index
-                px_id = (y * w) + x
-                color_value = read_bytes(bin_data, (px_id * 2), 2)
-                # NOTE: the python Image constructors expect the colors to be in RGB...
-                pixel_data[y, x, 0] = int(((color_value >> 0xB) & 0b011111) / 0b011111 * 0xFF)  # R
-                pixel_data[y, x, 1] = int(((color_value >> 0x6) & 0b011111) / 0b011111 * 0xFF)  # G
-                pixel_data[y, x, 2] = int(((color_value >> 0x1) & 0b011111) / 0b011111 * 0xFF)  # B
-                pixel_data[y, x, 3] = (color_value & 0b1) * 0xFF  # A
+        color_values = np.frombuffer(bin_data, dtype=">u2", count=px_cnt, offset=0)
+        pixel_data = convert_RGBA5551_to_RGBA8888(color_values).reshape((h, w, 4))
         return None, pixel_data
 
     if (tex_type == Dicts.TEX_TYPES["RGBA32"]): # RGBA32 or RGBA8888 without a palette; pixels stored as a 32bit texel
-
-        # parse the image data
-        pixel_data = np.zeros((h, w, 4), dtype=np.uint8)
-        for y in range(0, h):
-            for x in range(0, w):
-                # calc the pixel index
-                px_id = (y * w) + x
-                # NOTE: the python Image constructors expect the colors to be in RGB...
-                pixel_data[y, x, 0] = int(bin_data[(px_id * 4) + 0]) # R
-                pixel_data[y, x, 1] = int(bin_data[(px_id * 4) + 1]) # G
-                pixel_data[y, x, 2] = int(bin_data[(px_id * 4) + 2]) # B
-                pixel_data[y, x, 3] = int(bin_data[(px_id * 4) + 3]) # A
+        # parse the image data; this is already in the RGBA8888 layout that we want
+        pixel_data = np.frombuffer(bin_data, dtype=np.uint8, count=(px_cnt * 4), offset=0).reshape((h, w, 4)).copy()
         return None, pixel_data
 
     if (tex_type == Dicts.TEX_TYPES["IA8"]): # IA8 - each byte is a pixel; a nibble of intensity and a nibble of alpha
-
         # parse the image data
-        pixel_data = np.zeros((h, w, 4), dtype=np.uint8)
-        for y in range(0, h):
-            for x in range(0, w):
-                # calc the pixel index
-                px_id = (y * w) + x
-                # in IA8, the first nibble is the intensity => every color-value
-                # NOTE: This math looks pretty weird, but the 2nd summand is just to interpolate the values from
-                #       a nibble into a byte, to avoid rounding oddities
-                intensity = int( ((bin_data[px_id] << 0) & 0b11110000) + ((bin_data[px_id] >> 4) & 0b00001111) )
-                alpha     = int( ((bin_data[px_id] << 4) & 0b11110000) + ((bin_data[px_id] >> 0) & 0b00001111) )
-
-                # NOTE: the python Image constructors expect the colors to be in RGB...
-                pixel_data[y, x, 0] = intensity  # R
-                pixel_data[y, x, 1] = intensity  # G
-                pixel_data[y, x, 2] = intensity  # B
-                pixel_data[y, x, 3] = alpha      # A
-        return None, pixel_data
+        texels = np.frombuffer(bin_data, dtype=np.uint8, count=px_cnt, offset=0)
+        # in IA8, the first nibble is the intensity => every color-value
+        # NOTE: This math looks pretty weird, but the 2nd summand is just to interpolate the values from
+        #       a nibble into a byte, to avoid rounding oddities
+        intensity = ((texels << 0) & 0b11110000) + ((texels >> 4) & 0b00001111)
+        alpha     = ((texels << 4) & 0b11110000) + ((texels >> 0) & 0b00001111)
+
+        # NOTE: the python Image constructors expect the colors to be in RGB...
+        pixel_data = np.empty((px_cnt, 4), dtype=np.uint8)
+        pixel_data[:, 0] = intensity  # R
+        pixel_data[:, 1] = intensity  # G
+        pixel_data[:, 2] = intensity  # B
+        pixel_data[:, 3] = alpha      # A
+        return None, pixel_data.reshape((h, w, 4))
 
 
 
@@ -426,6 +375,168 @@ def convert_IMG_pixels_into_palette_indices(IMG_color_pixels, palette):
 
 
 
+# NOTE: the functions below are the NumPy quantization engine that is used on export;
+#       ColorPixel, approx_palette_by_most_used_with_diversity() and convert_IMG_pixels_into_palette_indices()
+#       above are the per-pixel reference implementation, and both produce identical palettes and indices.
+#       Colors are handled as (n, 4) int64 arrays of RGBA8888 values in here.
+
+# convert Blenders float pixels into an (n, 4) array of 5-bit rounded colors, mapping alpha to
+# all-or-nothing the same way ColorPixel() does
+def convert_float_pixels_to_color_array(float_pixels):
+    # round every color value to 5-bit
+    # NOTE: np.round() rounds half to even, just like pythons round()
+    byte_pixels = (np.round(255 * np.asarray(float_pixels, dtype=np.float64)).astype(np.int64) >> 3) << 3
+    color_array = byte_pixels.reshape((-1, 4))
+    transparent = (color_array[:, 3] < (255 / 2))
+    color_array[transparent] = (0xFF, 0xFF, 0xFF, 0x00)
+    color_array[~transparent, 3] = 0xFF
+    return color_array
+
+def convert_RGBA8888_to_RGBA5551(color_array):
+    r = (color_array[:, 0] >> 3) & 0b11111
+    g = (color_array[:, 1] >> 3) & 0b11111
+    b = (color_array[:, 2] >> 3) & 0b11111
+    a = (color_array[:, 3] > (255 / 2)).astype(np.int64)
+    return (r << 11) + (g << 6) + (b << 1) + (a << 0)
+
+# floored euclidean distance between every color in colors_A and every color in colors_B (see ColorPixel.color_distance)
+def calc_color_distance_matrix(colors_A, colors_B):
+    diff = colors_A[:, np.newaxis, :] - colors_B[np.newaxis, :, :]
+    return np.floor(np.sqrt(np.sum(diff * diff, axis=-1)))
+
+# merge 2 colors weighted by their occurences; the alpha is taken from the more used color
+def merge_weighted_colors(color_A, occurences_A, color_B, occurences_B):
+    combined_occurences = (occurences_A + occurences_B)
+    merger_alpha = color_A[3] if (occurences_A > occurences_B) else color_B[3]
+    # map alpha to all-or-nothing
+    if (merger_alpha < (255 / 2)):
+        return (0xFF, 0xFF, 0xFF, 0x00), combined_occurences
+    merged_color = tuple(
+        round(((int(color_A[ch]) * occurences_A) + (int(color_B[ch]) * occurences_B)) / combined_occurences)
+        for ch in range(0, 3)
+    )
+    return (merged_color + (0xFF,)), combined_occurences
+
+# array version of approx_palette_by_most_used_with_diversity(); the palette is kept in fixed slots,
+# and each slot remembers the position it would have in the reference implementations list via a
+# sequence number, which is needed to resolve ties the same way the reference does.
+# Returns the palette as a (color_cnt, 4) array.
+def quantize_color_array_by_most_used_with_diversity(color_array, color_cnt, diversity_threshold=3):
+    # first create a unique palette from the colors, counting their occurences
+    keys = (color_array[:, 0] << 24) | (color_array[:, 1] << 16) | (color_array[:, 2] << 8) | color_array[:, 3]
+    _, first_ids, counts = np.unique(keys, return_index=True, return_counts=True)
+    # sort by occurences (high occurences == important color); ties keep the order of first appearance
+    order = np.lexsort((first_ids, -counts))
+    unique_colors = color_array[first_ids[order]]
+    unique_counts = counts[order]
+    unique_cnt = len(unique_colors)
+
+    # if there arent enough colors to fill the palette, pad it out; there is nothing to merge in that case
+    if (unique_cnt <= color_cnt):
+        padding = np.tile(np.array([0xFF, 0xFF, 0xFF, 0x00], dtype=np.int64), (color_cnt - unique_cnt, 1))
+        return np.concatenate((unique_colors, padding))
+
+    # now build the reduced palette by using the top (color_cnt) colors
+    slot_colors = unique_colors[:color_cnt].copy()
+    slot_occurences = [int(cnt) for cnt in unique_counts[:color_cnt]]
+    slot_seq = np.arange(color_cnt)
+    next_seq = color_cnt
+    next_color = color_cnt
+
+    # identical colors are never considered a match, so mask them out (that includes the diagonal)
+    distances = calc_color_distance_matrix(slot_colors, slot_colors)
+    distances[distances == 0] = np.inf
+
+    def update_slot_distances(slot):
+        slot_distances = calc_color_distance_matrix(slot_colors[slot:slot + 1], slot_colors)[0]
+        slot_distances[slot_distances == 0] = np.inf
+        distances[slot, :] = slot_distances
+        distances[:, slot] = slot_distances
+
+    # now check if the reduced palette contains colors that are less diverse than our
+    # diversity_threshold argument, merge them and pull in another color instead
+    while (next_color < unique_cnt):
+        # find the worst diversity match (ie. the closest 2 colors); if there are several, use the pair
+        # that comes first in list order
+        worst_diversity_match = distances.min()
+        # if the worst diversity is acceptable (or there is no valid pair), we can stop
+        if not (worst_diversity_match <= diversity_threshold):
+            break
+        slots_A, slots_B = np.nonzero(distances == worst_diversity_match)
+        seq_lo = np.minimum(slot_seq[slots_A], slot_seq[slots_B])
+        seq_hi = np.maximum(slot_seq[slots_A], slot_seq[slots_B])
+        pair = np.lexsort((seq_hi, seq_lo))[0]
+        match_A, match_B = (slots_A[pair], slots_B[pair])
+        if (slot_seq[match_A] > slot_seq[match_B]):
+            match_A, match_B = match_B, match_A
+
+        # otherwise, merge the matches into a new color
+        merged_color, merged_occurences = merge_weighted_colors(
+            slot_colors[match_A], slot_occurences[match_A],
+            slot_colors[match_B], slot_occurences[match_B]
+        )
+        # add the merger, and pull in another new color from the remaining palette
+        slot_colors[match_A] = merged_color
+        slot_occurences[match_A] = merged_occurences
+        slot_seq[match_A] = next_seq
+        slot_colors[match_B] = unique_colors[next_color]
+        slot_occurences[match_B] = int(unique_counts[next_color])
+        slot_seq[match_B] = next_seq + 1
+        next_seq += 2
+        next_color += 1
+        update_slot_distances(match_A)
+        update_slot_distances(match_B)
+
+    # second pass: get the next best colors (until they stop mattering) and merge them in aswell
+    while (next_color < unique_cnt):
+        # get the next best color
+        next_best_color = unique_colors[next_color]
+        next_best_occurences = int(unique_counts[next_color])
+        next_color += 1
+        # if the color is really meaningless (< 0.3% usage), stop
+        if (next_best_occurences < (len(color_array) * 0.3 / 100.0)):
+            break
+
+        # find the worst diversity match (ie. the closest 2 colors)
+        next_distances = calc_color_distance_matrix(next_best_color[np.newaxis, :], slot_colors)[0]
+        next_distances[next_distances == 0] = np.inf
+        worst_diversity_match = next_distances.min()
+        # the color is already part of the palette
+        if (worst_diversity_match == np.inf):
+            continue
+        candidates = np.nonzero(next_distances == worst_diversity_match)[0]
+        match_B = candidates[np.argmin(slot_seq[candidates])]
+
+        # in this pass, definetely merge the colors
+        merged_color, merged_occurences = merge_weighted_colors(
+            next_best_color, next_best_occurences,
+            slot_colors[match_B], slot_occurences[match_B]
+        )
+        # replace the original with the merger
+        slot_colors[match_B] = merged_color
+        slot_occurences[match_B] = merged_occurences
+        slot_seq[match_B] = next_seq
+        next_seq += 1
+        update_slot_distances(match_B)
+
+    # and we are finally done ! (returning the slots in list order)
+    return slot_colors[np.argsort(slot_seq)]
+
+# array version of convert_IMG_pixels_into_palette_indices(); every unique color is only matched once,
+# and the nearest palette entry (first one on ties) is then broadcast back onto the pixels
+def convert_color_array_into_palette_indices(color_array, palette, chunk_size=0x400):
+    keys = (color_array[:, 0] << 24) | (color_array[:, 1] << 16) | (color_array[:, 2] << 8) | color_array[:, 3]
+    _, first_ids, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    unique_colors = color_array[first_ids]
+    unique_indices = np.empty(len(unique_colors), dtype=np.int64)
+    # chunked, so big images dont build a gigantic distance matrix
+    for start in range(0, len(unique_colors), chunk_size):
+        distances = calc_color_distance_matrix(unique_colors[start:start + chunk_size], palette)
+        unique_indices[start:start + chunk_size] = np.argmin(distances, axis=1)
+    return unique_indices[inverse.reshape(-1)]
+
+
+
 def check_IMG_data_for_transparency(IMG_data, tex_type):
     # in both CI formats, it suffices to check the palette for an alpha entry;
     # all colors are RGBA8888 in CI palettes, and we only need to check the A component
@@ -445,60 +556,33 @@ def check_IMG_data_for_transparency(IMG_data, tex_type):
 def convert_RGBA32_IMG_to_bytes(IMG, tex_type):
 
     if (tex_type == Dicts.TEX_TYPES["CI4"]): # C4 or CI4; 16 RGBA5551-colors, pixels are encoded per row as 4bit IDs
-        # print("Converting IMG to CI4 palette + indices...")
-
-        # round every color value to 5-bit 
-        byte_pixels = [((round(255 * val) >> 3) << 3) for val in IMG.pixels]
-        color_pixels = []
-        for px in range(len(byte_pixels) // 4):
-            # unroll the next 4 values into RGBA
-            r, g, b, a = byte_pixels[(4 * px) + 0 : (4 * px) + 4]
-            cpx = ColorPixel(r, g, b, a)
-            color_pixels.append(cpx)
-
-        palette = approx_palette_by_most_used_with_diversity(color_pixels, 0x10, diversity_threshold=3)
-        indices = convert_IMG_pixels_into_palette_indices(color_pixels, palette)
-        # convert palette and indices into a bytearray
-        data = bytearray()
-        for color in palette:
-            data += int_to_bytes(int(color.convert_8888_to_5551()), 2)
-        for idx in range(0, (len(indices) // 2)):
-            concat_index = ((indices[2*idx + 0] & 0x0F) << 4) + ((indices[2*idx + 1] & 0x0F) << 0)
-            data += int_to_bytes(concat_index, 1)
-
-        color_pixels = [palette[idx] for idx in indices]
-        pixels = []
-        [pixels.extend([cpx.r, cpx.g, cpx.b, cpx.a]) for cpx in color_pixels]
-        return data, pixels
-
-    if (tex_type == Dicts.TEX_TYPES["CI8"]): # C8 or CI8; 256 RGBA5551-colors, pixels are encoded per row as 8bit IDs
-        # print("Converting IMG to CI8 palette + indices...")
-        
-        # round every color value to 5-bit 
-        byte_pixels = [((round(255 * val) >> 3) << 3) for val in IMG.pixels]
-        color_pixels = []
-        for px in range(len(byte_pixels) // 4):
-            # unroll the next 4 values into RGBA
-            r, g, b, a = byte_pixels[(4 * px) + 0 : (4 * px) + 4]
-            cpx = ColorPixel(r, g, b, a)
-            color_pixels.append(cpx)
-
-        palette = approx_palette_by_most_used_with_diversity(color_pixels, 0x100, diversity_threshold=3)
-        indices = convert_IMG_pixels_into_palette_indices(color_pixels, palette)
-        # convert palette and indices into a bytearray
-        data = bytearray()
-        for color in palette:
-            data += int_to_bytes(int(color.convert_8888_to_5551()), 2)
-        for idx in range(0, len(indices)):
-            data += int_to_bytes(indices[idx], 1)
-
-        color_pixels = [palette[idx] for idx in indices]
-        pixels = []
-        [pixels.extend([cpx.r, cpx.g, cpx.b, cpx.a]) for cpx in color_pixels]
-        return data, pixels
-    
-    print("Unknown tex type in convert_IMG_to_palette_and_pixels() !")
-    return None, None
+        color_cnt = 0x10
+    elif (tex_type == Dicts.TEX_TYPES["CI8"]): # C8 or CI8; 256 RGBA5551-colors, pixels are encoded per row as 8bit IDs
+        color_cnt = 0x100
+    else:
+        print("Unknown tex type in convert_IMG_to_palette_and_pixels() !")
+        return None, None
+
+    # grab all the pixels in one go; indexing into IMG.pixels directly is very slow
+    float_pixels = np.empty(len(IMG.pixels), dtype=np.float32)
+    IMG.pixels.foreach_get(float_pixels)
+    color_array = convert_float_pixels_to_color_array(float_pixels)
+
+    palette = quantize_color_array_by_most_used_with_diversity(color_array, color_cnt, diversity_threshold=3)
+    indices = convert_color_array_into_palette_indices(color_array, palette)
+    # convert palette and indices into a bytearray
+    data = bytearray()
+    data += convert_RGBA8888_to_RGBA5551(palette).astype(">u2").tobytes()
+    if (tex_type == Dicts.TEX_TYPES["CI4"]):
+        # 2 IDs per byte; the first pixel goes into the upper nibble
+        pair_cnt = (len(indices) // 2)
+        concat_indices = ((indices[0 : 2*pair_cnt : 2] & 0x0F) << 4) + ((indices[1 : 2*pair_cnt : 2] & 0x0F) << 0)
+        data += concat_indices.astype(np.uint8).tobytes()
+    else:
+        data += indices.astype(np.uint8).tobytes()
+
+    pixels = palette[indices].flatten().tolist()
+    return data, pixels
 
 
 
@@ -506,81 +590,57 @@ def convert_RGBA32_IMG_to_bytes(IMG, tex_type):
 # https://dyn4j.org/2010/01/sat/
 # NOTE: Tris and Cubes are always convex; Cubes are always axis-aligned and rasterized
 def tri_intersects_cube(tri, cube):
-    # put the vertex coords into np arrays for speed
-    A = np.array([tri.vtx_1.x, tri.vtx_1.y, tri.vtx_1.z])
-    B = np.array([tri.vtx_2.x, tri.vtx_2.y, tri.vtx_2.z])
-    C = np.array([tri.vtx_3.x, tri.vtx_3.y, tri.vtx_3.z])
-
-    # shift both bodies so that the cube's center sits at origin
-    # (the cube doesnt actually need to be shifted, bc it's relative)
-    A = A - cube.center
-    B = B - cube.center
-    C = C - cube.center
-    # obviously dont need to recalc tri-sidelengths a,b,c and tri-norm n because those are all relative to cube-sides A,B,C
-
-    # now we can check all 13 SA's; Starting with the 3 cube normals, because those are the softest computationally
-    # NOTE: because the cube normals are always the carthesian unit vectors, I know the results here a priori, so
-    # I can skip ahead in the projection-calculation; example for cube nx:
-    # pA = np.dot(tri.A, cube_nx) == tri.A.x
-    # pB = np.dot(tri.B, cube_nx) == tri.B.x
-    # pC = np.dot(tri.C, cube_nx) == tri.C.x
-    #
-    # NOTE: the projected extent of the cube is always L if projected along a cube normal
-    #       --> cube_extent = cube_L
-    if (
-        # nx
-        -1.0 * np.max([A[0], B[0], C[0]]) > cube.scale or \
-        +1.0 * np.min([A[0], B[0], C[0]]) > cube.scale or \
-        # ny
-        -1.0 * np.max([A[1], B[1], C[1]]) > cube.scale or \
-        +1.0 * np.min([A[1], B[1], C[1]]) > cube.scale or \
-        # nz
-        -1.0 * np.max([A[2], B[2], C[2]]) > cube.scale or \
-        +1.0 * np.min([A[2], B[2], C[2]]) > cube.scale
-    ):
-        print("ni SAT axis trigger")
-        return False
-        
-    # now, find the 9 cross-product sepperation-axes and check those
-    sepperation_axes = [None] * 9
-    # I can skip calculating these properly, because I know nx,ny,nz of the cube a priori
-    # nx, ny, nz cross tri edge a
-    sepperation_axes[0] = np.array([0,     -A[2], +A[1]])
-    sepperation_axes[1] = np.array([+A[2], 0,     -A[0]])
-    sepperation_axes[2] = np.array([-A[1], +A[0], 0    ])
-    # nx, ny, nz cross tri edge b
-    sepperation_axes[3] = np.array([0,     -B[2], +B[1]])
-    sepperation_axes[4] = np.array([+B[2], 0,     -B[0]])
-    sepperation_axes[5] = np.array([-B[1], +B[0], 0    ])
-    # nx, ny, nz cross tri edge c
-    sepperation_axes[6] = np.array([0,     -C[2], +C[1]])
-    sepperation_axes[7] = np.array([+C[2], 0,     -C[0]])
-    sepperation_axes[8] = np.array([-C[1], +C[0], 0    ])
-
-    # now project the vertices A,B,C of the tri onto the SAs, and compare to the projected cube extent
-    for sep_axis in sepperation_axes:
-        pA = np.dot(A, sep_axis)
-        pB = np.dot(B, sep_axis)
-        pC = np.dot(C, sep_axis)
-        # the projected extent of the cube can be simplified a lot too:
-        cube_extent = cube.scale * np.sum(abs(sep_axis))
-
-        # and repeat the check from earlier:
-        if (
-            -1.0 * np.max([pA, pB, pC]) > cube_extent or \
-            +1.0 * np.min([pA, pB, pC]) > cube_extent
-        ):
-            print("cross-prod SAT axis trigger")
-            return False
-
-    # if none of the 13 SA's triggered, the bodies don't overlap on any of the SA's, and according to the SAT, they therefor dont intersect
-    return True
+    tri_coords = np.array([[
+        [tri.vtx_1.x, tri.vtx_1.y, tri.vtx_1.z],
+        [tri.vtx_2.x, tri.vtx_2.y, tri.vtx_2.z],
+        [tri.vtx_3.x, tri.vtx_3.y, tri.vtx_3.z]
+    ]])
+    return bool(tris_intersect_cubes(tri_coords, cube.center[np.newaxis], cube.scale)[0])
+
+# SAT for many (tri, cube) pairs at once; tri_coords is an (n, 3, 3) array holding the 3 vertex coords of every
+# tri, and cube_centers is an (n, 3) array holding the center of the cube each tri is tested against.
+# Returns a bool array of length n; touching bodies count as intersecting.
+# The 13 separating axes of a tri and an axis-aligned cube are the 3 cube normals, the tri normal, and the
+# 9 cross products of a cube normal with a tri edge. Along every axis L, the cube projects onto
+# [-r, +r] around its center, with r = (cube_L / 2) * (|Lx| + |Ly| + |Lz|)
+# NOTE: the pairs are processed in chunks, so the temporary (n, 10, 3) arrays stay reasonably small
+def tris_intersect_cubes(tri_coords, cube_centers, cube_scale, chunk_size=0x4000):
+    tri_coords = np.asarray(tri_coords, dtype=np.float64)
+    cube_centers = np.asarray(cube_centers, dtype=np.float64)
+    half_extent = cube_scale / 2
+    intersects = np.zeros(len(tri_coords), dtype=bool)
+    for start in range(0, len(tri_coords), chunk_size):
+        # shift both bodies so that the cube's center sits at origin; (m, vtx, xyz)
+        rel = tri_coords[start:(start + chunk_size)] - cube_centers[start:(start + chunk_size), np.newaxis, :]
+
+        # the 3 cube normals are the carthesian unit vectors, so projecting onto them just picks a coordinate
+        rejected = np.any((rel.min(axis=1) > half_extent) | (rel.max(axis=1) < -half_extent), axis=1)
+
+        # tri edges B-A, C-B, A-C; (m, edge, xyz)
+        edges = rel[:, [1, 2, 0], :] - rel
+        tri_normals = np.cross(edges[:, 0], edges[:, 1])
+        # cube normal i cross tri edge j; (m, 9, xyz)
+        edge_axes = np.cross(np.eye(3)[np.newaxis, :, np.newaxis, :], edges[:, np.newaxis, :, :]).reshape(-1, 9, 3)
+        sepperation_axes = np.concatenate((tri_normals[:, np.newaxis, :], edge_axes), axis=1)
+
+        # project the vertices onto every SA; (m, axis, vtx), and compare to the projected cube extent
+        projections = np.einsum("mvx,max->mav", rel, sepperation_axes)
+        cube_extents = half_extent * np.sum(np.abs(sepperation_axes), axis=2)
+        rejected |= np.any(
+            (projections.min(axis=2) > cube_extents) | (projections.max(axis=2) < -cube_extents),
+            axis=1
+        )
+        # if none of the 13 SA's separates the bodies, then according to the SAT, they intersect
+        intersects[start:(start + chunk_size)] = ~rejected
+    return intersects
 
 
 
 # files only start at this offset within the
 extra_file_offset = 0x10CD0
 
+# NOTE: data can be anything that supports slicing and indexing into bytes, so a ROM_Reader.data
+#       memoryview works without copying the ROM; only the compressed range is ever touched
 def extract_model(data, model_index):
     # if (filename not in binjo_model_LU.map_model_lookup):
     #     print(f"Model Filename \"{filename}\" is not part of the LU in \"binjo_model_LU.py\" !")
@@ -608,69 +668,61 @@ def extract_model(data, model_index):
     uncompressed_size = read_bytes(data, (model_start_address + 2), 4)
     print(f"4B Compression-Header:\t{to_decal_hex(uncompressed_size, 4)}")
 
-    model_file = bytearray()
-    model_file += int_to_bytes(compression_ident, 2)
-    read_size = 0
-    while(model_start_address + 0x02 + read_size < model_end_address):
-        val = read_bytes(data, (model_start_address + 0x02 + read_size), 2)
-        model_file += int_to_bytes(val, 2)
-        read_size += 2
     # now there is still some trailing padding (0xAA) at the end, which we wanna cut
-    while(model_file[-1] == 0xAA):
-        model_file.pop(-1)
-
-    # with open("test.compr.bin", mode="wb") as output:
-    #     output.write(model_file)
-    model_file = decompress(model_file)
-    # with open("test.bin", mode="wb") as output:
-    #     output.write(model_file)
+    while (model_end_address > model_start_address and data[model_end_address - 1] == 0xAA):
+        model_end_address -= 1
+    # slicing a memoryview doesnt copy anything; decompress() only reads through it
+    model_file = decompress(data[model_start_address:model_end_address])
 
     return model_file
 
-def get_model_file(model_index, rom_path=None, asset_dir=None):
+# grab the decompressed model file for model_index; the asset_dir acts as a cache for decompressed
+# models (keyed by ROM hash + pointer-table address), so only the first request per model actually
+# has to touch the ROM. If no asset_dir is supplied, the cache lives next to the ROM.
+def get_model_file(model_index, rom_path=None, asset_dir=None, cache_size=ModelBIN_Cache.DEFAULT_MAX_SIZE):
     # sanity check
     if (rom_path is None and asset_dir is None):
         print(f"Neither a rom_path nor an asset_dir were supplied !")
         print(f"Cancelling extraction...")
         return None
 
-    # first, get the default file_name according to the address of the compressed-file pointer
+    # first, get the address of the compressed-file pointer; it identifies the model within the ROM
     # if (model_name not in binjo_model_LU.map_model_lookup):
     #     print(f"Model Name \"{model_name}\" is not part of the LU in \"binjo_model_LU.py\" !")
     #     print(f"Cancelling extraction...")
     #     return None
     PT_Address = binjo_model_LU.map_model_lookup[model_index][1]
-    file_name = f"extracted_{to_decal_hex(PT_Address, 4)}.bin"
 
-    # if an asset directory is given, check if the requested file was already extracted
-    if (asset_dir is not None):
-        file_path = os.path.join(asset_dir, file_name)
-        if (os.path.isfile(file_path) == True):
-            with open(file_path, mode="rb") as model_file:
-                model_data = model_file.read()
-            return file_path, model_data
+    if (asset_dir is None):
+        asset_dir = os.path.dirname(rom_path)
+    model_cache = ModelBIN_Cache(asset_dir, max_size=cache_size)
 
-    # if this failed, extract the requested file from ROM; check if a ROM was supplied first
+    # without a ROM, the cache is all we've got
     if (rom_path is None):
-        print(f"Model \"{model_name}\" not present in asset_dir {asset_dir} and no rom_path was supplied !")
-        print(f"Cancelling extraction...")
-        return None
+        cached = model_cache.get(PT_Address)
+        if (cached is None):
+            print(f"Model \"{model_index}\" not present in asset_dir {asset_dir} and no rom_path was supplied !")
+            print(f"Cancelling extraction...")
+        return cached
+
+    with ROM_Reader(rom_path) as rom:
+        return extract_model_cached(rom, model_index, model_cache)
+
+# same as extract_model(), but goes through the model_cache first (and fills it on a miss);
+# returns (file_path, model_data) or None
+def extract_model_cached(rom, model_index, model_cache):
+    PT_Address = binjo_model_LU.map_model_lookup[model_index][1]
+    rom_hash = rom.get_hash()
+    cached = model_cache.get(PT_Address, rom_hash=rom_hash)
+    if (cached is not None):
+        return cached
 
-    # at this point, we can try to extract the requested model from the supplied rom_path
-    if (asset_dir is None):
-        asset_dir = os.path.dirname(rom_path)
-    file_path = os.path.join(asset_dir, file_name)
-    with open(rom_path, mode="rb") as rom_file:
-        rom_data = rom_file.read()
-    model_data = extract_model(rom_data, model_index)
+    # at this point, we have to extract the requested model from the ROM
+    model_data = extract_model(rom.data, model_index)
     if (model_data is None):
         print(f"Model extraction from ROM failed !")
         print(f"Cancelling extraction...")
         return None
     # store the extracted data and return
-    with open(file_path, "wb") as model_file:
-        model_file.write(model_data)
+    file_path = model_cache.put(PT_Address, rom_hash, model_data)
     return file_path, model_data
-    
-
-
@@ -1,4 +1,5 @@
 import bpy, os, mathutils
+import numpy as np
 from timeit import default_timer as timer
 from bpy.types import Operator, Mesh
 from bpy.ops import object
@@ -87,11 +88,22 @@ class BINJO_OT_create_model_from_model_handler(bpy.types.Operator):
         new_mesh_name = bpy.data.meshes.new("import_Mesh").name
         new_obj_name = bpy.data.objects.new("import_Object", bpy.data.meshes[new_mesh_name]).name
 
-        # this line essentially just divides every coord by the scale factor through a nested list-comprehension
-        vertices    = [[(coord / scale_factor) for coord in coordlist] for coordlist in map_model_handler.model_object.vertex_coord_list]
-        edges       = []
-        faces       = map_model_handler.model_object.face_idx_list
-        bpy.data.meshes[new_mesh_name].from_pydata(vertices, edges, faces)
+        # build the mesh straight from the (flat) arrays of the model handler; every face is a tri,
+        # so the loops are just the face indices in order, and every face starts 3 loops after the last one
+        model_object = map_model_handler.model_object
+        mesh = bpy.data.meshes[new_mesh_name]
+        vertex_coords = (model_object.vertex_coord_list / scale_factor).astype(np.float32)
+        face_ids = model_object.face_idx_list.astype(np.int32)
+        mesh.vertices.add(len(vertex_coords))
+        mesh.vertices.foreach_set("co", vertex_coords.ravel())
+        mesh.loops.add(face_ids.size)
+        mesh.loops.foreach_set("vertex_index", face_ids.ravel())
+        mesh.polygons.add(len(face_ids))
+        mesh.polygons.foreach_set("loop_start", np.arange(0, face_ids.size, 3, dtype=np.int32))
+        if bpy.app.version < (4, 0, 0):
+            mesh.polygons.foreach_set("loop_total", np.full(len(face_ids), 3, dtype=np.int32))
+        mesh.polygons.foreach_set("use_smooth", np.zeros(len(face_ids), dtype=bool))
+        mesh.update(calc_edges=True)
 
         # create over-arching layer/attribute elements
         new_UV_name = bpy.data.objects[new_obj_name].data.uv_layers.new(name="import_UV").name
@@ -141,26 +153,19 @@ class BINJO_OT_create_model_from_model_handler(bpy.types.Operator):
         UV_layer = bpy.data.objects[new_obj_name].data.uv_layers[new_UV_name]
         col_attr = bpy.data.meshes[new_mesh_name].attributes[new_col_attr_name]
 
-        loop_ids = []
-        for (face, tri) in zip(bpy.data.meshes[new_mesh_name].polygons, map_model_handler.model_object.complete_tri_list):
-            # set material index of the face according to the data within tri
-            face.material_index = tri.mat_index
-            # and set the UV coords of the face through the loop indices
-            UV_layer.data[face.loop_indices[0]].uv = (tri.vtx_1.transformed_U, tri.vtx_1.transformed_V)
-            UV_layer.data[face.loop_indices[1]].uv = (tri.vtx_2.transformed_U, tri.vtx_2.transformed_V)
-            UV_layer.data[face.loop_indices[2]].uv = (tri.vtx_3.transformed_U, tri.vtx_3.transformed_V)
-            
-            # aswell as the RGBA shades
-            if ("INVIS" in bpy.data.objects[new_obj_name].data.materials[face.material_index].name):
-                # pure (invisible) collision tris will be drawn in magenta
-                col_attr.data[face.loop_indices[0]].color = (1.0, 0, 1.0, 1.0)
-                col_attr.data[face.loop_indices[1]].color = (1.0, 0, 1.0, 1.0)
-                col_attr.data[face.loop_indices[2]].color = (1.0, 0, 1.0, 1.0)
-            else:
-                # others get their vertex RGBA values assigned (regardless of textured or not)
-                col_attr.data[face.loop_indices[0]].color = (tri.vtx_1.r/255, tri.vtx_1.g/255, tri.vtx_1.b/255, tri.vtx_1.a/255)
-                col_attr.data[face.loop_indices[1]].color = (tri.vtx_2.r/255, tri.vtx_2.g/255, tri.vtx_2.b/255, tri.vtx_2.a/255)
-                col_attr.data[face.loop_indices[2]].color = (tri.vtx_3.r/255, tri.vtx_3.g/255, tri.vtx_3.b/255, tri.vtx_3.a/255)
+        # set material index of the faces according to the data within the tris
+        mesh.polygons.foreach_set("material_index", model_object.mat_index_list.astype(np.int32))
+        # and set the UV coords of the faces through their loops
+        UV_layer.data.foreach_set("uv", model_object.loop_uv_list.astype(np.float32).ravel())
+
+        # aswell as the RGBA shades; others get their vertex RGBA values assigned (regardless of textured or not),
+        # but pure (invisible) collision tris will be drawn in magenta. The name only has to be checked per material
+        loop_shades = model_object.loop_shade_list.astype(np.float32)
+        invis_mats = np.array([("INVIS" in mat.name) for mat in mesh.materials], dtype=bool)
+        if (len(invis_mats) > 0):
+            invis_loops = np.repeat(invis_mats[model_object.mat_index_list], 3)
+            loop_shades[invis_loops] = (1.0, 0, 1.0, 1.0)
+        col_attr.data.foreach_set("color", loop_shades.ravel())
 
         scene.collection.objects.link(bpy.data.objects[new_obj_name])
 
@@ -2,7 +2,7 @@ import re
 import bpy
 import mathutils
 
-from ...utility import PluginError, hexOrDecInt, removeComments, yUpToZUp
+from ...utility import PluginError, getCSymbolTable, hexOrDecInt, removeComments, yUpToZUp
 from ..actor.properties import OOTActorProperty, OOTActorHeaderProperty
 from ..oot_utility import ootParseRotation
 from .constants import headerNames, actorsWithRotAsParam
@@ -66,7 +66,7 @@ def getDataMatch(
     else:
         dataTypeRegex = re.escape(dataType)
     regex = rf"{dataTypeRegex}\s*{re.escape(name)}\s*{arrayText}=\s*\{{(.*?)\}}\s*;"
-    match = re.search(regex, sceneData, flags=re.DOTALL)
+    match = getCSymbolTable(sceneData).search(name, regex, re.DOTALL)
 
     if not match:
         raise PluginError(f"Could not find {errorMessageID} {name}.")
@@ -3,7 +3,9 @@ from __future__ import annotations
 
 from typing import Sequence, Union, Tuple
 from dataclasses import dataclass, fields, field
+from itertools import accumulate
 import bpy, os, enum, copy
+import numpy as np
 from ..utility import *
 
 from typing import TYPE_CHECKING
@@ -1793,6 +1795,9 @@ def _SHIFTL(value, amount, mask):
 MTX_SIZE = 64
 VTX_SIZE = 16
 GFX_SIZE = 8
+
+# Binary layout of a Vtx, used by VtxList.to_binary to pack a whole list at once
+VTX_DTYPE = np.dtype([("position", ">i2", 3), ("flag", ">u2"), ("uv", ">i2", 2), ("colorOrNormal", "u1", 4)])
 VP_SIZE = 16  # it's 16 bytes but vanilla GBI has only one s64 for alignment, not two
 LIGHT_SIZE = 16
 AMBIENT_SIZE = 8
@@ -2086,7 +2091,7 @@ class Vtx:
             self.position[0].to_bytes(2, "big", signed=True)
             + self.position[1].to_bytes(2, "big", signed=True)
             + self.position[2].to_bytes(2, "big", signed=True)
-            + self.packedNormal.to_bytes(2, "big", signed=True)
+            + (self.packedNormal & 0xFFFF).to_bytes(2, "big")
             + uv[0].to_bytes(2, "big", signed=True)
             + uv[1].to_bytes(2, "big", signed=True)
             + bytearray(self.colorOrNormal)
@@ -2120,18 +2125,39 @@ class VtxList:
         return len(self.vertices) * VTX_SIZE
 
     def to_binary(self):
-        data = bytearray(0)
-        for vert in self.vertices:
-            data.extend(vert.to_binary())
+        data = bytearray(self.size())
+        if len(self.vertices) == 0:
+            return data
+
+        positions = np.array([vert.position for vert in self.vertices], dtype=np.int64)
+        uvs = np.array([vert.uv for vert in self.vertices], dtype=np.int64)
+        colors = np.array([vert.colorOrNormal for vert in self.vertices], dtype=np.int64)
+        flags = np.array([vert.packedNormal for vert in self.vertices], dtype=np.int64)
+        # Same wrapping as Vtx.to_binary, the remainder keeps the sign of the uv
+        uvs = np.remainder(uvs, np.where(uvs >= 0, 2**15, -(2**15)))
+
+        if positions.min() < -0x8000 or positions.max() > 0x7FFF:
+            raise PluginError(f"Vertex list {self.name} has positions that do not fit in a signed 16 bit integer.")
+        if colors.min() < 0 or colors.max() > 0xFF:
+            raise PluginError(f"Vertex list {self.name} has colors or normals that do not fit in a byte.")
+
+        vertexData = np.ndarray(len(self.vertices), dtype=VTX_DTYPE, buffer=data)
+        vertexData["position"] = positions
+        vertexData["flag"] = flags & 0xFFFF
+        vertexData["uv"] = uvs
+        vertexData["colorOrNormal"] = colors
         return data
 
+    def to_c_lines(self):
+        yield f"Vtx {self.name}[{len(self.vertices)}] = {{\n"
+        for vert in self.vertices:
+            yield f"\t{vert.to_c()},\n"
+        yield "};\n\n"
+
     def to_c(self):
         data = CData()
         data.header = f"extern Vtx {self.name}[{len(self.vertices)}];\n"
-        data.source = f"Vtx {self.name}[{len(self.vertices)}] = {{\n"
-        for vert in self.vertices:
-            data.source += f"\t{vert.to_c()},\n"
-        data.source += "};\n\n"
+        data.extend_source(self.to_c_lines())
         return data
 
 
@@ -2142,10 +2168,15 @@ class GfxList:
         self.startAddress: int = 0
         self.tag: GfxListTag = tag
         self.DLFormat: "DLFormat" = DLFormat
+        # Offset of each command followed by the total size, computed in set_addr
+        self.commandOffsets: list[int] | None = None
+        self.commandOffsetsF3D: "F3D" | None = None
 
     def set_addr(self, startAddress, f3d):
         startAddress = get64bitAlignedAddr(startAddress)
         self.startAddress = startAddress
+        self.commandOffsets = [0, *accumulate(command.size(f3d) for command in self.commands)]
+        self.commandOffsetsF3D = f3d
         print(f"GfxList {self.name}: {str(startAddress)}, {str(self.size(f3d))}")
         return startAddress, startAddress + self.size(f3d)
 
@@ -2154,8 +2185,15 @@ class GfxList:
         romfile.seek(self.startAddress)
         romfile.write(self.to_binary(f3d, segments))
 
+    def get_command_offsets(self, f3d):
+        # The layout from set_addr is only reused while the command list still matches it
+        offsets = self.commandOffsets
+        if offsets is None or self.commandOffsetsF3D is not f3d or len(offsets) != len(self.commands) + 1:
+            offsets = [0, *accumulate(command.size(f3d) for command in self.commands)]
+        return offsets
+
     def size(self, f3d):
-        return sum([command.size(f3d) for command in self.commands])
+        return self.get_command_offsets(f3d)[-1]
 
     # Size, including display lists called with SPDisplayList
     def size_total(self, f3d):
@@ -2171,42 +2209,52 @@ class GfxList:
 
     def get_ptr_addresses(self, f3d):
         ptrs = []
-        address = self.startAddress
-        for command in self.commands:
+        for command, commandOffset in zip(self.commands, self.get_command_offsets(f3d)):
             if type(command) in F3DClassesWithPointers:
                 for offset in command.get_ptr_offsets(f3d):
-                    ptrs.append(address + offset)
-            address += command.size(f3d)
+                    ptrs.append(self.startAddress + commandOffset + offset)
         return ptrs
 
     def to_binary(self, f3d, segments):
-        data = bytearray(0)
-        for command in self.commands:
-            data.extend(command.to_binary(f3d, segments))
+        offsets = self.get_command_offsets(f3d)
+        data = bytearray(offsets[-1])
+        view = memoryview(data)
+        for command, start, end in zip(self.commands, offsets, offsets[1:]):
+            commandData = command.to_binary(f3d, segments)
+            if len(commandData) != end - start:
+                raise PluginError(
+                    f"{type(command).__name__} in {self.name} is {len(commandData)} bytes long "
+                    f"but reports a size of {end - start} bytes."
+                )
+            view[start:end] = commandData
         return data
 
-    def to_c_static(self):
-        data = f"Gfx {self.name}[] = {{\n"
+    def to_c_static_lines(self):
+        yield f"Gfx {self.name}[] = {{\n"
         for command in self.commands:
-            data += f"\t{command.to_c(True)},\n"
-        data += "};\n\n"
-        return data
+            yield f"\t{command.to_c(True)},\n"
+        yield "};\n\n"
 
-    def to_c_dynamic(self):
-        data = f"Gfx* {self.name}(Gfx* glistp) {{\n"
+    def to_c_dynamic_lines(self):
+        yield f"Gfx* {self.name}(Gfx* glistp) {{\n"
         for command in self.commands:
-            data += f"\t{command.to_c(False)};\n"
-        data += "\treturn glistp;\n}\n\n"
-        return data
+            yield f"\t{command.to_c(False)};\n"
+        yield "\treturn glistp;\n}\n\n"
+
+    def to_c_static(self):
+        return "".join(self.to_c_static_lines())
+
+    def to_c_dynamic(self):
+        return "".join(self.to_c_dynamic_lines())
 
     def to_c(self, f3d):
         data = CData()
         if self.DLFormat == DLFormat.Static:
             data.header = f"extern Gfx {self.name}[];\n"
-            data.source = self.to_c_static()
+            data.extend_source(self.to_c_static_lines())
         elif self.DLFormat == DLFormat.Dynamic:
             data.header = f"Gfx* {self.name}(Gfx* glistp);\n"
-            data.source = self.to_c_dynamic()
+            data.extend_source(self.to_c_dynamic_lines())
         else:
             raise PluginError("Invalid GfxList format: " + str(self.DLFormat))
         return data
@@ -2635,11 +2683,11 @@ class FModel:
         staticData.append(self.to_c_lights())
 
         texData = self.to_c_textures(texCSeparate, savePNG, texDir, gfxFormatter.texArrayBitSize)
-        staticData.header += texData.header
+        staticData.add_header(*texData.header_chunks)
         if texCSeparate:
-            texC.source += texData.source
+            texC.add_source(*texData.source_chunks)
         else:
-            staticData.source += texData.source
+            staticData.add_source(*texData.source_chunks)
 
         dynamicData.append(self.to_c_materials(gfxFormatter))
 
@@ -3280,10 +3328,8 @@ class FImage:
 
         # This is to force 8 byte alignment
         if bitsPerValue != 64:
-            code.source = f"Gfx {self.name}_aligner[] = {{gsSPEndDisplayList()}};\n"
-        code.source += f"u{str(bitsPerValue)} {self.name}[] = {{\n\t"
-        code.source += texData
-        code.source += "\n};\n\n"
+            code.add_source(f"Gfx {self.name}_aligner[] = {{gsSPEndDisplayList()}};\n")
+        code.add_source(f"u{str(bitsPerValue)} {self.name}[] = {{\n\t", texData, "\n};\n\n")
         return code
 
     def to_c_data(self, bitsPerValue):
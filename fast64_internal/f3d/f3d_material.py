@@ -1,5 +1,6 @@
 import logging
-import bpy, math, os
+import bpy, math, os, hashlib
+import numpy as np
 from bpy.types import (
     Attribute,
     Context,
@@ -2025,27 +2026,35 @@ def update_tex_values_index(self: Material, *, texProperty: "TextureProperty", t
                     tex_I_node.node_tree = desired_node
 
 
-def get_color_info_from_tex(tex: bpy.types.Image):
-    is_greyscale, has_alpha_4_bit, has_alpha_1_bit = True, False, False
-    rgba_colors: set[int] = set()
-
-    pixels, channel_count = tex.pixels, tex.channels
-
-    for x in range(tex.size[0]):
-        for y in range(tex.size[1]):  # N64 is -Y, Blender is +Y, in this context this doesn´t matter
-            pixel_color = [1, 1, 1, 1]
-            for field in range(channel_count):
-                pixel_color[field] = pixels[(y * tex.size[0] + x) * channel_count + field]
-            rgba_colors.add(getRGBA16Tuple(pixel_color))
-
-            if not (pixel_color[0] == pixel_color[1] and pixel_color[1] == pixel_color[2]):
-                is_greyscale = False
+# Keyed by image name, see get_color_info_from_tex
+tex_color_info_cache: dict[str, tuple[tuple, tuple[bool, bool, bool, frozenset[int]]]] = {}
 
-            if pixel_color[3] < 0.9375:
-                has_alpha_4_bit = True
-            if pixel_color[3] < 0.5:
-                has_alpha_1_bit = True
 
+def get_color_info_from_tex(tex: bpy.types.Image):
+    channel_count = tex.channels
+    pixels = getImagePixels(tex)
+    # Blender has no update counter for image pixels (reloads, file changes on disk, painting, pixels set from
+    # python), so the cache is validated with a hash of the pixels, which is much cheaper than the stats below
+    cache_key = (tuple(tex.size), channel_count, hashlib.blake2b(pixels.tobytes(), digest_size=16).digest())
+    cached = tex_color_info_cache.get(tex.name_full)
+    if cached is not None and cached[0] == cache_key:
+        is_greyscale, has_alpha_1_bit, has_alpha_4_bit, rgba_colors = cached[1]
+        return is_greyscale, has_alpha_1_bit, has_alpha_4_bit, set(rgba_colors)
+
+    pixel_colors = np.ones((tex.size[0] * tex.size[1], 4), dtype=np.float32)
+    # N64 is -Y, Blender is +Y, in this context this doesn´t matter
+    pixel_colors[:, :channel_count] = pixels.reshape(-1, channel_count)
+    alpha = pixel_colors[:, 3]
+
+    is_greyscale = bool(np.all((pixel_colors[:, 0] == pixel_colors[:, 1]) & (pixel_colors[:, 1] == pixel_colors[:, 2])))
+    has_alpha_4_bit = bool(np.any(alpha < 0.9375))
+    has_alpha_1_bit = bool(np.any(alpha < 0.5))
+    rgba_colors: set[int] = set(np.unique(getRGBA16Array(pixel_colors)).tolist())
+
+    tex_color_info_cache[tex.name_full] = (
+        cache_key,
+        (is_greyscale, has_alpha_1_bit, has_alpha_4_bit, frozenset(rgba_colors)),
+    )
     return is_greyscale, has_alpha_1_bit, has_alpha_4_bit, rgba_colors
 
 
@@ -2302,6 +2311,9 @@ def has_f3d_nodes(material: Material):
 
 @persistent
 def load_handler(dummy):
+    # image names of the previous file mean nothing in the new one
+    tex_color_info_cache.clear()
+
     logger.info("Checking for base F3D material library.")
     for lib in bpy.data.libraries:
         lib_path = bpy.path.abspath(lib.filepath)
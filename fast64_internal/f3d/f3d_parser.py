@@ -1,5 +1,5 @@
 from typing import Union, Optional, Callable, Any, TYPE_CHECKING
-import bmesh, bpy, mathutils, re, math, traceback
+import bmesh, bpy, mathutils, re, math, traceback, itertools
 from mathutils import Vector
 from bpy.utils import register_class, unregister_class
 from .f3d_gbi import *
@@ -16,6 +16,8 @@ from .f3d_material import (
 from .f3d_writer import BufferVertex, F3DVert
 from ..utility import *
 import ast
+import numpy as np
+from collections import OrderedDict
 from .f3d_material_helpers import F3DMaterial_UpdateLock
 
 if TYPE_CHECKING:
@@ -352,42 +354,76 @@ def createNewTextureMaterial(romfile, textureStart, textureSize, texelCount, col
             newImg.pixels[n : n + 4] = read16bitRGBA(int.from_bytes(oldPixel, "big"))
 
 
+# Compiled math_eval expressions, keyed by (expression, microcode version) since F3D instances of the same
+# version define the same names. Values are (isConstant, value) or (False, function taking the F3D instance).
+mathEvalCache: OrderedDict[tuple[str, str], tuple[bool, Any]] = OrderedDict()
+MATH_EVAL_CACHE_SIZE = 16384
+
+# Plain decimal and hex literals, which make up most vertex fields, triangle indices and macro arguments
+mathEvalLiteralRegex = re.compile(r"-?(?:0[xX][0-9a-fA-F]+|0|[1-9][0-9]*)")
+
+
 def math_eval(s, f3d):
     if isinstance(s, int):
         return s
 
     s = s.strip()
-    node = ast.parse(s, mode="eval")
-
-    def _eval(node):
-        if isinstance(node, ast.Expression):
-            return _eval(node.body)
-        elif isinstance(node, ast.Str):
-            return node.s
-        elif isinstance(node, ast.Name):
-            if hasattr(f3d, node.id):
-                return getattr(f3d, node.id)
-            else:
-                return node.id
-        elif isinstance(node, ast.Num):
-            return node.n
-        elif isinstance(node, ast.UnaryOp):
-            if isinstance(node.op, ast.USub):
-                return -1 * _eval(node.operand)
-            elif isinstance(node.op, ast.Invert):
-                return ~_eval(node.operand)
-            else:
-                raise Exception("Unsupported type {}".format(node.op))
-        elif isinstance(node, ast.BinOp):
-            return binOps[type(node.op)](_eval(node.left), _eval(node.right))
-        elif isinstance(node, ast.Call):
-            args = list(map(_eval, node.args))
-            funcName = _eval(node.func)
-            return funcName(*args)
-        else:
-            raise Exception("Unsupported type {}".format(node))
+    if mathEvalLiteralRegex.fullmatch(s):
+        return int(s, 0)
+
+    key = (s, f3d.F3D_VER)
+    compiled = mathEvalCache.get(key)
+    if compiled is None:
+        compiled = compileMathEval(ast.parse(s, mode="eval").body, f3d)
+        mathEvalCache[key] = compiled
+        if len(mathEvalCache) > MATH_EVAL_CACHE_SIZE:
+            mathEvalCache.popitem(last=False)
+    else:
+        mathEvalCache.move_to_end(key)
 
-    return _eval(node.body)
+    isConstant, value = compiled
+    return value if isConstant else value(f3d)
+
+
+def compileMathEval(node, f3d):
+    """
+    Compiles an expression node for math_eval.
+    Anything without a call is folded into (True, value), calls become (False, function taking the F3D instance).
+    """
+
+    def asFunction(compiled):
+        isConstant, value = compiled
+        return (lambda f3d: value) if isConstant else value
+
+    if isinstance(node, ast.Constant) and type(node.value) in {str, int, float, complex}:
+        return True, node.value
+    elif isinstance(node, ast.Name):
+        return True, (getattr(f3d, node.id) if hasattr(f3d, node.id) else node.id)
+    elif isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, ast.USub):
+            op = lambda x: -1 * x
+        elif isinstance(node.op, ast.Invert):
+            op = operator.invert
+        else:
+            raise Exception("Unsupported type {}".format(node.op))
+        operand = compileMathEval(node.operand, f3d)
+        if operand[0]:
+            return True, op(operand[1])
+        operandFunc = operand[1]
+        return False, lambda f3d: op(operandFunc(f3d))
+    elif isinstance(node, ast.BinOp):
+        op = binOps[type(node.op)]
+        left, right = compileMathEval(node.left, f3d), compileMathEval(node.right, f3d)
+        if left[0] and right[0]:
+            return True, op(left[1], right[1])
+        leftFunc, rightFunc = asFunction(left), asFunction(right)
+        return False, lambda f3d: op(leftFunc(f3d), rightFunc(f3d))
+    elif isinstance(node, ast.Call):
+        argFuncs = [asFunction(compileMathEval(arg, f3d)) for arg in node.args]
+        funcFunc = asFunction(compileMathEval(node.func, f3d))
+        return False, lambda f3d: funcFunc(f3d)(*[argFunc(f3d) for argFunc in argFuncs])
+    else:
+        raise Exception("Unsupported type {}".format(node))
 
 
 def bytesToNormal(normal):
@@ -482,6 +518,8 @@ class F3DContext:
         self.textureData: dict[str, bpy.types.Image] = {}  # c name : blender texture
 
         self.tlutAppliedTextures: str = []  # c name
+        # (image, tlut) pairs already converted, images are converted in place so a pair must only be applied once
+        self.tlutAppliedPairs: set[tuple[bpy.types.Image, bpy.types.Image]] = set()
         self.currentTextureName: str | None = None
         self.imagesDontApplyTlut: set[bpy.types.Image] = set()  # image
 
@@ -538,6 +576,7 @@ class F3DContext:
         savedMaterialDict = self.materialDict
         savedTextureData = self.textureData
         savedTlutAppliedTextures = self.tlutAppliedTextures
+        savedTlutAppliedPairs = self.tlutAppliedPairs
         savedImagesDontApplyTlut = self.imagesDontApplyTlut
         savedLightData = self.lightData
         savedMatrixData = self.matrixData
@@ -548,6 +587,7 @@ class F3DContext:
         self.materialDict = savedMaterialDict
         self.textureData = savedTextureData
         self.tlutAppliedTextures = savedTlutAppliedTextures
+        self.tlutAppliedPairs = savedTlutAppliedPairs
         self.imagesDontApplyTlut = savedImagesDontApplyTlut
         self.lightData = savedLightData
         self.matrixData = savedMatrixData
@@ -1518,19 +1558,24 @@ class F3DContext:
         self.materialChanged = True
 
     def applyTLUT(self, image, tlut):
-        invalidIndicesDetected = False
-        for i in range(int(len(image.pixels) / 4)):
-            lutIndex = int(round(image.pixels[4 * i] * 255))
-            newValues = tlut.pixels[4 * lutIndex : 4 * (lutIndex + 1)]
-            if len(newValues) < 4:
-                # print("Invalid LUT Index " + str(lutIndex))
-                invalidIndicesDetected = True
-            else:
-                image.pixels[4 * i : 4 * (i + 1)] = newValues
+        if (image, tlut) in self.tlutAppliedPairs:
+            return
+        self.tlutAppliedPairs.add((image, tlut))
+
+        pixels = getImagePixels(image).reshape(-1, 4)
+        palette = getImagePixels(tlut)
+        palette = palette[: len(palette) // 4 * 4].reshape(-1, 4)
 
-        if invalidIndicesDetected:
+        # the index is stored in the red channel, scaled in double precision like round(pixel * 255) would be
+        lutIndices = np.rint(pixels[:, 0].astype(np.float64) * 255).astype(np.int64)
+        validIndices = (lutIndices >= 0) & (lutIndices < len(palette))
+        if not validIndices.all():
             print("Invalid LUT Indices detected.")
 
+        if validIndices.any():
+            pixels[validIndices] = palette[lutIndices[validIndices]]
+            image.pixels.foreach_set(pixels.ravel())
+
     def getVertexDataStart(self, vertexDataParam: str, f3d: F3D):
         matchResult = re.search(r"\&?([A-Za-z0-9\_]*)\s*(\[([^\]]*)\])?\s*(\+(.*))?", vertexDataParam)
         if matchResult is None:
@@ -1843,11 +1888,25 @@ class F3DContext:
             raise PluginError("Number of verts in mesh not divisible by 3, currently " + str(len(self.verts)))
 
         triangleCount = int(len(self.verts) / 3)
-        verts = [f3dVert.position for f3dVert in self.verts]
-        faces = [[3 * i + j for j in range(3)] for i in range(triangleCount)]
         print("Vertices: " + str(len(self.verts)) + ", Triangles: " + str(triangleCount))
 
-        mesh.from_pydata(vertices=verts, edges=[], faces=faces)
+        # Every triangle has its own 3 verts, so loop attributes are simply the vertex attributes in order
+        positions = np.array([f3dVert.position for f3dVert in self.verts], dtype=np.float64).reshape(-1, 3)
+        faces = np.arange(len(self.verts)).reshape(-1, 3)
+        faceMask = np.ones(triangleCount, dtype=bool)
+        vertIndices = np.arange(len(self.verts))
+        if removeDoubles:
+            limbIndices = np.full(len(self.verts), -1, dtype=np.int64)
+            for limbIndex, indices in enumerate(self.limbGroups.values()):
+                limbIndices[indices] = limbIndex
+            positions, vertIndices = weldVertices(positions, limbIndices, REMOVE_DOUBLES_DISTANCE)
+            faces = vertIndices[faces]
+            # triangles that collapsed onto a line or a point are removed, like remove_doubles does
+            faceMask = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])
+            faces = faces[faceMask]
+        loopMask = np.repeat(faceMask, 3)
+
+        mesh.from_pydata(vertices=positions.tolist(), edges=[], faces=faces.tolist())
         uv_layer_name = mesh.uv_layers.new().name
         # if self.materialContext.f3d_mat.rdp_settings.g_lighting:
         # else:
@@ -1856,31 +1915,33 @@ class F3DContext:
             # Changed in Blender 4.1: "Meshes now always use custom normals if they exist." (and use_auto_smooth was removed)
             if bpy.app.version < (4, 1, 0):
                 mesh.use_auto_smooth = True
-            mesh.normals_split_custom_set([f3dVert.normal for f3dVert in self.verts])
+            mesh.normals_split_custom_set(
+                [f3dVert.normal for f3dVert, isLoop in zip(self.verts, loopMask.tolist()) if isLoop]
+            )
 
         for groupName, indices in self.limbGroups.items():
             group = obj.vertex_groups.new(name=self.limbToBoneName[groupName])
-            group.add(indices, 1, "REPLACE")
+            group.add(np.unique(vertIndices[indices]).tolist(), 1, "REPLACE")
 
-        for i in range(len(mesh.polygons)):
-            mesh.polygons[i].material_index = self.triMatIndices[i]
+        mesh.polygons.foreach_set(
+            "material_index", np.array(self.triMatIndices[:triangleCount], dtype=np.int32)[faceMask]
+        )
 
         # Workaround for an issue in Blender 3.5 where putting this above the `if importNormals` block
         # causes wrong uvs/normals and sometimes crashes.
         uv_layer = mesh.uv_layers[uv_layer_name].data
+        uvs = np.array([f3dVert.uv for f3dVert in self.verts], dtype=np.float32).reshape(-1, 2)
+        uv_layer.foreach_set("uv", uvs[loopMask].ravel())
 
-        for i in range(len(mesh.loops)):
-            # This should be okay, since we aren't trying to optimize vertices
-            # There will be one loop for every vertex
-            uv_layer[i].uv = self.verts[i].uv
-
+        colors = np.ones((len(self.verts), 4), dtype=np.float32)
+        colors[:, :3] = np.array([f3dVert.rgb for f3dVert in self.verts], dtype=np.float32).reshape(-1, 3)
         color_layer = mesh.vertex_colors.new(name="Col").data
-        for i in range(len(mesh.loops)):
-            color_layer[i].color = self.verts[i].rgb.to_4d()
+        color_layer.foreach_set("color", colors[loopMask].ravel())
 
+        alphas = np.ones((len(self.verts), 4), dtype=np.float32)
+        alphas[:, :3] = np.array([f3dVert.alpha for f3dVert in self.verts], dtype=np.float32)[:, None]
         alpha_layer = mesh.vertex_colors.new(name="Alpha").data
-        for i in range(len(mesh.loops)):
-            alpha_layer[i].color = [self.verts[i].alpha] * 3 + [1]
+        alpha_layer.foreach_set("color", alphas[loopMask].ravel())
 
         if bpy.context.mode != "OBJECT":
             bpy.ops.object.mode_set(mode="OBJECT")
@@ -1892,11 +1953,6 @@ class F3DContext:
             obj.data.materials.append(material)
         if not importNormals:
             bpy.ops.object.shade_smooth()
-        if removeDoubles:
-            bpy.ops.object.mode_set(mode="EDIT")
-            bpy.ops.mesh.select_all(action="SELECT")
-            bpy.ops.mesh.remove_doubles()
-            bpy.ops.object.mode_set(mode="OBJECT")
 
         obj.location = bpy.context.scene.cursor.location
 
@@ -1911,6 +1967,47 @@ class F3DContext:
             self.deleteMaterialContext()
 
 
+# Same as the default merge distance of bpy.ops.mesh.remove_doubles
+REMOVE_DOUBLES_DISTANCE = 0.0001
+
+
+def weldVertices(positions: np.ndarray, groupIds: np.ndarray, distance: float):
+    """
+    Welds every vertex to the first kept vertex within distance of it, a vertex with none becomes a kept vertex.
+    Exact duplicates are welded first, then kept vertices are hashed by their cell in a grid of that size,
+    so only the 27 cells around a vertex have to be checked against the real distance.
+    Vertices with different group ids (ex. limbs) are never welded.
+    Returns the welded positions, in order of first use, and the welded index of every original vertex.
+    """
+    firstIndices, uniqueIndices = getUniqueRows(np.column_stack((positions, groupIds)))
+    uniquePositions = positions[firstIndices]
+    cells = np.floor(uniquePositions / distance).astype(np.int64)
+
+    keptPositions = []
+    keptCells: dict[tuple, list[int]] = {}  # (cell, group id) -> indices in keptPositions
+    weldedIndices = np.empty(len(firstIndices), dtype=np.int64)
+    maxDistanceSquared = distance * distance
+    for i, (position, (x, y, z), groupId) in enumerate(
+        zip(uniquePositions.tolist(), cells.tolist(), groupIds[firstIndices].tolist())
+    ):
+        weldedIndex = None
+        for cell in itertools.product((x - 1, x, x + 1), (y - 1, y, y + 1), (z - 1, z, z + 1)):
+            for keptIndex in keptCells.get((cell, groupId), ()):
+                keptPosition = keptPositions[keptIndex]
+                if (
+                    (position[0] - keptPosition[0]) ** 2
+                    + (position[1] - keptPosition[1]) ** 2
+                    + (position[2] - keptPosition[2]) ** 2
+                ) <= maxDistanceSquared and (weldedIndex is None or keptIndex < weldedIndex):
+                    weldedIndex = keptIndex
+        if weldedIndex is None:
+            weldedIndex = len(keptPositions)
+            keptPositions.append(position)
+            keptCells.setdefault(((x, y, z), groupId), []).append(weldedIndex)
+        weldedIndices[i] = weldedIndex
+    return np.array(keptPositions, dtype=positions.dtype).reshape(-1, 3), weldedIndices[uniqueIndices]
+
+
 class ParsedMacro:
     def __init__(self, name: str, params: "list[str]"):
         self.name = name
@@ -1954,7 +2051,9 @@ def parseF3D(
 
 
 def parseDLData(dlData: str, dlName: str):
-    matchResult = re.search(r"Gfx\s*" + re.escape(dlName) + r"\s*\[\s*\w*\s*\]\s*=\s*\{([^\}]*)\}", dlData)
+    matchResult = getCSymbolTable(dlData).search(
+        dlName, r"Gfx\s*" + re.escape(dlName) + r"\s*\[\s*\w*\s*\]\s*=\s*\{([^\}]*)\}"
+    )
     if matchResult is None:
         raise PluginError("Cannot find display list named " + dlName)
 
@@ -1972,8 +2071,10 @@ def parseVertexData(dlData: str, vertexDataName: str, f3dContext: F3DContext):
     if vertexDataName in f3dContext.vertexData:
         return f3dContext.vertexData[vertexDataName]
 
-    matchResult = re.search(
-        r"Vtx\s*" + re.escape(vertexDataName) + r"\s*\[\s*[0-9x]*\s*\]\s*=\s*\{([^;]*);", dlData, re.DOTALL
+    matchResult = getCSymbolTable(dlData).search(
+        vertexDataName,
+        r"Vtx\s*" + re.escape(vertexDataName) + r"\s*\[\s*[0-9x]*\s*\]\s*=\s*\{([^;]*);",
+        re.DOTALL,
     )
     if matchResult is None:
         raise PluginError("Cannot find vertex list named " + vertexDataName)
@@ -2016,9 +2117,9 @@ def parseLightsData(lightsData, lightsName, f3dContext):
     # if lightsName in f3dContext.lightData:
     # 	return f3dContext.lightData[lightsName]
 
-    matchResult = re.search(
+    matchResult = getCSymbolTable(lightsData).search(
+        lightsName,
         r"Lights([0-9n])\s*" + re.escape(lightsName) + r"\s*=\s*gdSPDefLights[0-9]\s*\(([^\)]*)\)\s*;\s*",
-        lightsData,
         re.DOTALL,
     )
     if matchResult is None:
@@ -2070,9 +2171,9 @@ def CI4toRGBA32(value):
 
 
 def parseTextureData(dlData, textureName, f3dContext, imageFormat, imageSize, width, isLUT, f3d):
-    matchResult = re.search(
+    matchResult = getCSymbolTable(dlData).search(
+        textureName,
         r"([A-Za-z0-9\_]+)\s*" + re.escape(textureName) + r"\s*\[\s*[0-9a-fA-Fx]*\s*\]\s*=\s*\{([^\}]*)\s*\}\s*;\s*",
-        dlData,
         re.DOTALL,
     )
     if matchResult is None:
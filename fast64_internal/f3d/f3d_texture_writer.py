@@ -2,6 +2,7 @@ from typing import Union, Optional
 from dataclasses import dataclass, field
 import bpy
 from math import ceil, floor
+import numpy as np
 
 from .f3d_enums import *
 from .f3d_material import (
@@ -1069,29 +1070,33 @@ def savePaletteLoad(
 # Functions for converting and writing texture and palette data
 
 
-def extractConvertCIPixel(image, pixels, i, j, palFormat):
-    color = [1, 1, 1, 1]
-    for field in range(image.channels):
-        color[field] = pixels[(j * image.size[0] + i) * image.channels + field]
+def getFlippedPixelFields(image: bpy.types.Image, pixels: np.ndarray, fieldCount: int) -> np.ndarray:
+    # Returns a (pixel count, fieldCount) array in N64 pixel order, reading field f of a pixel
+    # from pixels[pixel * image.channels + f] like the per pixel encoders always did
+    width, height = image.size
+    # N64 is -Y, Blender is +Y
+    if fieldCount <= image.channels:
+        return pixels.reshape(height, width, image.channels)[::-1].reshape(-1, image.channels)[:, :fieldCount]
+    pixelIds = (np.arange(height - 1, -1, -1)[:, None] * width + np.arange(width)).ravel()
+    return pixels[(pixelIds * image.channels)[:, None] + np.arange(fieldCount)]
+
+
+def extractConvertCIPixels(image: bpy.types.Image, pixels: np.ndarray, palFormat: str) -> np.ndarray:
+    colors = np.ones((image.size[0] * image.size[1], 4), dtype=np.float32)
+    colors[:, : image.channels] = getFlippedPixelFields(image, pixels, image.channels)
     if palFormat == "RGBA16":
-        pixelColor = getRGBA16Tuple(color)
+        return getRGBA16Array(colors)
     elif palFormat == "IA16":
-        pixelColor = getIA16Tuple(color)
+        return getIA16Array(colors)
     else:
         raise PluginError("Internal error, palette format is " + palFormat)
-    return pixelColor
 
 
 def getColorsUsedInImage(image, palFormat):
-    palette = []
-    # N64 is -Y, Blender is +Y
-    pixels = image.pixels[:]
-    for j in reversed(range(image.size[1])):
-        for i in range(image.size[0]):
-            pixelColor = extractConvertCIPixel(image, pixels, i, j, palFormat)
-            if pixelColor not in palette:
-                palette.append(pixelColor)
-    return palette
+    pixelColors = extractConvertCIPixels(image, getImagePixels(image), palFormat)
+    palette, firstPixelIds = np.unique(pixelColors, return_index=True)
+    # Keep the colors in the order they first appear in
+    return palette[np.argsort(firstPixelIds)].tolist()
 
 
 def mergePalettes(pal0, pal1):
@@ -1103,28 +1108,28 @@ def mergePalettes(pal0, pal1):
 
 
 def getColorIndicesOfTexture(image, palette, palFormat):
-    texture = []
-    # N64 is -Y, Blender is +Y
-    pixels = image.pixels[:]
-    for j in reversed(range(image.size[1])):
-        for i in range(image.size[0]):
-            pixelColor = extractConvertCIPixel(image, pixels, i, j, palFormat)
-            if pixelColor not in palette:
-                raise PluginError(f"Bug: {image.name} palette len {len(palette)} missing CI")
-            texture.append(palette.index(pixelColor))
-    return texture
+    pixelColors = extractConvertCIPixels(image, getImagePixels(image), palFormat)
+    colors, pixelColorIds = np.unique(pixelColors, return_inverse=True)
+    paletteIds = {}
+    for i, color in enumerate(palette):
+        paletteIds.setdefault(color, i)
+    try:
+        colorIndices = np.array([paletteIds[color] for color in colors.tolist()], dtype=np.int64)
+    except KeyError:
+        raise PluginError(f"Bug: {image.name} palette len {len(palette)} missing CI")
+    return colorIndices[pixelColorIds.reshape(-1)]
 
 
 def compactNibbleArray(texture, width, height):
-    nibbleData = bytearray(0)
+    texture = np.asarray(texture, dtype=np.int64) & 0xF
     dataSize = int(width * height / 2)
 
-    nibbleData = [((texture[i * 2] & 0xF) << 4) | (texture[i * 2 + 1] & 0xF) for i in range(dataSize)]
+    nibbleData = (texture[0 : dataSize * 2 : 2] << 4) | texture[1 : dataSize * 2 : 2]
 
     if (width * height) % 2 == 1:
-        nibbleData.append((texture[-1] & 0xF) << 4)
+        nibbleData = np.append(nibbleData, texture[-1] << 4)
 
-    return bytearray(nibbleData)
+    return bytearray(nibbleData.astype(np.uint8))
 
 
 def writePaletteData(fPalette: FImage, palette: list[int]):
@@ -1150,7 +1155,7 @@ def writeCITextureData(
     if texFmt == "CI4":
         fImage.data = compactNibbleArray(texture, image.size[0], image.size[1])
     else:
-        fImage.data = bytearray(texture)
+        fImage.data = bytearray(texture.astype(np.uint8))
     fImage.converted = True
 
 
@@ -1160,45 +1165,13 @@ def writeNonCITextureData(image: bpy.types.Image, fImage: FImage, texFmt: str):
     fmt = texFormatOf[texFmt]
     bitSize = texBitSizeF3D[texFmt]
 
-    pixels = image.pixels[:]
+    pixels = getImagePixels(image)
     if fmt == "G_IM_FMT_RGBA":
         if bitSize == "G_IM_SIZ_16b":
-            fImage.data = bytearray(
-                [
-                    byteVal
-                    for doubleByte in [
-                        (
-                            (
-                                ((int(round(pixels[(j * image.size[0] + i) * image.channels + 0] * 0x1F)) & 0x1F) << 3)
-                                | (
-                                    (int(round(pixels[(j * image.size[0] + i) * image.channels + 1] * 0x1F)) & 0x1F)
-                                    >> 2
-                                )
-                            ),
-                            (
-                                ((int(round(pixels[(j * image.size[0] + i) * image.channels + 1] * 0x1F)) & 0x03) << 6)
-                                | (
-                                    (int(round(pixels[(j * image.size[0] + i) * image.channels + 2] * 0x1F)) & 0x1F)
-                                    << 1
-                                )
-                                | (1 if pixels[(j * image.size[0] + i) * image.channels + 3] > 0.5 else 0)
-                            ),
-                        )
-                        for j in reversed(range(image.size[1]))
-                        for i in range(image.size[0])
-                    ]
-                    for byteVal in doubleByte
-                ]
-            )
+            texture = getRGBA16Array(getFlippedPixelFields(image, pixels, 4)).astype(">u2").view(np.uint8)
         elif bitSize == "G_IM_SIZ_32b":
-            fImage.data = bytearray(
-                [
-                    int(round(pixels[(j * image.size[0] + i) * image.channels + field] * 0xFF)) & 0xFF
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                    for field in range(image.channels)
-                ]
-            )
+            fields = getFlippedPixelFields(image, pixels, image.channels).astype(np.float64)
+            texture = np.rint(fields * 0xFF).astype(np.int64) & 0xFF
         else:
             raise PluginError("Invalid combo: " + fmt + ", " + bitSize)
 
@@ -1213,129 +1186,28 @@ def writeNonCITextureData(image: bpy.types.Image, fImage: FImage, texFmt: str):
         raise PluginError("Internal error, writeNonCITextureData called for CI image.")
 
     elif fmt == "G_IM_FMT_IA":
+        fields = getFlippedPixelFields(image, pixels, 4)
+        intensity = colorsToLuminance(fields)
+        alpha = fields[:, 3].astype(np.float64)
         if bitSize == "G_IM_SIZ_4b":
-            fImage.data = bytearray(
-                [
-                    (
-                        (
-                            int(
-                                round(
-                                    colorToLuminance(
-                                        pixels[
-                                            (j * image.size[0] + i)
-                                            * image.channels : (j * image.size[0] + i)
-                                            * image.channels
-                                            + 3
-                                        ]
-                                    )
-                                    * 0x7
-                                )
-                            )
-                            & 0x7
-                        )
-                        << 1
-                    )
-                    | (1 if pixels[(j * image.size[0] + i) * image.channels + 3] > 0.5 else 0)
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                ]
-            )
+            texture = ((np.rint(intensity * 0x7).astype(np.int64) & 0x7) << 1) | (alpha > 0.5)
         elif bitSize == "G_IM_SIZ_8b":
-            fImage.data = bytearray(
-                [
-                    (
-                        (
-                            int(
-                                round(
-                                    colorToLuminance(
-                                        pixels[
-                                            (j * image.size[0] + i)
-                                            * image.channels : (j * image.size[0] + i)
-                                            * image.channels
-                                            + 3
-                                        ]
-                                    )
-                                    * 0xF
-                                )
-                            )
-                            & 0xF
-                        )
-                        << 4
-                    )
-                    | (int(round(pixels[(j * image.size[0] + i) * image.channels + 3] * 0xF)) & 0xF)
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                ]
+            texture = ((np.rint(intensity * 0xF).astype(np.int64) & 0xF) << 4) | (
+                np.rint(alpha * 0xF).astype(np.int64) & 0xF
             )
         elif bitSize == "G_IM_SIZ_16b":
-            fImage.data = bytearray(
-                [
-                    byteVal
-                    for doubleByte in [
-                        (
-                            int(
-                                round(
-                                    colorToLuminance(
-                                        pixels[
-                                            (j * image.size[0] + i)
-                                            * image.channels : (j * image.size[0] + i)
-                                            * image.channels
-                                            + 3
-                                        ]
-                                    )
-                                    * 0xFF
-                                )
-                            )
-                            & 0xFF,
-                            int(round(pixels[(j * image.size[0] + i) * image.channels + 3] * 0xFF)) & 0xFF,
-                        )
-                        for j in reversed(range(image.size[1]))
-                        for i in range(image.size[0])
-                    ]
-                    for byteVal in doubleByte
-                ]
+            texture = np.stack(
+                (np.rint(intensity * 0xFF).astype(np.int64) & 0xFF, np.rint(alpha * 0xFF).astype(np.int64) & 0xFF),
+                axis=-1,
             )
         else:
             raise PluginError("Invalid combo: " + fmt + ", " + bitSize)
     elif fmt == "G_IM_FMT_I":
+        intensity = colorsToLuminance(getFlippedPixelFields(image, pixels, 3))
         if bitSize == "G_IM_SIZ_4b":
-            fImage.data = bytearray(
-                [
-                    int(
-                        round(
-                            colorToLuminance(
-                                pixels[
-                                    (j * image.size[0] + i) * image.channels : (j * image.size[0] + i) * image.channels
-                                    + 3
-                                ]
-                            )
-                            * 0xF
-                        )
-                    )
-                    & 0xF
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                ]
-            )
+            texture = np.rint(intensity * 0xF).astype(np.int64) & 0xF
         elif bitSize == "G_IM_SIZ_8b":
-            fImage.data = bytearray(
-                [
-                    int(
-                        round(
-                            colorToLuminance(
-                                pixels[
-                                    (j * image.size[0] + i) * image.channels : (j * image.size[0] + i) * image.channels
-                                    + 3
-                                ]
-                            )
-                            * 0xFF
-                        )
-                    )
-                    & 0xFF
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                ]
-            )
+            texture = np.rint(intensity * 0xFF).astype(np.int64) & 0xFF
         else:
             raise PluginError("Invalid combo: " + fmt + ", " + bitSize)
     else:
@@ -1343,6 +1215,8 @@ def writeNonCITextureData(image: bpy.types.Image, fImage: FImage, texFmt: str):
 
     # We stored 4bit values in byte arrays, now to convert
     if bitSize == "G_IM_SIZ_4b":
-        fImage.data = compactNibbleArray(fImage.data, image.size[0], image.size[1])
+        fImage.data = compactNibbleArray(texture, image.size[0], image.size[1])
+    else:
+        fImage.data = bytearray(texture.astype(np.uint8))
 
     fImage.converted = True
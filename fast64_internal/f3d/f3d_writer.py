@@ -2,6 +2,7 @@ from typing import Union, Optional, Callable, Any, List
 from dataclasses import dataclass
 import functools
 import bpy, mathutils, os, re, copy, math
+import numpy as np
 from mathutils import Vector
 from math import ceil
 from bpy.utils import register_class, unregister_class
@@ -67,7 +68,7 @@ class MeshInfo:
     def __init__(self):
         self.vert = {}  # all faces connected to a vert
         self.edge = {}  # all faces connected to an edge
-        self.f3dVert = {}  # f3d vertex of a given loop
+        self.snapshot: Optional[MeshSnapshot] = None  # per loop f3d vertex data
         self.edgeValid = {}  # bool given two faces
         self.validNeighbors = {}  # all neighbors of a face with a valid connecting edge
         self.texDimensions = {}  # texture dimensions for each material
@@ -75,6 +76,120 @@ class MeshInfo:
         self.vertexGroupInfo = None
 
 
+class MeshSnapshot:
+    """
+    Loop triangles and per loop F3DVert data of a mesh, read with foreach_get instead of loop by loop.
+    Values go through the same conversions as getF3DVert, so loops with equal rows have equal F3DVerts.
+    """
+
+    def __init__(self, obj: bpy.types.Object, uv_data: bpy.types.bpy_prop_collection):
+        mesh: bpy.types.Mesh = obj.data
+        loopCount = len(mesh.loops)
+
+        triCount = len(mesh.loop_triangles)
+        self.triVerts = np.empty(triCount * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("vertices", self.triVerts)
+        self.triVerts = self.triVerts.reshape(-1, 3)
+        self.triLoops = np.empty(triCount * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("loops", self.triLoops)
+        self.triLoops = self.triLoops.reshape(-1, 3)
+        self.triMaterials = np.empty(triCount, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("material_index", self.triMaterials)
+
+        # N64 is -Y, Blender is +Y
+        self.uvs = np.empty(loopCount * 2, dtype=np.float32)
+        uv_data.foreach_get("uv", self.uvs)
+        self.uvs = self.uvs.reshape(-1, 2)
+        self.uvs[np.isnan(self.uvs)] = 0
+        self.uvs[:, 1] = 1 - self.uvs[:, 1].astype(np.float64)
+
+        # Quantized like getLoopNormal
+        normals = np.empty(loopCount * 3, dtype=np.float32)
+        mesh.loops.foreach_get("normal", normals)
+        self.normals = (np.rint(normals.reshape(-1, 3).astype(np.float64) * 2**16) / 2**16).astype(np.float32)
+
+        # Like getLoopColor, gamma correction goes through mathutils, once per distinct color
+        self.rgb = np.ones((loopCount, 3), dtype=np.float32)
+        colors = self.getLoopColors(mesh, "Col", loopCount)
+        if colors is not None:
+            self.rgb[:] = self.convertColors(
+                colors, lambda color: gammaCorrect(color) if is3_2_or_above() else color, 3
+            )
+        self.alpha = np.ones(loopCount, dtype=np.float32)
+        alphaColors = self.getLoopColors(mesh, "Alpha", loopCount)
+        if alphaColors is not None:
+            self.alpha[:] = self.convertColors(
+                alphaColors,
+                lambda color: [colorToLuminance(gammaCorrect(color) if is3_2_or_above() else color)],
+                1,
+            )[:, 0]
+
+        self.hasRGB = {}  # material index : has_rgb
+        self.hasNormal = {}  # material index : has_normal
+        for materialIndex in np.unique(self.triMaterials).tolist():
+            has_rgb, has_normal, _ = getRgbNormalSettings(obj.material_slots[materialIndex].material.f3d_mat)
+            self.hasRGB[materialIndex], self.hasNormal[materialIndex] = has_rgb, has_normal
+
+    @staticmethod
+    def getLoopColors(mesh: bpy.types.Mesh, layer: str, loopCount: int) -> Optional[np.ndarray]:
+        colorLayer = getColorLayer(mesh, layer=layer)
+        if colorLayer is None:
+            return None
+        colors = np.empty(len(colorLayer) * 4, dtype=np.float32)
+        colorLayer.foreach_get("color", colors)
+        return colors.reshape(-1, 4)[:loopCount, :3]
+
+    @staticmethod
+    def convertColors(colors: np.ndarray, convert: Callable[[list[float]], list[float]], width: int) -> np.ndarray:
+        uniqueColors, colorIds = np.unique(colors, axis=0, return_inverse=True)
+        converted = np.empty((len(uniqueColors), width), dtype=np.float32)
+        for i, color in enumerate(uniqueColors.tolist()):
+            converted[i] = convert(color)[:width]
+        return converted[colorIds.reshape(-1)]
+
+    def getTriEdgeKeys(self) -> np.ndarray:
+        # Same as MeshLoopTriangle.edge_keys, (tri count, 3, 2)
+        nextVerts = self.triVerts[:, [1, 2, 0]]
+        return np.stack((np.minimum(self.triVerts, nextVerts), np.maximum(self.triVerts, nextVerts)), axis=-1)
+
+    def getTriLoopsOfVerts(self, tris: np.ndarray, verts: np.ndarray) -> np.ndarray:
+        # Vectorized getLoopFromVert
+        corners = np.argmax(self.triVerts[tris] == verts[:, None], axis=1)
+        return self.triLoops[tris, corners]
+
+    def loopsEqual(self, trisA: np.ndarray, loopsA: np.ndarray, trisB: np.ndarray, loopsB: np.ndarray) -> np.ndarray:
+        # Whether getF3DVert gives equal verts for loopsA and loopsB, which are loops of the same vertices
+        hasRGB = np.vectorize(self.hasRGB.__getitem__, otypes=[bool])
+        hasNormal = np.vectorize(self.hasNormal.__getitem__, otypes=[bool])
+        rgbA, rgbB = hasRGB(self.triMaterials[trisA]), hasRGB(self.triMaterials[trisB])
+        normalA, normalB = hasNormal(self.triMaterials[trisA]), hasNormal(self.triMaterials[trisB])
+
+        equal = (rgbA == rgbB) & (normalA == normalB) & (self.alpha[loopsA] == self.alpha[loopsB])
+        equal &= ~rgbA | np.all(self.rgb[loopsA] == self.rgb[loopsB], axis=1)
+        exactUV = np.all(self.uvs[loopsA] == self.uvs[loopsB], axis=1)
+        exactNormal = ~normalA | np.all(self.normals[loopsA] == self.normals[loopsB], axis=1)
+
+        # Vector == allows a float step of difference, so uvs and normals that are only almost equal
+        # are compared with mathutils itself
+        closeUV = np.all(nearlyEqualFloats(self.uvs[loopsA], self.uvs[loopsB]), axis=1)
+        closeNormal = ~normalA | np.all(nearlyEqualFloats(self.normals[loopsA], self.normals[loopsB]), axis=1)
+        maybeEqual = equal & ~(exactUV & exactNormal) & closeUV & closeNormal
+        equal &= exactUV & exactNormal
+        for i in np.flatnonzero(maybeEqual).tolist():
+            loopA, loopB = loopsA[i], loopsB[i]
+            equal[i] = Vector(self.uvs[loopA].tolist()) == Vector(self.uvs[loopB].tolist()) and (
+                not normalA[i] or Vector(self.normals[loopA].tolist()) == Vector(self.normals[loopB].tolist())
+            )
+        return equal
+
+
+def nearlyEqualFloats(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Superset of the float32 values Vector == considers equal, which are at most a float step apart
+    aBits, bBits = a.view(np.int32).astype(np.int64), b.view(np.int32).astype(np.int64)
+    closeSteps = ((aBits < 0) == (bBits < 0)) & (np.abs(aBits - bBits) <= 4)
+    return closeSteps | (np.abs(a.astype(np.float64) - b.astype(np.float64)) <= 4 * np.finfo(np.float32).eps)
+
+
 def get_original_name(obj: bpy.types.Object):
     return getattr(obj, "original_name", obj.name)
 
@@ -147,7 +262,6 @@ def getInfoDict_impl(obj: bpy.types.Object):
 
     vertDict = infoDict.vert
     edgeDict = infoDict.edge
-    f3dVertDict = infoDict.f3dVert
     edgeValidDict = infoDict.edgeValid
     validNeighborDict = infoDict.validNeighbors
 
@@ -161,44 +275,56 @@ def getInfoDict_impl(obj: bpy.types.Object):
                 uv_data = uv_layer.data
         if uv_data is None:
             raise PluginError("Object '" + get_original_name(obj) + "' does not have a UV layer named 'UVMap.'")
-    for face in mesh.loop_triangles:
-        validNeighborDict[face] = []
-        material = obj.material_slots[face.material_index].material
-        if material is None:
-            raise PluginError(
-                f"There are some faces on your mesh object {get_original_name(obj)}"
-                " that are assigned to an empty material slot."
-            )
-        for vertIndex in face.vertices:
-            if vertIndex not in vertDict:
-                vertDict[vertIndex] = []
-            if face not in vertDict[vertIndex]:
-                vertDict[vertIndex].append(face)
-        for edgeKey in face.edge_keys:
-            if edgeKey not in edgeDict:
-                edgeDict[edgeKey] = []
-            if face not in edgeDict[edgeKey]:
-                edgeDict[edgeKey].append(face)
 
-        for loopIndex in face.loops:
-            convertInfo = LoopConvertInfo(uv_data, obj, obj.material_slots[face.material_index].material)
-            f3dVertDict[loopIndex] = getF3DVert(mesh.loops[loopIndex], face, convertInfo, mesh)
-    for face in mesh.loop_triangles:
-        for edgeKey in face.edge_keys:
-            for otherFace in edgeDict[edgeKey]:
-                if otherFace == face:
+    snapshot = infoDict.snapshot = MeshSnapshot(obj, uv_data)
+    faces = list(mesh.loop_triangles)
+    faceEdgeKeys = [[tuple(edgeKey) for edgeKey in edgeKeys] for edgeKeys in snapshot.getTriEdgeKeys().tolist()]
+    edgeFaceIds: dict[tuple[int, int], list[int]] = {}
+    for faceId, (face, vertIndices, edgeKeys) in enumerate(zip(faces, snapshot.triVerts.tolist(), faceEdgeKeys)):
+        validNeighborDict[face] = []
+        # faces are only ever appended in order, so a face can only be a duplicate of the last one
+        for vertIndex in vertIndices:
+            vertFaces = vertDict.setdefault(vertIndex, [])
+            if not vertFaces or vertFaces[-1] is not face:
+                vertFaces.append(face)
+        for edgeKey in edgeKeys:
+            edgeFaces = edgeDict.setdefault(edgeKey, [])
+            if not edgeFaces or edgeFaces[-1] is not face:
+                edgeFaces.append(face)
+                edgeFaceIds.setdefault(edgeKey, []).append(faceId)
+
+    # Every pair of faces sharing an edge, with the first edge found
+    facePairs = []
+    checkedPairs = set()
+    for faceId, edgeKeys in enumerate(faceEdgeKeys):
+        for edgeKey in edgeKeys:
+            for otherFaceId in edgeFaceIds[edgeKey]:
+                if otherFaceId == faceId:
                     continue
-                if (otherFace, face) not in edgeValidDict and (face, otherFace) not in edgeValidDict:
-                    edgeValid = (
-                        f3dVertDict[getLoopFromVert(edgeKey[0], face)]
-                        == f3dVertDict[getLoopFromVert(edgeKey[0], otherFace)]
-                        and f3dVertDict[getLoopFromVert(edgeKey[1], face)]
-                        == f3dVertDict[getLoopFromVert(edgeKey[1], otherFace)]
-                    )
-                    edgeValidDict[(otherFace, face)] = edgeValid
-                    if edgeValid:
-                        validNeighborDict[face].append(otherFace)
-                        validNeighborDict[otherFace].append(face)
+                if (otherFaceId, faceId) not in checkedPairs and (faceId, otherFaceId) not in checkedPairs:
+                    checkedPairs.add((otherFaceId, faceId))
+                    facePairs.append((faceId, otherFaceId, *edgeKey))
+
+    if len(facePairs) == 0:
+        return infoDict
+    pairFaces, pairOtherFaces, pairVerts0, pairVerts1 = np.array(facePairs, dtype=np.int64).T
+    pairEdgeValid = snapshot.loopsEqual(
+        pairFaces,
+        snapshot.getTriLoopsOfVerts(pairFaces, pairVerts0),
+        pairOtherFaces,
+        snapshot.getTriLoopsOfVerts(pairOtherFaces, pairVerts0),
+    ) & snapshot.loopsEqual(
+        pairFaces,
+        snapshot.getTriLoopsOfVerts(pairFaces, pairVerts1),
+        pairOtherFaces,
+        snapshot.getTriLoopsOfVerts(pairOtherFaces, pairVerts1),
+    )
+    for (faceId, otherFaceId, _, _), edgeValid in zip(facePairs, pairEdgeValid.tolist()):
+        face, otherFace = faces[faceId], faces[otherFaceId]
+        edgeValidDict[(otherFace, face)] = edgeValid
+        if edgeValid:
+            validNeighborDict[face].append(otherFace)
+            validNeighborDict[otherFace].append(face)
     return infoDict
 
 
@@ -762,6 +888,11 @@ def getNewIndices(existingIndices, bufferStart):
     return newIndices
 
 
+# Verts are bucketed by the sum of the float fields == compares, in cells of this size, see BufferVertex.bucketKeys
+VERTEX_BUCKET_CELL_SIZE = 2**-4
+FLT_EPSILON = 2**-23
+
+
 class F3DVert:
     def __init__(
         self,
@@ -790,6 +921,27 @@ class F3DVert:
             and self.alpha == other.alpha
         )
 
+    def bucketFields(self) -> tuple[tuple, float, float]:
+        """
+        Returns the fields == compares exactly, the sum of the float fields it compares within a float step,
+        and how far apart that sum can be for two equal verts.
+        """
+        floatFields = [*self.position, *self.uv]
+        if self.rgb is not None:
+            floatFields.extend(self.rgb)
+        if self.normal is not None:
+            floatFields.extend(self.normal)
+        exactFields = (
+            None if self.stOffset is None else tuple(self.stOffset),
+            self.rgb is None,
+            self.normal is None,
+            self.alpha,
+        )
+        # A float step is at most 2**-23 of a value, doubled to cover the rounding of the sums themselves.
+        # Vectors store single precision floats, so FLT_EPSILON also covers any difference between tiny values.
+        tolerance = len(floatFields) * FLT_EPSILON + 2**-22 * sum(abs(field) for field in floatFields)
+        return exactFields, sum(floatFields), tolerance
+
     def toVtx(self, mesh, texDimensions, transformMatrix, isPointSampled: bool, tex_scale=(1, 1)) -> Vtx:
         # Position (8 bytes)
         position = [int(round(floatValue)) for floatValue in (transformMatrix @ self.position)]
@@ -847,6 +999,42 @@ class BufferVertex:
             and self.materialIndex == other.materialIndex
         )
 
+    def bucketKeys(self) -> list[tuple]:
+        """
+        Returns the key of the bucket of this vert, followed by the keys of every other bucket an equal vert can be in.
+        == on Vectors allows a float step of difference, so equal verts can have different values, but the sums of
+        their float fields are always within the tolerance of bucketFields, so no equal vert is ever missed.
+        """
+        exactFields, floatSum, tolerance = self.f3dVert.bucketFields()
+        exactKey = (exactFields, self.groupIndex, self.materialIndex)
+        if not math.isfinite(floatSum + tolerance):
+            return [(exactKey, None)]
+        cell = math.floor(floatSum / VERTEX_BUCKET_CELL_SIZE)
+        firstCell = math.floor((floatSum - tolerance) / VERTEX_BUCKET_CELL_SIZE)
+        lastCell = math.floor((floatSum + tolerance) / VERTEX_BUCKET_CELL_SIZE)
+        return [(exactKey, cell)] + [(exactKey, other) for other in range(firstCell, lastCell + 1) if other != cell]
+
+
+# Buckets of ascending indices into vertexBuffer, see BufferVertex.bucketKeys
+def indexVertexBuffer(vertexBuffer: list[BufferVertex], buckets: dict[tuple, list[int]], start: int = 0):
+    for i in range(start, len(vertexBuffer)):
+        buckets.setdefault(vertexBuffer[i].bucketKeys()[0], []).append(i)
+
+
+# Returns the first index in [start, end) of a vert equal to bufferVert, or None, same as a scan of the buffer with ==
+def findInVertexBuffer(
+    bufferVert: BufferVertex, vertexBuffer: list[BufferVertex], buckets: dict[tuple, list[int]], start: int, end: int
+) -> Optional[int]:
+    firstIndex = None
+    for key in bufferVert.bucketKeys():
+        for i in buckets.get(key, ()):
+            if firstIndex is not None and i >= firstIndex:
+                break
+            if start <= i < end and vertexBuffer[i] == bufferVert:
+                firstIndex = i
+                break
+    return firstIndex
+
 
 class TriangleConverterInfo:
     def __init__(self, obj, armature, f3d, transformMatrix, infoDict):
@@ -904,6 +1092,10 @@ class TriangleConverter:
             self.vertBuffer: list[BufferVertex] = existingVertexData
         self.existingVertexMaterialRegions = existingVertexMaterialRegions
         self.bufferStart = len(self.vertBuffer)
+        # bucket key -> indices in vertBuffer, see updateVertBufferIndex and BufferVertex.bucketKeys
+        self.vertBufferIndex: dict[tuple, list[int]] = {}
+        self.indexedVertBuffer: Optional[list[BufferVertex]] = None
+        self.indexedVertCount = 0
         self.vertexBufferTriangles = []  # [(index0, index1, index2)]
 
         self.triGroup = triGroup
@@ -917,16 +1109,29 @@ class TriangleConverter:
         self.isPointSampled = isTexturePointSampled(material)
         self.tex_scale = material.f3d_mat.tex_scale
 
+    def updateVertBufferIndex(self):
+        # vertBuffer is only ever extended or replaced, so only the new verts need to be indexed
+        if self.indexedVertBuffer is not self.vertBuffer or self.indexedVertCount > len(self.vertBuffer):
+            self.vertBufferIndex = {}
+            self.indexedVertBuffer = self.vertBuffer
+            self.indexedVertCount = 0
+        indexVertexBuffer(self.vertBuffer, self.vertBufferIndex, self.indexedVertCount)
+        self.indexedVertCount = len(self.vertBuffer)
+
+    def vertInBufferRange(self, bufferVert, start, end):
+        self.updateVertBufferIndex()
+        return findInVertexBuffer(bufferVert, self.vertBuffer, self.vertBufferIndex, start, end) is not None
+
     def vertInBuffer(self, bufferVert, material_index):
         if self.existingVertexMaterialRegions is None:
-            return bufferVert in self.vertBuffer
+            return self.vertInBufferRange(bufferVert, 0, len(self.vertBuffer))
         else:
             if material_index in self.existingVertexMaterialRegions:
                 matRegion = self.existingVertexMaterialRegions[material_index]
-                if bufferVert in self.vertBuffer[matRegion[0] : matRegion[1]]:
+                if self.vertInBufferRange(bufferVert, matRegion[0], matRegion[1]):
                     return True
 
-            return bufferVert in self.vertBuffer[self.bufferStart :]
+            return self.vertInBufferRange(bufferVert, self.bufferStart, len(self.vertBuffer))
 
     def getSortedBuffer(self) -> dict[int, list[BufferVertex]]:
         limbVerts: dict[int, list[BufferVertex]] = {}
@@ -1146,7 +1351,7 @@ class TriangleConverter:
             if not self.vertInBuffer(bufferVert, face.material_index):
                 addedVerts.append(bufferVert)
 
-            if bufferVert not in self.vertBuffer[: self.bufferStart]:
+            if not self.vertInBufferRange(bufferVert, 0, self.bufferStart):
                 allVerts.append(bufferVert)
 
         # We care only about load size, since loading is what takes up time.
@@ -1229,11 +1434,18 @@ def getLoopColor(loop: bpy.types.MeshLoop, mesh: bpy.types.Mesh) -> Vector:
 
 
 def createTriangleCommands(triangles, vertexBuffer, useSP2Triangle):
-    triangles = copy.deepcopy(triangles)
     commands = []
+    buckets: dict[tuple, list[int]] = {}
+    indexVertexBuffer(vertexBuffer, buckets)
+
+    def getIndex(v: BufferVertex):
+        index = findInVertexBuffer(v, vertexBuffer, buckets, 0, len(vertexBuffer))
+        if index is None:
+            raise PluginError("Triangle vertex is not in the vertex buffer.")
+        return index
 
     def getIndices(tri):
-        return [vertexBuffer.index(v) for v in tri]
+        return [getIndex(v) for v in tri]
 
     t = 0
     while t < len(triangles):
@@ -1893,7 +2105,7 @@ def exportF3DtoC(dirPath, obj, DLFormat, transformMatrix, texDir, savePNG, texSe
 
     if texSeparate:
         texCFile = open(os.path.join(modelDirPath, "texture.inc.c"), "w", newline="\n")
-        texCFile.write(texC.source)
+        texC.write_source(texCFile)
         texCFile.close()
 
     writeCData(staticData, os.path.join(modelDirPath, "header.h"), os.path.join(modelDirPath, "model.inc.c"))
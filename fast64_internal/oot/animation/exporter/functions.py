@@ -1,6 +1,7 @@
 import math
 import mathutils
 import bpy
+import numpy as np
 from ....utility import PluginError, toAlnum
 from ...skeleton.exporter import ootConvertArmatureToSkeletonWithoutMesh
 from .classes import OOTAnimation, OOTLinkAnimation
@@ -12,6 +13,10 @@ from ....utility_anim import (
     squashFramesIfAllSame,
     getFrameInterval,
     stashActionInArmature,
+    ActionSampler,
+    getEulerFrameValues,
+    getTranslationFrameValues,
+    saveFrameValues,
 )
 
 from ...oot_utility import (
@@ -85,6 +90,42 @@ def ootGetAnimBoneRot(bone, poseBone, convertTransformMatrix, isRoot):
     return finalRotation
 
 
+def ootGetAnimBoneRotations(bone, sampler: ActionSampler, isRoot):
+    """Same as ootGetAnimBoneRot, for all the frames of an ActionSampler at once, as (frames, 3, 3) matrices"""
+
+    origTranslationMatrix = (
+        np.linalg.inv(np.array(bone.parent.matrix_local)) if bone.parent is not None else np.identity(4)
+    ) @ np.array(bone.matrix_local)
+    animMatrices = sampler.getPoseMatrices(bone.name)
+    if bone.parent is not None:
+        animMatrices = np.linalg.inv(sampler.getPoseMatrices(bone.parent.name)) @ animMatrices
+
+    rotations = animMatrices[:, :3, :3]
+    finalScale = np.linalg.norm(rotations, axis=1) * np.sign(np.linalg.det(rotations))[:, None]
+    rotations = rotations / finalScale[:, None, :]
+    if isRoot:
+        # 90 degree offset because of coordinate system difference.
+        zUpToYUp = np.array(((1, 0, 0), (0, 0, 1), (0, -1, 0)), dtype=np.float64)
+        rotations = zUpToYUp @ rotations
+
+    if np.any((finalScale >= 1.01) | (finalScale <= 0.99)):
+        raise RuntimeError("Animation contains bones with animated scale. OoT SkelAnime does not support this.")
+    finalTranslation = animMatrices[:, :3, 3] - origTranslationMatrix[:3, 3]
+    if not isRoot and np.any((finalTranslation >= 1.0) | (finalTranslation <= -1.0)):
+        raise RuntimeError(
+            "Animation contains non-root bones with animated translation. OoT SkelAnime only supports animated translation on the root bone."
+        )
+    return rotations
+
+
+def ootGetRootTranslations(rootBoneName, sampler: ActionSampler, convertTransformMatrix):
+    """Returns the (frames, 3) root translations, converted from Z-up to Y-up"""
+
+    transform = np.array(convertTransformMatrix)
+    translations = sampler.getPoseMatrices(rootBoneName)[:, :3, 3] @ transform[:3, :3].T + transform[:3, 3]
+    return np.column_stack((translations[:, 0], translations[:, 2], -translations[:, 1]))
+
+
 def ootConvertNonLinkAnimationData(anim, armatureObj, convertTransformMatrix, *, frame_start, frame_count):
     checkForStartBone(armatureObj)
     bonesToProcess = [getStartBone(armatureObj)]
@@ -114,30 +155,41 @@ def ootConvertNonLinkAnimationData(anim, armatureObj, convertTransformMatrix, *,
         [ValueFrameData(i, 0, []), ValueFrameData(i, 1, []), ValueFrameData(i, 2, [])] for i in range(len(animBones))
     ]
 
-    currentFrame = bpy.context.scene.frame_current
-    for frame in range(frame_start, frame_start + frame_count):
-        bpy.context.scene.frame_set(frame)
-        rootBone = armatureObj.data.bones[animBones[0]]
-        rootPoseBone = armatureObj.pose.bones[animBones[0]]
+    sampler = ActionSampler(armatureObj, anim, frame_start, frame_count)
+    if sampler.canSample(animBones):
+        # sample the action for all frames at once, instead of evaluating the whole scene on each frame
+        translations = ootGetRootTranslations(animBones[0], sampler, convertTransformMatrix)
+        saveFrameValues(translationData, getTranslationFrameValues(translations))
+
+        for boneIndex, boneName in enumerate(animBones):
+            rotations = ootGetAnimBoneRotations(armatureObj.data.bones[boneName], sampler, boneIndex == 0)
+            saveFrameValues(rotationData[boneIndex], getEulerFrameValues(rotations))
+    else:
+        currentFrame = bpy.context.scene.frame_current
+        for frame in range(frame_start, frame_start + frame_count):
+            bpy.context.scene.frame_set(frame)
+            rootBone = armatureObj.data.bones[animBones[0]]
+            rootPoseBone = armatureObj.pose.bones[animBones[0]]
+
+            # Convert Z-up to Y-up for root translation animation
+            translation = (
+                mathutils.Quaternion((1, 0, 0), math.radians(-90.0))
+                @ (convertTransformMatrix @ rootPoseBone.matrix).decompose()[0]
+            )
+            saveTranslationFrame(translationData, translation)
 
-        # Convert Z-up to Y-up for root translation animation
-        translation = (
-            mathutils.Quaternion((1, 0, 0), math.radians(-90.0))
-            @ (convertTransformMatrix @ rootPoseBone.matrix).decompose()[0]
-        )
-        saveTranslationFrame(translationData, translation)
+            for boneIndex in range(len(animBones)):
+                boneName = animBones[boneIndex]
+                currentBone = armatureObj.data.bones[boneName]
+                currentPoseBone = armatureObj.pose.bones[boneName]
 
-        for boneIndex in range(len(animBones)):
-            boneName = animBones[boneIndex]
-            currentBone = armatureObj.data.bones[boneName]
-            currentPoseBone = armatureObj.pose.bones[boneName]
+                saveQuaternionFrame(
+                    rotationData[boneIndex],
+                    ootGetAnimBoneRot(currentBone, currentPoseBone, convertTransformMatrix, boneIndex == 0),
+                )
 
-            saveQuaternionFrame(
-                rotationData[boneIndex],
-                ootGetAnimBoneRot(currentBone, currentPoseBone, convertTransformMatrix, boneIndex == 0),
-            )
+        bpy.context.scene.frame_set(currentFrame)
 
-    bpy.context.scene.frame_set(currentFrame)
     squashFramesIfAllSame(translationData)
     for frameData in rotationData:
         squashFramesIfAllSame(frameData)
@@ -176,38 +228,59 @@ def ootConvertLinkAnimationData(anim, armatureObj, convertTransformMatrix, *, fr
 
     frameData = []
 
-    currentFrame = bpy.context.scene.frame_current
-    for frame in range(frame_start, frame_start + frame_count):
-        bpy.context.scene.frame_set(frame)
-        rootBone = armatureObj.data.bones[animBones[0]]
-        rootPoseBone = armatureObj.pose.bones[animBones[0]]
+    textureAnim = armatureObj.ootLinkTextureAnim
+    textureAnimChannels = (
+        (textureAnim.path_from_id("eyes"), 0),
+        (textureAnim.path_from_id("mouth"), 0),
+    )
+    sampler = ActionSampler(armatureObj, anim, frame_start, frame_count)
+    if sampler.canSample(animBones, textureAnimChannels):
+        # sample the action for all frames at once, instead of evaluating the whole scene on each frame
+        # each frame is the root translation, the rotation of every bone then the texture animation value
+        frameValues = [getTranslationFrameValues(ootGetRootTranslations(animBones[0], sampler, convertTransformMatrix))]
+        for boneIndex, boneName in enumerate(animBones):
+            rotations = ootGetAnimBoneRotations(armatureObj.data.bones[boneName], sampler, boneIndex == 0)
+            frameValues.append(getEulerFrameValues(rotations))
+
+        # animated int properties are truncated then clamped to their range
+        eyes = np.clip(sampler.sampleProperty(textureAnim, "eyes").astype(np.int64), 0, 15)
+        mouth = np.clip(sampler.sampleProperty(textureAnim, "mouth").astype(np.int64), 0, 15)
+        frameValues.append((eyes & 0xF) | ((mouth & 0xF) << 4))
+        frameData = np.hstack(frameValues).ravel().tolist()
+    else:
+        currentFrame = bpy.context.scene.frame_current
+        for frame in range(frame_start, frame_start + frame_count):
+            bpy.context.scene.frame_set(frame)
+            rootBone = armatureObj.data.bones[animBones[0]]
+            rootPoseBone = armatureObj.pose.bones[animBones[0]]
+
+            # Convert Z-up to Y-up for root translation animation
+            translation = (
+                mathutils.Quaternion((1, 0, 0), math.radians(-90.0))
+                @ (convertTransformMatrix @ rootPoseBone.matrix).decompose()[0]
+            )
 
-        # Convert Z-up to Y-up for root translation animation
-        translation = (
-            mathutils.Quaternion((1, 0, 0), math.radians(-90.0))
-            @ (convertTransformMatrix @ rootPoseBone.matrix).decompose()[0]
-        )
+            for i in range(3):
+                frameData.append(min(int(round(translation[i])), 2**16 - 1))
 
-        for i in range(3):
-            frameData.append(min(int(round(translation[i])), 2**16 - 1))
+            for boneIndex in range(len(animBones)):
+                boneName = animBones[boneIndex]
+                currentBone = armatureObj.data.bones[boneName]
+                currentPoseBone = armatureObj.pose.bones[boneName]
 
-        for boneIndex in range(len(animBones)):
-            boneName = animBones[boneIndex]
-            currentBone = armatureObj.data.bones[boneName]
-            currentPoseBone = armatureObj.pose.bones[boneName]
+                rotation = ootGetAnimBoneRot(currentBone, currentPoseBone, convertTransformMatrix, boneIndex == 0)
+                for i in range(3):
+                    field = rotation.to_euler()[i]
+                    value = (math.degrees(field) % 360) / 360
+                    frameData.append(min(int(round(value * (2**16 - 1))), 2**16 - 1))
 
-            rotation = ootGetAnimBoneRot(currentBone, currentPoseBone, convertTransformMatrix, boneIndex == 0)
-            for i in range(3):
-                field = rotation.to_euler()[i]
-                value = (math.degrees(field) % 360) / 360
-                frameData.append(min(int(round(value * (2**16 - 1))), 2**16 - 1))
+            textureAnimValue = (armatureObj.ootLinkTextureAnim.eyes & 0xF) | (
+                (armatureObj.ootLinkTextureAnim.mouth & 0xF) << 4
+            )
+            frameData.append(textureAnimValue)
 
-        textureAnimValue = (armatureObj.ootLinkTextureAnim.eyes & 0xF) | (
-            (armatureObj.ootLinkTextureAnim.mouth & 0xF) << 4
-        )
-        frameData.append(textureAnimValue)
+        bpy.context.scene.frame_set(currentFrame)
 
-    bpy.context.scene.frame_set(currentFrame)
     return frameData
 
 
@@ -1,4 +1,6 @@
 from .functions import (
     ootImportLinkAnimationC,
     ootImportNonLinkAnimationC,
+    ootImportAllLinkAnimationsC,
+    ootImportAllNonLinkAnimationsC,
 )
@@ -2,14 +2,17 @@ import mathutils
 import bpy
 import re
 import math
-from ....utility import PluginError, hexOrDecInt
+import numpy as np
+from ....utility import PluginError, getCSymbolTable, hexOrDecInt
 from ....f3d.f3d_parser import getImportData
 from ...oot_model_classes import ootGetIncludedAssetData
 
 from ....utility_anim import (
     getTranslationRelativeToRest,
     getRotationRelativeToRest,
+    getTranslationsRelativeToRest,
     stashActionInArmature,
+    setKeyframes,
 )
 
 from ...oot_utility import (
@@ -23,11 +26,13 @@ def ootTranslationValue(value, actorScale):
 
 
 def binangToRadians(value):
-    return math.radians(value * 360 / (2**16))
+    return np.radians(value * 360 / (2**16))
 
 
 def getFrameData(filepath: str, animData: str, frameDataName: str):
-    matchResult = re.search(re.escape(frameDataName) + "\s*\[\s*[0-9]*\s*\]\s*=\s*\{([^\}]*)\}", animData, re.DOTALL)
+    matchResult = getCSymbolTable(animData).search(
+        frameDataName, re.escape(frameDataName) + "\s*\[\s*[0-9]*\s*\]\s*=\s*\{([^\}]*)\}", re.DOTALL
+    )
     if matchResult is None:
         raise PluginError("Cannot find animation frame data named " + frameDataName + " in " + filepath)
     data = matchResult.group(1)
@@ -42,7 +47,9 @@ def getFrameData(filepath: str, animData: str, frameDataName: str):
 
 
 def getJointIndices(filepath, animData, jointIndicesName):
-    matchResult = re.search(re.escape(jointIndicesName) + "\s*\[\s*[0-9]*\s*\]\s*=\s*\{([^;]*);", animData, re.DOTALL)
+    matchResult = getCSymbolTable(animData).search(
+        jointIndicesName, re.escape(jointIndicesName) + "\s*\[\s*[0-9]*\s*\]\s*=\s*\{([^;]*);", re.DOTALL
+    )
     if matchResult is None:
         raise PluginError("Cannot find animation joint indices data named " + jointIndicesName + " in " + filepath)
     data = matchResult.group(1)
@@ -54,12 +61,78 @@ def getJointIndices(filepath, animData, jointIndicesName):
     return jointIndicesData
 
 
-def ootImportNonLinkAnimationC(armatureObj, filepath, animName, actorScale, isCustomImport: bool):
+def getCachedArray(arrayCache: dict[str, np.ndarray], name: str, parse):
+    """
+    Returns the parsed array named name as a NumPy array, parsing it only the first time.
+    Animations imported from the same source share the cache, since they often share data arrays.
+    """
+
+    if name not in arrayCache:
+        arrayCache[name] = np.array(parse(), dtype=np.int64)
+    return arrayCache[name]
+
+
+def getAnimationHeaderNames(animData: str, headerType: str):
+    """Returns the names of all the animation headers of the given type, in file order"""
+
+    return [name for name, symbol in getCSymbolTable(animData).symbols.items() if symbol.type == headerType]
+
+
+def ootGetAnimationImportData(filepath: str, isCustomImport: bool):
     animData = getImportData([filepath])
     if not isCustomImport:
         basePath = bpy.path.abspath(bpy.context.scene.ootDecompPath)
         animData = ootGetIncludedAssetData(basePath, [filepath], animData) + animData
+    return animData
 
+
+def ootSetRotationKeyframes(anim: bpy.types.Action, bone: bpy.types.Bone, rotations: np.ndarray):
+    trueRotations = [
+        getRotationRelativeToRest(bone, mathutils.Euler(rotation, "XYZ")) for rotation in rotations.tolist()
+    ]
+    trueRotations = np.array(trueRotations, dtype=np.float64).reshape(-1, 3)
+    for propertyIndex in range(3):
+        fcurve = anim.fcurves.new(
+            data_path='pose.bones["' + bone.name + '"].rotation_euler',
+            index=propertyIndex,
+            action_group=bone.name,
+        )
+        setKeyframes(fcurve, trueRotations[:, propertyIndex])
+
+
+def ootSetTranslationKeyframes(anim: bpy.types.Action, bone: bpy.types.Bone, translations: np.ndarray):
+    trueTranslations = getTranslationsRelativeToRest(bone, translations)
+    for propertyIndex in range(3):
+        fcurve = anim.fcurves.new(
+            data_path='pose.bones["' + bone.name + '"].location',
+            index=propertyIndex,
+            action_group=bone.name,
+        )
+        setKeyframes(fcurve, trueTranslations[:, propertyIndex])
+
+
+def ootImportNonLinkAnimationC(armatureObj, filepath, animName, actorScale, isCustomImport: bool):
+    animData = ootGetAnimationImportData(filepath, isCustomImport)
+    ootImportNonLinkAnimationFromData(armatureObj, filepath, animData, animName, actorScale, {})
+
+
+def ootImportAllNonLinkAnimationsC(armatureObj, filepath, actorScale, isCustomImport: bool):
+    """Imports every animation of the file, returns the amount of imported animations"""
+
+    animData = ootGetAnimationImportData(filepath, isCustomImport)
+    animNames = getAnimationHeaderNames(animData, "AnimationHeader")
+    if len(animNames) == 0:
+        raise PluginError("Cannot find any animation in " + filepath)
+
+    arrayCache = {}
+    for animName in animNames:
+        ootImportNonLinkAnimationFromData(armatureObj, filepath, animData, animName, actorScale, arrayCache)
+    return len(animNames)
+
+
+def ootImportNonLinkAnimationFromData(
+    armatureObj, filepath, animData: str, animName: str, actorScale, arrayCache: dict[str, np.ndarray]
+):
     matchResult = re.search(
         re.escape(animName)
         + "\s*=\s*\{\s*\{\s*([^,\s]*)\s*\}*\s*,\s*([^,\s]*)\s*,\s*([^,\s]*)\s*,\s*([^,\s]*)\s*\}\s*;",
@@ -72,11 +145,10 @@ def ootImportNonLinkAnimationC(armatureObj, filepath, animName, actorScale, isCu
     jointIndicesName = matchResult.group(3).strip()
     staticIndexMax = hexOrDecInt(matchResult.group(4).strip())
 
-    frameData = getFrameData(filepath, animData, frameDataName)
-    jointIndices = getJointIndices(filepath, animData, jointIndicesName)
-
-    # print(frameDataName + " " + jointIndicesName)
-    # print(str(frameData) + "\n" + str(jointIndices))
+    frameData = getCachedArray(arrayCache, frameDataName, lambda: getFrameData(filepath, animData, frameDataName))
+    jointIndices = getCachedArray(
+        arrayCache, jointIndicesName, lambda: getJointIndices(filepath, animData, jointIndicesName)
+    ).reshape(-1, 3)
 
     bpy.context.scene.frame_end = frameCount
     anim = bpy.data.actions.new(animName)
@@ -84,64 +156,24 @@ def ootImportNonLinkAnimationC(armatureObj, filepath, animName, actorScale, isCu
     startBoneName = getStartBone(armatureObj)
     boneStack = [startBoneName]
 
-    isRootTranslation = True
-    # boneFrameData = [[x keyframes], [y keyframes], [z keyframes]]
-    # len(armatureFrameData) should be = number of bones
-    # property index = 0,1,2 (aka x,y,z)
-    for jointIndex in jointIndices:
-        if isRootTranslation:
-            fcurves = [
-                anim.fcurves.new(
-                    data_path='pose.bones["' + startBoneName + '"].location',
-                    index=propertyIndex,
-                    action_group=startBoneName,
-                )
-                for propertyIndex in range(3)
-            ]
-            for frame in range(frameCount):
-                rawTranslation = mathutils.Vector((0, 0, 0))
-                for propertyIndex in range(3):
-                    if jointIndex[propertyIndex] < staticIndexMax:
-                        value = ootTranslationValue(frameData[jointIndex[propertyIndex]], actorScale)
-                    else:
-                        value = ootTranslationValue(frameData[jointIndex[propertyIndex] + frame], actorScale)
-
-                    rawTranslation[propertyIndex] = value
-
-                trueTranslation = getTranslationRelativeToRest(armatureObj.data.bones[startBoneName], rawTranslation)
-
-                for propertyIndex in range(3):
-                    fcurves[propertyIndex].keyframe_points.insert(frame, trueTranslation[propertyIndex])
-
-            isRootTranslation = False
+    # static values (index below staticIndexMax) are the same on every frame,
+    # others are stored one after the other for each frame
+    frameIndices = jointIndices[:, None, :] + np.where(
+        jointIndices[:, None, :] < staticIndexMax, 0, np.arange(frameCount)[None, :, None]
+    )
+    # jointFrameData[joint] = (frames, 3) values, the first joint is the root translation
+    jointFrameData = frameData[frameIndices]
+
+    for jointIndex, frameValues in enumerate(jointFrameData):
+        if jointIndex == 0:
+            ootSetTranslationKeyframes(
+                anim, armatureObj.data.bones[startBoneName], ootTranslationValue(frameValues, actorScale)
+            )
         else:
             # WARNING: This assumes the order bones are processed are in alphabetical order.
             # If this changes in the future, then this won't work.
             bone, boneStack = getNextBone(boneStack, armatureObj)
-
-            fcurves = [
-                anim.fcurves.new(
-                    data_path='pose.bones["' + bone.name + '"].rotation_euler',
-                    index=propertyIndex,
-                    action_group=bone.name,
-                )
-                for propertyIndex in range(3)
-            ]
-
-            for frame in range(frameCount):
-                rawRotation = mathutils.Euler((0, 0, 0), "XYZ")
-                for propertyIndex in range(3):
-                    if jointIndex[propertyIndex] < staticIndexMax:
-                        value = binangToRadians(frameData[jointIndex[propertyIndex]])
-                    else:
-                        value = binangToRadians(frameData[jointIndex[propertyIndex] + frame])
-
-                    rawRotation[propertyIndex] = value
-
-                trueRotation = getRotationRelativeToRest(bone, rawRotation)
-
-                for propertyIndex in range(3):
-                    fcurves[propertyIndex].keyframe_points.insert(frame, trueRotation[propertyIndex])
+            ootSetRotationKeyframes(anim, bone, binangToRadians(frameValues))
 
     if armatureObj.animation_data is None:
         armatureObj.animation_data_create()
@@ -162,13 +194,64 @@ def ootImportLinkAnimationC(
     numLimbs: int,
     isCustomImport: bool,
 ):
-    animHeaderData = getImportData([animHeaderFilepath])
-    animData = getImportData([animFilepath])
-    if not isCustomImport:
-        basePath = bpy.path.abspath(bpy.context.scene.ootDecompPath)
-        animHeaderData = ootGetIncludedAssetData(basePath, [animHeaderFilepath], animHeaderData) + animHeaderData
-        animData = ootGetIncludedAssetData(basePath, [animFilepath], animData) + animData
+    animHeaderData = ootGetAnimationImportData(animHeaderFilepath, isCustomImport)
+    animData = ootGetAnimationImportData(animFilepath, isCustomImport)
+    ootImportLinkAnimationFromData(
+        armatureObj,
+        animHeaderFilepath,
+        animHeaderData,
+        animFilepath,
+        animData,
+        animHeaderName,
+        actorScale,
+        numLimbs,
+        {},
+    )
+
 
+def ootImportAllLinkAnimationsC(
+    armatureObj: bpy.types.Object,
+    animHeaderFilepath: str,
+    animFilepath: str,
+    actorScale: float,
+    numLimbs: int,
+    isCustomImport: bool,
+):
+    """Imports every Link animation of the header file, returns the amount of imported animations"""
+
+    animHeaderData = ootGetAnimationImportData(animHeaderFilepath, isCustomImport)
+    animData = ootGetAnimationImportData(animFilepath, isCustomImport)
+    animHeaderNames = getAnimationHeaderNames(animHeaderData, "LinkAnimationHeader")
+    if len(animHeaderNames) == 0:
+        raise PluginError("Cannot find any Link animation in " + animHeaderFilepath)
+
+    arrayCache = {}
+    for animHeaderName in animHeaderNames:
+        ootImportLinkAnimationFromData(
+            armatureObj,
+            animHeaderFilepath,
+            animHeaderData,
+            animFilepath,
+            animData,
+            animHeaderName,
+            actorScale,
+            numLimbs,
+            arrayCache,
+        )
+    return len(animHeaderNames)
+
+
+def ootImportLinkAnimationFromData(
+    armatureObj: bpy.types.Object,
+    animHeaderFilepath: str,
+    animHeaderData: str,
+    animFilepath: str,
+    animData: str,
+    animHeaderName: str,
+    actorScale: float,
+    numLimbs: int,
+    arrayCache: dict[str, np.ndarray],
+):
     matchResult = re.search(
         re.escape(animHeaderName) + "\s*=\s*\{\s*\{\s*([^,\s]*)\s*\}\s*,\s*([^,\s]*)\s*\}\s*;",
         animHeaderData,
@@ -178,91 +261,43 @@ def ootImportLinkAnimationC(
     frameCount = hexOrDecInt(matchResult.group(1).strip())
     frameDataName = matchResult.group(2).strip()
 
-    frameData = getFrameData(animFilepath, animData, frameDataName)
+    frameData = getCachedArray(arrayCache, frameDataName, lambda: getFrameData(animFilepath, animData, frameDataName))
     print(f"{frameDataName}: {frameCount} frames, {len(frameData)} values.")
 
     bpy.context.scene.frame_end = frameCount
     anim = bpy.data.actions.new(animHeaderName)
 
     # get ordered list of bone names
-    # create animation curves for each bone
     startBoneName = getStartBone(armatureObj)
     boneList = []
-    boneCurvesRotation = []
-    boneCurveTranslation = None
     boneStack = [startBoneName]
-
-    eyesCurve = anim.fcurves.new(
-        data_path="ootLinkTextureAnim.eyes",
-        action_group="Texture Animations",
-    )
-    mouthCurve = anim.fcurves.new(
-        data_path="ootLinkTextureAnim.mouth",
-        action_group="Texture Animations",
-    )
-
-    # create all necessary fcurves
     while len(boneStack) > 0:
         bone, boneStack = getNextBone(boneStack, armatureObj)
         boneList.append(bone)
 
-        if boneCurveTranslation is None:
-            boneCurveTranslation = [
-                anim.fcurves.new(
-                    data_path='pose.bones["' + bone.name + '"].location',
-                    index=propertyIndex,
-                    action_group=startBoneName,
-                )
-                for propertyIndex in range(3)
-            ]
-
-        boneCurvesRotation.append(
-            [
-                anim.fcurves.new(
-                    data_path='pose.bones["' + bone.name + '"].rotation_euler',
-                    index=propertyIndex,
-                    action_group=bone.name,
-                )
-                for propertyIndex in range(3)
-            ]
-        )
-
     # vec3 = 3x s16 values
     # padding = u8, tex anim = u8
     # root trans vec3 + rot vec3 for each limb + (s16 with eye/mouth indices)
     frameSize = 3 + 3 * numLimbs + 1
-    for frame in range(frameCount):
-        currentFrame = frameData[frame * frameSize : (frame + 1) * frameSize]
-        if len(currentFrame) < frameSize:
-            raise PluginError(
-                f"{frameDataName} has malformed data. Framesize = {frameSize}, CurrentFrame = {len(currentFrame)}"
-            )
-
-        translation = getTranslationRelativeToRest(
-            boneList[0], mathutils.Vector([ootTranslationValue(currentFrame[i], actorScale) for i in range(3)])
+    if len(frameData) < frameCount * frameSize:
+        raise PluginError(
+            f"{frameDataName} has malformed data. Framesize = {frameSize}, CurrentFrame = {len(frameData) % frameSize}"
         )
-
-        for i in range(3):
-            boneCurveTranslation[i].keyframe_points.insert(frame, translation[i])
-
-        for boneIndex in range(numLimbs):
-            bone = boneList[boneIndex]
-            rawRotation = mathutils.Euler(
-                [binangToRadians(currentFrame[i + (boneIndex + 1) * 3]) for i in range(3)], "XYZ"
-            )
-            trueRotation = getRotationRelativeToRest(bone, rawRotation)
-            for i in range(3):
-                boneCurvesRotation[boneIndex][i].keyframe_points.insert(frame, trueRotation[i])
-
-        # convert to unsigned short representation
-        texAnimValue = int.from_bytes(
-            currentFrame[(numLimbs + 1) * 3].to_bytes(2, "big", signed=True), "big", signed=False
+    frames = frameData[: frameCount * frameSize].reshape(frameCount, frameSize)
+
+    # convert to unsigned short representation
+    texAnimValues = frames[:, (numLimbs + 1) * 3] & 0xFFFF
+    for propName, values in (("eyes", texAnimValues & 0xF), ("mouth", texAnimValues >> 4 & 0xF)):
+        fcurve = anim.fcurves.new(
+            data_path="ootLinkTextureAnim." + propName,
+            action_group="Texture Animations",
         )
-        eyesValue = texAnimValue & 0xF
-        mouthValue = texAnimValue >> 4 & 0xF
+        setKeyframes(fcurve, values, "CONSTANT")
 
-        eyesCurve.keyframe_points.insert(frame, eyesValue).interpolation = "CONSTANT"
-        mouthCurve.keyframe_points.insert(frame, mouthValue).interpolation = "CONSTANT"
+    ootSetTranslationKeyframes(anim, boneList[0], ootTranslationValue(frames[:, :3], actorScale))
+    for boneIndex in range(numLimbs):
+        rotations = binangToRadians(frames[:, (boneIndex + 1) * 3 : (boneIndex + 2) * 3])
+        ootSetRotationKeyframes(anim, boneList[boneIndex], rotations)
 
     if armatureObj.animation_data is None:
         armatureObj.animation_data_create()
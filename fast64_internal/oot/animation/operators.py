@@ -6,7 +6,12 @@ from bpy.ops import object
 from ...utility import PluginError, toAlnum, writeCData, raisePluginError
 from .properties import OOTAnimExportSettingsProperty, OOTAnimImportSettingsProperty
 from .exporter import ootExportLinkAnimation, ootExportNonLinkAnimation
-from .importer import ootImportLinkAnimationC, ootImportNonLinkAnimationC
+from .importer import (
+    ootImportLinkAnimationC,
+    ootImportNonLinkAnimationC,
+    ootImportAllLinkAnimationsC,
+    ootImportAllNonLinkAnimationsC,
+)
 
 from ..oot_utility import (
     ootGetPath,
@@ -95,15 +100,22 @@ def ootImportAnimationC(
         else:
             animFilepath = filepath
             animHeaderFilepath = filepath
-        ootImportLinkAnimationC(
-            armatureObj,
-            animHeaderFilepath,
-            animFilepath,
-            settings.animName,
-            actorScale,
-            numLimbs,
-            settings.isCustom,
-        )
+        if settings.importAll:
+            ootImportAllLinkAnimationsC(
+                armatureObj, animHeaderFilepath, animFilepath, actorScale, numLimbs, settings.isCustom
+            )
+        else:
+            ootImportLinkAnimationC(
+                armatureObj,
+                animHeaderFilepath,
+                animFilepath,
+                settings.animName,
+                actorScale,
+                numLimbs,
+                settings.isCustom,
+            )
+    elif settings.importAll:
+        ootImportAllNonLinkAnimationsC(armatureObj, filepath, actorScale, settings.isCustom)
     else:
         ootImportNonLinkAnimationC(armatureObj, filepath, settings.animName, actorScale, settings.isCustom)
 
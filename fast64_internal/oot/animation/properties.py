@@ -48,15 +48,22 @@ class OOTAnimImportSettingsProperty(PropertyGroup):
     folderName: StringProperty(name="Animation Folder", default="object_geldb")
     isLink: BoolProperty(name="Is Link", default=False)
     animName: StringProperty(name="Anim Name", default="gGerudoRedSpinAttackAnim")
+    importAll: BoolProperty(
+        name="Import All Animations",
+        description="Import every animation header of the file instead of only the named one",
+        default=False,
+    )
 
     def draw_props(self, layout: UILayout):
-        prop_split(layout, self, "animName", "Anim Header Name")
+        if not self.importAll:
+            prop_split(layout, self, "animName", "Anim Header Name")
         if self.isCustom:
             prop_split(layout, self, "customPath", "File")
         elif not self.isLink:
             prop_split(layout, self, "folderName", "Object")
         layout.prop(self, "isLink")
         layout.prop(self, "isCustom")
+        layout.prop(self, "importAll")
 
 
 class OOTLinkTextureAnimProperty(PropertyGroup):
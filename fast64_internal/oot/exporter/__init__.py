@@ -7,6 +7,7 @@ from ...f3d.f3d_gbi import DLFormat, TextureExportSettings
 from ..oot_model_classes import OOTModel
 from ..oot_f3d_writer import writeTextureArraysNew, writeTextureArraysExisting1D
 from .scene import Scene
+from .collision.report import CollisionReport
 from .decomp_edit import Files
 
 from ...utility import (
@@ -123,6 +124,9 @@ class SceneExport:
         for room in scene.rooms.entries:
             room.roomShape.copy_bg_images(path)
 
+        if exportInfo.writeCollisionReport:
+            CollisionReport(scene.colHeader).write(os.path.join(path, f"{sceneName}_collision_report.json"))
+
         if not isCustomExport:
             Files.add_scene_edits(exportInfo, scene, sceneFile)
 
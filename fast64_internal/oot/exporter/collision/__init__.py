@@ -1,11 +1,12 @@
 import math
+import numpy as np
 
 from dataclasses import dataclass
 from mathutils import Matrix, Vector
 from bpy.types import Mesh, Object
 from bpy.ops import object
 from typing import Optional
-from ....utility import PluginError, CData, indent
+from ....utility import PluginError, CData, indent, transformPositions, getUniqueRows
 from ...oot_utility import convertIntTo2sComplement
 from ..utility import Utility
 from .polygons import CollisionPoly, CollisionPolygons
@@ -37,13 +38,17 @@ class CollisionUtility:
                 maxBounds[i] = position[i]
 
     @staticmethod
-    def getVertexIndex(vertexPos: tuple[int, int, int], vertexList: list[CollisionVertex]):
-        """Returns the index of a CollisionVertex based on position data, returns None if no match found"""
-
-        for i in range(len(vertexList)):
-            if vertexList[i].pos == vertexPos:
-                return i
-        return None
+    def normalizeVectors(vectors: np.ndarray):
+        """Returns ``Vector(vector).normalized()`` for every row of a (n, 3) float32 array"""
+
+        squares = (vectors * vectors).astype(np.float64)
+        lengthSqr = squares[:, 2] + squares[:, 1] + squares[:, 0]
+        isValid = lengthSqr > 1.0e-35
+        normalized = np.zeros_like(vectors)
+        normalized[isValid] = (
+            vectors[isValid] * (np.float32(1) / np.sqrt(lengthSqr[isValid]).astype(np.float32))[:, None]
+        )
+        return normalized
 
     @staticmethod
     def getMeshObjects(
@@ -82,74 +87,38 @@ class CollisionUtility:
         transformFromMeshObj = CollisionUtility.getMeshObjects(
             dataHolder, transform, transformFromMeshObj, includeChildren
         )
+        # per mesh arrays of the triangles to export
+        polyCorners: list[np.ndarray] = []
+        polyOrders: list[np.ndarray] = []
+        polyNormals: list[np.ndarray] = []
+        polyDistances: list[np.ndarray] = []
+        polySurfaces: list = []
+
         for meshObj, transform in transformFromMeshObj.items():
             # Note: ``isinstance``only used to get the proper type hints
             if not meshObj.ignore_collision and isinstance(meshObj.data, Mesh):
                 if len(meshObj.data.materials) == 0:
                     raise PluginError(f"'{meshObj.name}' must have a material associated with it.")
 
-                meshObj.data.calc_loop_triangles()
-                for face in meshObj.data.loop_triangles:
-                    colProp = meshObj.material_slots[face.material_index].material.ootCollisionProperty
-
-                    # get bounds and vertices data
-                    planePoint = transform @ meshObj.data.vertices[face.vertices[0]].co
-                    (x1, y1, z1) = Utility.roundPosition(planePoint)
-                    (x2, y2, z2) = Utility.roundPosition(transform @ meshObj.data.vertices[face.vertices[1]].co)
-                    (x3, y3, z3) = Utility.roundPosition(transform @ meshObj.data.vertices[face.vertices[2]].co)
-                    CollisionUtility.updateBounds((x1, y1, z1), colBounds)
-                    CollisionUtility.updateBounds((x2, y2, z2), colBounds)
-                    CollisionUtility.updateBounds((x3, y3, z3), colBounds)
-
-                    normal = (transform.inverted().transposed() @ face.normal).normalized()
-                    distance = round(
-                        -1 * (normal[0] * planePoint[0] + normal[1] * planePoint[1] + normal[2] * planePoint[2])
-                    )
-                    distance = convertIntTo2sComplement(distance, 2, True)
-
-                    nx = (y2 - y1) * (z3 - z2) - (z2 - z1) * (y3 - y2)
-                    ny = (z2 - z1) * (x3 - x2) - (x2 - x1) * (z3 - z2)
-                    nz = (x2 - x1) * (y3 - y2) - (y2 - y1) * (x3 - x2)
-                    magSqr = nx * nx + ny * ny + nz * nz
-                    if magSqr <= 0:
-                        print("INFO: Ignore denormalized triangle.")
-                        continue
-
-                    indices: list[int] = []
-                    for pos in [(x1, y1, z1), (x2, y2, z2), (x3, y3, z3)]:
-                        vertexIndex = CollisionUtility.getVertexIndex(pos, vertexList)
-                        if vertexIndex is None:
-                            vertexList.append(CollisionVertex(pos))
-                            indices.append(len(vertexList) - 1)
-                        else:
-                            indices.append(vertexIndex)
-                    assert len(indices) == 3
-
-                    # We need to ensure two things about the order in which the vertex indices are:
-                    #
-                    # 1) The vertex with the minimum y coordinate should be first.
-                    # This prevents a bug due to an optimization in OoT's CollisionPoly_GetMinY.
-                    # https://github.com/zeldaret/oot/blob/873c55faad48a67f7544be713cc115e2b858a4e8/src/code/z_bgcheck.c#L202
-                    #
-                    # 2) The vertices should wrap around the polygon normal **counter-clockwise**.
-                    # This is needed for OoT's dynapoly, which is collision that can move.
-                    # When it moves, the vertex coordinates and normals are recomputed.
-                    # The normal is computed based on the vertex coordinates, which makes the order of vertices matter.
-                    # https://github.com/zeldaret/oot/blob/873c55faad48a67f7544be713cc115e2b858a4e8/src/code/z_bgcheck.c#L2976
-
-                    # Address 1): sort by ascending y coordinate
-                    indices.sort(key=lambda index: vertexList[index].pos[1])
-
-                    # Address 2):
-                    # swap indices[1] and indices[2],
-                    # if the normal computed from the vertices in the current order is the wrong way.
-                    v0 = Vector(vertexList[indices[0]].pos)
-                    v1 = Vector(vertexList[indices[1]].pos)
-                    v2 = Vector(vertexList[indices[2]].pos)
-                    if (v1 - v0).cross(v2 - v0).dot(Vector(normal)) < 0:
-                        indices[1], indices[2] = indices[2], indices[1]
-
-                    # get surface type and collision poly data
+                mesh = meshObj.data
+                mesh.calc_loop_triangles()
+                triCount = len(mesh.loop_triangles)
+                if triCount == 0:
+                    continue
+
+                coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+                mesh.vertices.foreach_get("co", coords)
+                triVerts = np.empty(triCount * 3, dtype=np.int32)
+                mesh.loop_triangles.foreach_get("vertices", triVerts)
+                triNormals = np.empty(triCount * 3, dtype=np.float32)
+                mesh.loop_triangles.foreach_get("normal", triNormals)
+                triMaterials = np.empty(triCount, dtype=np.int32)
+                mesh.loop_triangles.foreach_get("material_index", triMaterials)
+
+                # get surface type and collision poly data of each material
+                surfaceFromMaterial = {}
+                for materialIndex in dict.fromkeys(triMaterials.tolist()):
+                    colProp = meshObj.material_slots[materialIndex].material.ootCollisionProperty
                     useConveyor = colProp.conveyorOption != "None"
                     conveyorSpeed = int(Utility.getPropValue(colProp, "conveyorSpeed"), base=16) if useConveyor else 0
                     shouldKeepMomentum = colProp.conveyorKeepMomentum if useConveyor else False
@@ -172,22 +141,120 @@ class CollisionUtility:
                         colProp.isWallDamage,
                         useMacros,
                     )
+                    surfaceFromMaterial[materialIndex] = (
+                        surfaceType,
+                        colProp.ignoreCameraCollision,
+                        colProp.ignoreActorCollision,
+                        colProp.ignoreProjectileCollision,
+                        useConveyor,
+                    )
 
-                    if surfaceType not in colPolyFromSurfaceType:
-                        colPolyFromSurfaceType[surfaceType] = []
-
-                    colPolyFromSurfaceType[surfaceType].append(
-                        CollisionPoly(
-                            indices,
-                            colProp.ignoreCameraCollision,
-                            colProp.ignoreActorCollision,
-                            colProp.ignoreProjectileCollision,
-                            useConveyor,
-                            normal,
-                            distance,
-                            useMacros,
-                        )
+                # get bounds and vertices data, every vertex is transformed once
+                cornerPoints = transformPositions(transform, coords.reshape(-1, 3))[triVerts]
+                cornerPoints = cornerPoints.reshape(-1, 3, 3)
+                corners = np.rint(cornerPoints.astype(np.float64)).astype(np.int64)
+                CollisionUtility.updateBounds(corners.min(axis=(0, 1)).tolist(), colBounds)
+                CollisionUtility.updateBounds(corners.max(axis=(0, 1)).tolist(), colBounds)
+
+                normals = CollisionUtility.normalizeVectors(
+                    transformPositions(transform.inverted().transposed(), triNormals.reshape(-1, 3))
+                )
+                planePoints = cornerPoints[:, 0].astype(np.float64)
+                normals64 = normals.astype(np.float64)
+                distances = np.rint(
+                    -1
+                    * (
+                        normals64[:, 0] * planePoints[:, 0]
+                        + normals64[:, 1] * planePoints[:, 1]
+                        + normals64[:, 2] * planePoints[:, 2]
+                    )
+                ).astype(np.int64)
+                isInvalidDistance = (distances < -0x8000) | (distances > 0x7FFF)
+                if isInvalidDistance.any():
+                    # raises the same error as for a single triangle
+                    convertIntTo2sComplement(int(distances[isInvalidDistance][0]), 2, True)
+                distances &= 0xFFFF
+
+                edges1 = corners[:, 1] - corners[:, 0]
+                edges2 = corners[:, 2] - corners[:, 1]
+                nx = edges1[:, 1] * edges2[:, 2] - edges1[:, 2] * edges2[:, 1]
+                ny = edges1[:, 2] * edges2[:, 0] - edges1[:, 0] * edges2[:, 2]
+                nz = edges1[:, 0] * edges2[:, 1] - edges1[:, 1] * edges2[:, 0]
+                isDegenerate = (nx == 0) & (ny == 0) & (nz == 0)
+                for _ in range(np.count_nonzero(isDegenerate)):
+                    print("INFO: Ignore denormalized triangle.")
+                isValid = ~isDegenerate
+                corners, normals, distances = corners[isValid], normals[isValid], distances[isValid]
+
+                # We need to ensure two things about the order in which the vertex indices are:
+                #
+                # 1) The vertex with the minimum y coordinate should be first.
+                # This prevents a bug due to an optimization in OoT's CollisionPoly_GetMinY.
+                # https://github.com/zeldaret/oot/blob/873c55faad48a67f7544be713cc115e2b858a4e8/src/code/z_bgcheck.c#L202
+                #
+                # 2) The vertices should wrap around the polygon normal **counter-clockwise**.
+                # This is needed for OoT's dynapoly, which is collision that can move.
+                # When it moves, the vertex coordinates and normals are recomputed.
+                # The normal is computed based on the vertex coordinates, which makes the order of vertices matter.
+                # https://github.com/zeldaret/oot/blob/873c55faad48a67f7544be713cc115e2b858a4e8/src/code/z_bgcheck.c#L2976
+
+                # Address 1): sort by ascending y coordinate
+                order = np.argsort(corners[:, :, 1], axis=1, kind="stable")
+
+                # Address 2):
+                # swap order[1] and order[2],
+                # if the normal computed from the vertices in the current order is the wrong way.
+                # (single precision like the mathutils vectors this used to be computed with)
+                sortedCorners = np.take_along_axis(corners, order[:, :, None], axis=1).astype(np.float32)
+                edges1 = sortedCorners[:, 1] - sortedCorners[:, 0]
+                edges2 = sortedCorners[:, 2] - sortedCorners[:, 0]
+                cross = np.column_stack(
+                    (
+                        edges1[:, 1] * edges2[:, 2] - edges1[:, 2] * edges2[:, 1],
+                        edges1[:, 2] * edges2[:, 0] - edges1[:, 0] * edges2[:, 2],
+                        edges1[:, 0] * edges2[:, 1] - edges1[:, 1] * edges2[:, 0],
+                    )
+                )
+                dots = (cross * normals).astype(np.float64)
+                isWrongWay = (dots[:, 2] + dots[:, 1] + dots[:, 0]) < 0
+                order[isWrongWay] = order[isWrongWay][:, [0, 2, 1]]
+
+                polyCorners.append(corners)
+                polyOrders.append(order)
+                polyNormals.append(normals)
+                polyDistances.append(distances)
+                polySurfaces.extend(surfaceFromMaterial[index] for index in triMaterials[isValid].tolist())
+
+        if len(polySurfaces) > 0:
+            # weld vertices with the same rounded position, in order of first use
+            positions = np.concatenate(polyCorners).reshape(-1, 3)
+            firstIndices, vertexIndices = getUniqueRows(positions)
+            vertexList.extend(CollisionVertex(tuple(pos)) for pos in positions[firstIndices].tolist())
+            polyIndices = np.take_along_axis(vertexIndices.reshape(-1, 3), np.concatenate(polyOrders), axis=1)
+
+            for indices, normal, distance, surface in zip(
+                polyIndices.tolist(),
+                np.concatenate(polyNormals).tolist(),
+                np.concatenate(polyDistances).tolist(),
+                polySurfaces,
+            ):
+                surfaceType, ignoreCamera, ignoreActor, ignoreProjectile, useConveyor = surface
+
+                if surfaceType not in colPolyFromSurfaceType:
+                    colPolyFromSurfaceType[surfaceType] = []
+
+                colPolyFromSurfaceType[surfaceType].append(
+                    CollisionPoly(
+                        indices,
+                        ignoreCamera,
+                        ignoreActor,
+                        ignoreProjectile,
+                        useConveyor,
+                        Vector(normal),
+                        distance,
+                        useMacros,
                     )
+                )
 
         count = 0
         for surface, colPolyList in colPolyFromSurfaceType.items():
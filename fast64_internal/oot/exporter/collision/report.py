@@ -0,0 +1,123 @@
+import math
+import numpy as np
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from ....utility import getGridBoxCounts, getPartitionStats, writeJSONFile
+
+if TYPE_CHECKING:
+    from . import CollisionHeader
+
+
+# BgCheck splits the scene collision bounds in a grid of subdivisions,
+# every poly is added to the floor, wall or ceiling list of the subdivisions its bounds touch
+BGCHECK_SUBDIV_DEFAULT = (16, 4, 16)
+BGCHECK_SUBDIV_MIN = 150
+BGCHECK_SUBDIV_OVERLAP = 50
+
+# subdivision lengths tried for the suggestion, the grid size limit keeps the lookup table small (6 bytes per cell)
+SUGGESTION_SUBDIV_LENGTHS = (150, 200, 250, 300, 400, 500, 600, 800, 1000, 1200, 1600, 2000, 3000)
+SUGGESTION_MAX_CELLS = 4096
+# among the grids within this ratio of the best worst-case cell, the smallest one is suggested
+SUGGESTION_TOLERANCE = 1.1
+
+
+@dataclass
+class CollisionReport:
+    """This class defines the statistics of how the game partitions the scene collision"""
+
+    colHeader: "CollisionHeader"
+
+    def getPolyData(self):
+        """Returns the corners and the list name (floors, walls or ceilings) of every collision poly"""
+
+        positions = np.array([vertex.pos for vertex in self.colHeader.vertices.vertexList], dtype=np.int64)
+        polyList = self.colHeader.collisionPoly.polyList
+        indices = np.array([poly.indices for poly in polyList], dtype=np.int64).reshape(-1, 3)
+        normalY = np.array([poly.normal[1] for poly in polyList], dtype=np.float64)
+
+        # same thresholds as when the game adds polys to the lookup lists
+        polyLists = {"floors": normalY > 0.5, "ceilings": normalY < -0.8}
+        polyLists["walls"] = ~(polyLists["floors"] | polyLists["ceilings"])
+        return positions.reshape(-1, 3)[indices], polyLists
+
+    def getSubdivisionLengths(self, amounts: tuple[int, int, int]):
+        """Returns the subdivision length along each axis, like ``BgCheck_SetSubdivisionDimension``"""
+
+        lengths = []
+        for minBound, maxBound, amount in zip(self.colHeader.minBounds, self.colHeader.maxBounds, amounts):
+            lengths.append(max(int((maxBound - minBound) / amount) + 1, BGCHECK_SUBDIV_MIN))
+        return np.array(lengths, dtype=np.int64)
+
+    def getSubdivisionBounds(self, corners: np.ndarray, amounts: tuple[int, int, int]):
+        """
+        Returns the first and last subdivision touched by the bounds of every poly, with the overlap margin.
+        The game also checks each of those subdivisions against the poly itself, so counts are an upper bound.
+        """
+
+        lengths = self.getSubdivisionLengths(amounts)
+        amounts = np.array(amounts, dtype=np.int64)
+        minBounds = np.array(self.colHeader.minBounds, dtype=np.int64)
+
+        lowerOffsets = corners.min(axis=1) - minBounds
+        lower = lowerOffsets // lengths
+        lower -= (lowerOffsets % lengths < BGCHECK_SUBDIV_OVERLAP) & (lower > 0)
+
+        upperOffsets = corners.max(axis=1) - minBounds
+        upper = upperOffsets // lengths
+        upper += (lengths - BGCHECK_SUBDIV_OVERLAP < upperOffsets % lengths) & (upper < amounts - 1)
+
+        return np.clip(lower, 0, amounts - 1), np.clip(upper, 0, amounts - 1)
+
+    def getSubdivisionStats(self, corners: np.ndarray, polyLists: dict[str, np.ndarray], amounts: tuple[int, int, int]):
+        """Returns the statistics of every lookup list for the given amount of subdivisions"""
+
+        lower, upper = self.getSubdivisionBounds(corners, amounts)
+        stats = {"amount": list(amounts), "length": self.getSubdivisionLengths(amounts).tolist()}
+        for listName, isInList in polyLists.items():
+            stats[listName] = getPartitionStats(getGridBoxCounts(lower[isInList], upper[isInList], amounts))
+        stats["max_per_cell"] = max(stats[listName]["max_per_cell"] for listName in polyLists)
+        return stats
+
+    def getSuggestionCandidates(self):
+        """Returns the subdivision amounts to compare, from a range of subdivision lengths"""
+
+        sizes = [maxBound - minBound for minBound, maxBound in zip(self.colHeader.minBounds, self.colHeader.maxBounds)]
+        candidates = {BGCHECK_SUBDIV_DEFAULT: None}
+        for length in SUGGESTION_SUBDIV_LENGTHS:
+            amounts = tuple(max(1, math.ceil(size / length)) for size in sizes)
+            if math.prod(amounts) <= SUGGESTION_MAX_CELLS:
+                candidates[amounts] = None
+        return list(candidates)
+
+    def getJSON(self):
+        """Returns the collision report"""
+
+        corners, polyLists = self.getPolyData()
+        candidates = [
+            self.getSubdivisionStats(corners, polyLists, amounts) for amounts in self.getSuggestionCandidates()
+        ]
+        bestMaxPerCell = min(stats["max_per_cell"] for stats in candidates)
+        suggestion = min(
+            (stats for stats in candidates if stats["max_per_cell"] <= bestMaxPerCell * SUGGESTION_TOLERANCE),
+            key=lambda stats: (math.prod(stats["amount"]), stats["max_per_cell"]),
+        )
+
+        return {
+            "name": self.colHeader.name,
+            "bounds": {"min": list(self.colHeader.minBounds), "max": list(self.colHeader.maxBounds)},
+            "vertices": len(self.colHeader.vertices.vertexList),
+            "polygons": len(corners),
+            "default_subdivisions": candidates[0],
+            "suggested_subdivisions": suggestion,
+            "candidates": [
+                {key: stats[key] for key in ("amount", "length", "max_per_cell")}
+                | {"entries": sum(stats[listName]["entries"] for listName in polyLists)}
+                for stats in candidates
+            ],
+        }
+
+    def write(self, path: str):
+        """Writes the collision report as JSON"""
+
+        writeJSONFile(path, self.getJSON())
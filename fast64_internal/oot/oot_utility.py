@@ -295,6 +295,9 @@ class ExportInfo:
     hackerootBootOption: "OOTBootupSceneOptions"
     """ Options for setting the bootup scene in HackerOoT."""
 
+    writeCollisionReport: bool = False
+    """ Whether to write a JSON report of how the game partitions the scene collision, next to the scene files."""
+
 
 @dataclass
 class RemoveInfo:
@@ -180,6 +180,7 @@ class OOT_ExportScene(Operator):
                 settings.singleFile,
                 context.scene.fast64.oot.useDecompFeatures if not hackerFeaturesEnabled else hackerFeaturesEnabled,
                 bootOptions if hackerFeaturesEnabled else None,
+                settings.writeCollisionReport,
             )
 
             SceneExport.export(
@@ -488,6 +488,11 @@ class OOTExportSceneSettingsProperty(PropertyGroup):
         description="Does not split the scene and rooms into multiple files.",
     )
     option: EnumProperty(items=ootEnumSceneID, default="SCENE_DEKU_TREE")
+    writeCollisionReport: BoolProperty(
+        name="Write Collision Report",
+        default=False,
+        description="Writes a JSON report of the polys in every collision subdivision, with suggested subdivisions.",
+    )
 
     # keeping this on purpose, will be removed once old code is cleaned-up
     useNewExporter: BoolProperty(name="Use New Exporter", default=True)
@@ -506,6 +511,7 @@ class OOTExportSceneSettingsProperty(PropertyGroup):
 
         layout.prop(self, "singleFile")
         layout.prop(self, "customExport")
+        layout.prop(self, "writeCollisionReport")
         # layout.prop(self, "useNewExporter")
 
 
@@ -6,6 +6,7 @@ from ..oot_utility import checkForStartBone, getStartBone, getNextBone, ootStrip
 from ...utility import (
     PluginError,
     VertexWeightError,
+    getCSymbolTable,
     getDeclaration,
     writeFile,
     readFile,
@@ -19,11 +20,11 @@ from ...utility import (
 
 def ootGetSkeleton(skeletonData, skeletonName, continueOnError):
     # TODO: Does this handle non flex skeleton?
-    matchResult = re.search(
+    matchResult = getCSymbolTable(skeletonData).search(
+        skeletonName,
         "(Flex)?SkeletonHeader\s*"
         + re.escape(skeletonName)
         + "\s*=\s*\{\s*\{?\s*([^,\s]*)\s*,\s*([^,\s\}]*)\s*\}?\s*(,\s*([^,\s]*))?\s*\}\s*;\s*",
-        skeletonData,
     )
     if matchResult is None:
         if continueOnError:
@@ -34,9 +35,9 @@ def ootGetSkeleton(skeletonData, skeletonName, continueOnError):
 
 
 def ootGetLimbs(skeletonData, limbsName, continueOnError):
-    matchResult = re.search(
+    matchResult = getCSymbolTable(skeletonData).search(
+        limbsName,
         "(static\s*)?void\s*\*\s*" + re.escape(limbsName) + "\s*\[\s*[0-9]*\s*\]\s*=\s*\{([^\}]*)\}\s*;\s*",
-        skeletonData,
         re.DOTALL,
     )
     if matchResult is None:
@@ -48,7 +49,8 @@ def ootGetLimbs(skeletonData, limbsName, continueOnError):
 
 
 def ootGetLimb(skeletonData, limbName, continueOnError):
-    matchResult = re.search("([A-Za-z0-9\_]*)Limb\s*" + re.escape(limbName), skeletonData)
+    symbolTable = getCSymbolTable(skeletonData)
+    matchResult = symbolTable.search(limbName, "([A-Za-z0-9\_]*)Limb\s*" + re.escape(limbName))
 
     if matchResult is None:
         if continueOnError:
@@ -62,13 +64,13 @@ def ootGetLimb(skeletonData, limbName, continueOnError):
     else:
         dlRegex = "([^,\s]*)"
 
-    matchResult = re.search(
+    matchResult = symbolTable.search(
+        limbName,
         "[A-Za-z0-9\_]*Limb\s*"
         + re.escape(limbName)
         + "\s*=\s*\{\s*\{\s*([^,\s]*)\s*,\s*([^,\s]*)\s*,\s*([^,\s]*)\s*\},\s*([^,]*)\s*,\s*([^,]*)\s*,\s*"
         + dlRegex
         + "\s*\}\s*;\s*",
-        skeletonData,
         re.DOTALL,
     )
 
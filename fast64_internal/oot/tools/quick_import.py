@@ -141,6 +141,7 @@ def quick_import_exec(context: bpy.types.Context, sym_name: str):
         settings: OOTAnimImportSettingsProperty = context.scene.fast64.oot.animImportSettings
         settings.isCustom = False
         settings.isLink = False
+        settings.importAll = False
         settings.animName = sym_name
         settings.folderName = folder_name
         bpy.ops.object.oot_import_anim()
@@ -80,6 +80,11 @@ class SM64_Properties(PropertyGroup):
         name="Matstack Fix",
         description="Exports account for matstack fix requirements",
     )
+    write_collision_report: BoolProperty(
+        name="Write Collision Report",
+        description="Writes collision_report.json next to exported collision, with the triangle count of every "
+        "surface partition cell, the fullest cells and the surfaces that are added to many cells",
+    )
 
     @property
     def binary_export(self):
@@ -157,6 +162,7 @@ class SM64_Properties(PropertyGroup):
                 prop_split(col, self, "refresh_version", "Refresh (Function Map)")
                 col.prop(self, "force_extended_ram")
                 col.prop(self, "matstack_fix")
+                col.prop(self, "write_collision_report")
         col.separator()
 
         col.prop(self, "show_importing_menus")
@@ -1,4 +1,5 @@
 import bpy, os, copy, shutil, mathutils, math
+import numpy as np
 from bpy.utils import register_class, unregister_class
 from ..panels import SM64_Panel
 from .sm64_level_parser import parseLevelAtPointer
@@ -22,6 +23,11 @@ from ..utility import (
     saveTranslationFrame,
     saveQuaternionFrame,
     removeTrailingFrames,
+    ActionSampler,
+    getEulerFrameValues,
+    getTranslationFrameValues,
+    saveFrameValues,
+    setKeyframes,
     applyRotation,
     getPathAndLevel,
     applyBasicTweaks,
@@ -445,34 +451,55 @@ def convertAnimationData(anim, armatureObj, *, frame_start, frame_count):
         [ValueFrameData(i, 0, []), ValueFrameData(i, 1, []), ValueFrameData(i, 2, [])] for i in range(len(animBones))
     ]
 
-    currentFrame = bpy.context.scene.frame_current
-    for frame in range(frame_start, frame_start + frame_count):
-        bpy.context.scene.frame_set(frame)
+    sampler = ActionSampler(armatureObj, anim, frame_start, frame_count)
+    if sampler.canSample(animBones):
+        # sample the action for all frames at once, instead of evaluating the whole scene on each frame
         rootPoseBone = armatureObj.pose.bones[animBones[0]]
+        translations = (
+            sampler.getBasisMatrices(rootPoseBone)[:, :3, 3] * bpy.context.scene.fast64.sm64.blender_to_sm64_scale
+        )
+        saveFrameValues(translationData, getTranslationFrameValues(translations))
 
-        translation = (
-            mathutils.Matrix.Scale(bpy.context.scene.fast64.sm64.blender_to_sm64_scale, 4) @ rootPoseBone.matrix_basis
-        ).decompose()[0]
-        saveTranslationFrame(translationData, translation)
-
-        for boneIndex in range(len(animBones)):
-            boneName = animBones[boneIndex]
+        for boneIndex, boneName in enumerate(animBones):
             currentBone = armatureObj.data.bones[boneName]
-            currentPoseBone = armatureObj.pose.bones[boneName]
 
-            rotationValue = (currentBone.matrix.to_4x4().inverted() @ currentPoseBone.matrix).to_quaternion()
+            # rest pose local, compared to current pose local
+            poseMatrices = sampler.getPoseMatrices(boneName)
             if currentBone.parent is not None:
-                rotationValue = (
-                    currentBone.matrix.to_4x4().inverted()
-                    @ currentPoseBone.parent.matrix.inverted()
-                    @ currentPoseBone.matrix
-                ).to_quaternion()
+                poseMatrices = np.linalg.inv(sampler.getPoseMatrices(currentBone.parent.name)) @ poseMatrices
+            rotations = np.linalg.inv(np.array(currentBone.matrix)) @ poseMatrices[:, :3, :3]
+            saveFrameValues(armatureFrameData[boneIndex], getEulerFrameValues(rotations))
+    else:
+        currentFrame = bpy.context.scene.frame_current
+        for frame in range(frame_start, frame_start + frame_count):
+            bpy.context.scene.frame_set(frame)
+            rootPoseBone = armatureObj.pose.bones[animBones[0]]
+
+            translation = (
+                mathutils.Matrix.Scale(bpy.context.scene.fast64.sm64.blender_to_sm64_scale, 4)
+                @ rootPoseBone.matrix_basis
+            ).decompose()[0]
+            saveTranslationFrame(translationData, translation)
+
+            for boneIndex in range(len(animBones)):
+                boneName = animBones[boneIndex]
+                currentBone = armatureObj.data.bones[boneName]
+                currentPoseBone = armatureObj.pose.bones[boneName]
+
+                rotationValue = (currentBone.matrix.to_4x4().inverted() @ currentPoseBone.matrix).to_quaternion()
+                if currentBone.parent is not None:
+                    rotationValue = (
+                        currentBone.matrix.to_4x4().inverted()
+                        @ currentPoseBone.parent.matrix.inverted()
+                        @ currentPoseBone.matrix
+                    ).to_quaternion()
+
+                    # rest pose local, compared to current pose local
 
-                # rest pose local, compared to current pose local
+                saveQuaternionFrame(armatureFrameData[boneIndex], rotationValue)
 
-            saveQuaternionFrame(armatureFrameData[boneIndex], rotationValue)
+        bpy.context.scene.frame_set(currentFrame)
 
-    bpy.context.scene.frame_set(currentFrame)
     removeTrailingFrames(translationData)
     for frameData in armatureFrameData:
         removeTrailingFrames(frameData)
@@ -527,8 +554,7 @@ def importAnimationToBlender(romfile, startAddress, armatureObj, segmentData, is
                     index=propertyIndex,
                     action_group=startBoneName,
                 )
-                for frame in range(len(boneFrameData[propertyIndex])):
-                    fcurve.keyframe_points.insert(frame, boneFrameData[propertyIndex][frame])
+                setKeyframes(fcurve, boneFrameData[propertyIndex])
             isRootTranslation = False
         else:
             bone, boneStack = getNextBone(boneStack, armatureObj)
@@ -538,8 +564,7 @@ def importAnimationToBlender(romfile, startAddress, armatureObj, segmentData, is
                     index=propertyIndex,
                     action_group=bone.name,
                 )
-                for frame in range(len(boneFrameData[propertyIndex])):
-                    fcurve.keyframe_points.insert(frame, boneFrameData[propertyIndex][frame])
+                setKeyframes(fcurve, boneFrameData[propertyIndex])
 
     if armatureObj.animation_data is None:
         armatureObj.animation_data_create()
@@ -567,15 +592,9 @@ def readAnimation(name, romfile, startAddress, segmentData, isDMA):
     # handle root translation
     boneFrameData = [[], [], []]
     rootIndexNode = animationHeader.transformIndices[0]
-    boneFrameData[0] = [
-        n for n in getKeyFramesTranslation(romfile, animationHeader.transformValuesStart, rootIndexNode.x)
-    ]
-    boneFrameData[1] = [
-        n for n in getKeyFramesTranslation(romfile, animationHeader.transformValuesStart, rootIndexNode.y)
-    ]
-    boneFrameData[2] = [
-        n for n in getKeyFramesTranslation(romfile, animationHeader.transformValuesStart, rootIndexNode.z)
-    ]
+    boneFrameData[0] = getKeyFramesTranslation(romfile, animationHeader.transformValuesStart, rootIndexNode.x)
+    boneFrameData[1] = getKeyFramesTranslation(romfile, animationHeader.transformValuesStart, rootIndexNode.y)
+    boneFrameData[2] = getKeyFramesTranslation(romfile, animationHeader.transformValuesStart, rootIndexNode.z)
     armatureFrameData.append(boneFrameData)
 
     # handle rotations
@@ -583,46 +602,29 @@ def readAnimation(name, romfile, startAddress, segmentData, isDMA):
         boneFrameData = [[], [], []]
 
         # Transforming SM64 space to Blender space
-        boneFrameData[0] = [
-            n for n in getKeyFramesRotation(romfile, animationHeader.transformValuesStart, boneIndexNode.x)
-        ]
-        boneFrameData[1] = [
-            n for n in getKeyFramesRotation(romfile, animationHeader.transformValuesStart, boneIndexNode.y)
-        ]
-        boneFrameData[2] = [
-            n for n in getKeyFramesRotation(romfile, animationHeader.transformValuesStart, boneIndexNode.z)
-        ]
+        boneFrameData[0] = getKeyFramesRotation(romfile, animationHeader.transformValuesStart, boneIndexNode.x)
+        boneFrameData[1] = getKeyFramesRotation(romfile, animationHeader.transformValuesStart, boneIndexNode.y)
+        boneFrameData[2] = getKeyFramesRotation(romfile, animationHeader.transformValuesStart, boneIndexNode.z)
 
         armatureFrameData.append(boneFrameData)
 
     return (animationHeader, armatureFrameData)
 
 
-def getKeyFramesRotation(romfile, transformValuesStart, boneIndex):
-    ptrToValue = transformValuesStart + boneIndex.startOffset
-    romfile.seek(ptrToValue)
+def readKeyFrameValues(romfile, transformValuesStart, boneIndex, dtype):
+    romfile.seek(transformValuesStart + boneIndex.startOffset)
+    # values past the end of the file are read as 0
+    return np.frombuffer(romfile.read(boneIndex.numFrames * 2).ljust(boneIndex.numFrames * 2, b"\0"), dtype=dtype)
 
-    keyframes = []
-    for frame in range(boneIndex.numFrames):
-        romfile.seek(ptrToValue + frame * 2)
-        value = int.from_bytes(romfile.read(2), "big") * 360 / (2**16)
-        keyframes.append(math.radians(value))
 
-    return keyframes
+def getKeyFramesRotation(romfile, transformValuesStart, boneIndex):
+    values = readKeyFrameValues(romfile, transformValuesStart, boneIndex, ">u2")
+    return np.radians(values.astype(np.float64) * 360 / (2**16))
 
 
 def getKeyFramesTranslation(romfile, transformValuesStart, boneIndex):
-    ptrToValue = transformValuesStart + boneIndex.startOffset
-    romfile.seek(ptrToValue)
-
-    keyframes = []
-    for frame in range(boneIndex.numFrames):
-        romfile.seek(ptrToValue + frame * 2)
-        keyframes.append(
-            int.from_bytes(romfile.read(2), "big", signed=True) / bpy.context.scene.fast64.sm64.blender_to_sm64_scale
-        )
-
-    return keyframes
+    values = readKeyFrameValues(romfile, transformValuesStart, boneIndex, ">i2")
+    return values / bpy.context.scene.fast64.sm64.blender_to_sm64_scale
 
 
 def readAnimHeader(name, romfile, startAddress, segmentData, isDMA):
@@ -1,4 +1,5 @@
-import bpy, shutil, os, math, mathutils
+import bpy, shutil, os, math, mathutils, struct
+import numpy as np
 from bpy.utils import register_class, unregister_class
 from io import BytesIO
 from .sm64_constants import (
@@ -39,6 +40,11 @@ from ..utility import (
     makeWriteInfoBox,
     writeBoxExportType,
     enumExportHeaderType,
+    transformPositions,
+    getUniqueRows,
+    getGridBoxCounts,
+    getPartitionStats,
+    writeJSONFile,
 )
 
 
@@ -46,12 +52,17 @@ class CollisionVertex:
     def __init__(self, position):
         self.position = position
 
-    def to_binary(self):
-        data = bytearray(0)
+    def size(self):
+        return 6
+
+    def pack_into(self, data, offset):
         if len(self.position) > 3:
-            raise PluginError("Vertex position should not be " + str(len(self.position) + " fields long."))
-        for field in self.position:
-            data.extend(int(round(field)).to_bytes(2, "big", signed=True))
+            raise PluginError("Vertex position should not be " + str(len(self.position)) + " fields long.")
+        struct.pack_into(">3h", data, offset, *(int(round(field)) for field in self.position))
+
+    def to_binary(self):
+        data = bytearray(self.size())
+        self.pack_into(data, 0)
         return data
 
     def to_c(self):
@@ -72,14 +83,19 @@ class CollisionTriangle:
         self.specialParam = specialParam
         self.room = room
 
-    def to_binary(self):
-        data = bytearray(0)
+    def size(self):
+        return 6 if self.specialParam is None else 8
+
+    def pack_into(self, data, offset):
         if len(self.indices) > 3:
-            raise PluginError("Triangle indices should not be " + str(len(self.indices) + " fields long."))
-        for index in self.indices:
-            data.extend(int(round(index)).to_bytes(2, "big", signed=False))
+            raise PluginError("Triangle indices should not be " + str(len(self.indices)) + " fields long.")
+        struct.pack_into(">3H", data, offset, *(int(round(index)) for index in self.indices))
         if self.specialParam is not None:
-            data.extend(int(self.specialParam, 16).to_bytes(2, "big", signed=False))
+            struct.pack_into(">H", data, offset + 6, int(self.specialParam, 16))
+
+    def to_binary(self):
+        data = bytearray(self.size())
+        self.pack_into(data, 0)
         return data
 
     def to_c(self):
@@ -120,84 +136,108 @@ class Collision:
     def set_addr(self, startAddress):
         startAddress = get64bitAlignedAddr(startAddress)
         self.startAddress = startAddress
-        print("Collision " + self.name + ": " + str(startAddress) + ", " + str(self.size()))
-        return startAddress, startAddress + self.size()
+        size = self.size()
+        print("Collision " + self.name + ": " + str(startAddress) + ", " + str(size))
+        return startAddress, startAddress + size
 
     def save_binary(self, romfile):
         romfile.seek(self.startAddress)
         romfile.write(self.to_binary())
 
     def size(self):
-        return len(self.to_binary())
+        # COL_INIT, COL_VERTEX_INIT, COL_TRI_STOP and COL_END
+        size = 8 + 6 * len(self.vertices)
+        for triangles in self.triangles.values():
+            size += 4 + sum(triangle.size() for triangle in triangles)
+        if len(self.specials) > 0:
+            size += 4 + sum(special.size() for special in self.specials)
+        if len(self.water_boxes) > 0:
+            size += 4 + sum(waterBox.size() for waterBox in self.water_boxes)
+        return size
 
-    def to_c(self):
-        data = CData()
-        data.header = "extern const Collision " + self.name + "[];\n"
-        data.source = "const Collision " + self.name + "[] = {\n"
-        data.source += "\tCOL_INIT(),\n"
-        data.source += "\tCOL_VERTEX_INIT(" + str(len(self.vertices)) + "),\n"
+    def to_c_lines(self):
+        yield "const Collision " + self.name + "[] = {\n"
+        yield "\tCOL_INIT(),\n"
+        yield "\tCOL_VERTEX_INIT(" + str(len(self.vertices)) + "),\n"
         for vertex in self.vertices:
-            data.source += "\t" + vertex.to_c()
+            yield "\t" + vertex.to_c()
         for collisionType, triangles in self.triangles.items():
-            data.source += "\tCOL_TRI_INIT(" + collisionType + ", " + str(len(triangles)) + "),\n"
+            yield "\tCOL_TRI_INIT(" + collisionType + ", " + str(len(triangles)) + "),\n"
             for triangle in triangles:
-                data.source += "\t" + triangle.to_c()
-        data.source += "\tCOL_TRI_STOP(),\n"
+                yield "\t" + triangle.to_c()
+        yield "\tCOL_TRI_STOP(),\n"
         if len(self.specials) > 0:
-            data.source += "\tCOL_SPECIAL_INIT(" + str(len(self.specials)) + "),\n"
+            yield "\tCOL_SPECIAL_INIT(" + str(len(self.specials)) + "),\n"
             for special in self.specials:
-                data.source += "\t" + special.to_c()
+                yield "\t" + special.to_c()
         if len(self.water_boxes) > 0:
-            data.source += "\tCOL_WATER_BOX_INIT(" + str(len(self.water_boxes)) + "),\n"
+            yield "\tCOL_WATER_BOX_INIT(" + str(len(self.water_boxes)) + "),\n"
             for waterBox in self.water_boxes:
-                data.source += "\t" + waterBox.to_c()
-        data.source += "\tCOL_END()\n" + "};\n"
+                yield "\t" + waterBox.to_c()
+        yield "\tCOL_END()\n" + "};\n"
+
+    def to_c(self):
+        data = CData()
+        data.header = "extern const Collision " + self.name + "[];\n"
+        data.extend_source(self.to_c_lines())
         return data
 
     def rooms_name(self):
         return self.name + "_rooms"
 
-    def to_c_rooms(self):
-        data = CData()
-        data.header = "extern const u8 " + self.rooms_name() + "[];\n"
-        data.source = "const u8 " + self.rooms_name() + "[] = {\n\t"
+    def to_c_rooms_lines(self):
+        yield "const u8 " + self.rooms_name() + "[] = {\n\t"
         newlineCount = 0
         for (
             collisionType,
             triangles,
         ) in self.triangles.items():
             for triangle in triangles:
-                data.source += str(triangle.room) + ", "
+                yield str(triangle.room) + ", "
                 newlineCount += 1
                 if newlineCount >= 8:
                     newlineCount = 0
-                    data.source += "\n\t"
-        data.source += "\n};\n"
+                    yield "\n\t"
+        yield "\n};\n"
+
+    def to_c_rooms(self):
+        data = CData()
+        data.header = "extern const u8 " + self.rooms_name() + "[];\n"
+        data.extend_source(self.to_c_rooms_lines())
         return data
 
     def to_binary(self):
         colTypeDef = CollisionTypeDefinition()
-        data = bytearray([0x00, 0x40])
-        data += len(self.vertices).to_bytes(2, "big")
+        data = bytearray(self.size())
+        view = memoryview(data)
+        struct.pack_into(">2H", data, 0, 0x40, len(self.vertices))
+        offset = 4
         for vertex in self.vertices:
-            data += vertex.to_binary()
+            vertex.pack_into(data, offset)
+            offset += 6
         for collisionType, triangles in self.triangles.items():
-            data += getattr(colTypeDef, collisionType).to_bytes(2, "big")
-            data += len(triangles).to_bytes(2, "big")
+            struct.pack_into(">2H", data, offset, getattr(colTypeDef, collisionType), len(triangles))
+            offset += 4
             for triangle in triangles:
-                data += triangle.to_binary()
-        data += bytearray([0x00, 0x41])
+                triangle.pack_into(data, offset)
+                offset += triangle.size()
+        struct.pack_into(">H", data, offset, 0x41)
+        offset += 2
         if len(self.specials) > 0:
-            data += bytearray([0x00, 0x43])
-            data += len(self.specials).to_bytes(2, "big")
+            struct.pack_into(">2H", data, offset, 0x43, len(self.specials))
+            offset += 4
             for special in self.specials:
-                data += special.to_binary()
+                specialSize = special.size()
+                view[offset : offset + specialSize] = special.to_binary()
+                offset += specialSize
         if len(self.water_boxes) > 0:
-            data += bytearray([0x00, 0x44])
-            data += len(self.water_boxes).to_bytes(2, "big")
+            struct.pack_into(">2H", data, offset, 0x44, len(self.water_boxes))
+            offset += 4
             for waterBox in self.water_boxes:
-                data += waterBox.to_binary()
-        data += bytearray([0x00, 0x42])
+                waterBoxSize = waterBox.size()
+                view[offset : offset + waterBoxSize] = waterBox.to_binary()
+                offset += waterBoxSize
+        struct.pack_into(">H", data, offset, 0x42)
         return data
 
 
@@ -314,7 +354,7 @@ def exportCollisionC(
     fileObj = open(colPath, "w", newline="\n")
     collision = exportCollisionCommon(obj, transformMatrix, includeSpecials, includeChildren, name, None)
     collisionC = collision.to_c()
-    fileObj.write(collisionC.source)
+    collisionC.write_source(fileObj)
     fileObj.close()
 
     cDefine = collisionC.header
@@ -323,9 +363,12 @@ def exportCollisionC(
         cDefine += roomsData.header
         roomsPath = os.path.join(colDirPath, "rooms.inc.c")
         roomsFile = open(roomsPath, "w", newline="\n")
-        roomsFile.write(roomsData.source)
+        roomsData.write_source(roomsFile)
         roomsFile.close()
 
+    if bpy.context.scene.fast64.sm64.write_collision_report:
+        writeJSONFile(os.path.join(colDirPath, "collision_report.json"), getCollisionReport(collision))
+
     headerPath = os.path.join(colDirPath, "collision_header.h")
     cDefFile = open(headerPath, "w", newline="\n")
     cDefFile.write(cDefine)
@@ -383,7 +426,7 @@ def exportCollisionCommon(obj, transformMatrix, includeSpecials, includeChildren
     bpy.ops.object.select_all(action="DESELECT")
     obj.select_set(True)
 
-    # dict of collisionType : faces
+    # dict of collisionType : list of (rounded triangle corners, special params, room) for each mesh
     collisionDict = {}
     # addCollisionTriangles(obj, collisionDict, includeChildren, transformMatrix, areaIndex)
     tempObj, allObjs = duplicateHierarchy(obj, None, True, areaIndex)
@@ -401,18 +444,22 @@ def exportCollisionCommon(obj, transformMatrix, includeSpecials, includeChildren
         raise Exception(str(e))
 
     collision = Collision(toAlnum(name) + "_collision")
+    # weld vertices with the same rounded position, in order of first use by the triangles of each collision type
+    faceCorners = [faceVerts for faces in collisionDict.values() for faceVerts, _, _ in faces]
+    # np.concatenate needs at least one array, no triangles is an empty collision
+    corners = np.concatenate(faceCorners) if faceCorners else np.empty((0, 3, 3), dtype=np.int64)
+    firstIndices, indices = getUniqueRows(corners.reshape(-1, 3))
+    collision.vertices = [
+        CollisionVertex(tuple(position)) for position in corners.reshape(-1, 3)[firstIndices].tolist()
+    ]
+    indices = indices.reshape(-1, 3).tolist()
+    faceIndex = 0
     for collisionType, faces in collisionDict.items():
         collision.triangles[collisionType] = []
-        for faceVerts, specialParam, room in faces:
-            indices = []
-            for roundedPosition in faceVerts:
-                index = collisionVertIndex(roundedPosition, collision.vertices)
-                if index is None:
-                    collision.vertices.append(CollisionVertex(roundedPosition))
-                    indices.append(len(collision.vertices) - 1)
-                else:
-                    indices.append(index)
-            collision.triangles[collisionType].append(CollisionTriangle(indices, specialParam, room))
+        for faceVerts, specialParams, room in faces:
+            for specialParam in specialParams:
+                collision.triangles[collisionType].append(CollisionTriangle(indices[faceIndex], specialParam, room))
+                faceIndex += 1
     if includeSpecials:
         area = SM64_Area(areaIndex, "", "", "", None, None, [], name, None)
         # This assumes that only levels will export with included specials,
@@ -428,30 +475,54 @@ def addCollisionTriangles(obj, collisionDict, includeChildren, transformMatrix,
     if obj.type == "MESH" and not obj.ignore_collision:
         if len(obj.data.materials) == 0:
             raise PluginError(obj.name + " must have a material associated with it.")
-        obj.data.calc_loop_triangles()
-        for face in obj.data.loop_triangles:
-            material = obj.material_slots[face.material_index].material
+        mesh = obj.data
+        mesh.calc_loop_triangles()
+        triCount = len(mesh.loop_triangles)
+
+        positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", positions)
+        triVerts = np.empty(triCount * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("vertices", triVerts)
+        triMaterials = np.empty(triCount, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("material_index", triMaterials)
+
+        # collision type and special param of every material used
+        colTypeIndices = {}
+        materialColTypes = np.zeros(len(obj.material_slots), dtype=np.int32)
+        materialParams = {}
+        for materialIndex in dict.fromkeys(triMaterials.tolist()):
+            material = obj.material_slots[materialIndex].material
             colType = material.collision_type if material.collision_all_options else material.collision_type_simple
             if colType == "Custom":
                 colType = material.collision_custom
-            specialParam = material.collision_param if material.use_collision_param else None
-
-            (x1, y1, z1) = roundPosition(transformMatrix @ obj.data.vertices[face.vertices[0]].co)
-            (x2, y2, z2) = roundPosition(transformMatrix @ obj.data.vertices[face.vertices[1]].co)
-            (x3, y3, z3) = roundPosition(transformMatrix @ obj.data.vertices[face.vertices[2]].co)
-
-            nx = (y2 - y1) * (z3 - z2) - (z2 - z1) * (y3 - y2)
-            ny = (z2 - z1) * (x3 - x2) - (x2 - x1) * (z3 - z2)
-            nz = (x2 - x1) * (y3 - y2) - (y2 - y1) * (x3 - x2)
-            magSqr = nx * nx + ny * ny + nz * nz
-
-            if magSqr <= 0:
-                print("Ignore denormalized triangle.")
-                continue
-
+            materialColTypes[materialIndex] = colTypeIndices.setdefault(colType, len(colTypeIndices))
+            materialParams[materialIndex] = material.collision_param if material.use_collision_param else None
+
+        # every vertex is transformed once, then each triangle gets its 3 rounded corners
+        corners = transformPositions(transformMatrix, positions.reshape(-1, 3))[triVerts].astype(np.float64)
+        corners = np.rint(corners).astype(np.int64).reshape(-1, 3, 3)
+
+        edges1 = corners[:, 1] - corners[:, 0]
+        edges2 = corners[:, 2] - corners[:, 1]
+        nx = edges1[:, 1] * edges2[:, 2] - edges1[:, 2] * edges2[:, 1]
+        ny = edges1[:, 2] * edges2[:, 0] - edges1[:, 0] * edges2[:, 2]
+        nz = edges1[:, 0] * edges2[:, 1] - edges1[:, 1] * edges2[:, 0]
+        isDegenerate = (nx == 0) & (ny == 0) & (nz == 0)
+        for _ in range(np.count_nonzero(isDegenerate)):
+            print("Ignore denormalized triangle.")
+        corners, triMaterials = corners[~isDegenerate], triMaterials[~isDegenerate]
+
+        # group triangles by collision type, in order of first use
+        faceColTypes = materialColTypes[triMaterials]
+        colTypes = list(colTypeIndices)
+        usedColTypeIndices, firstFaces = np.unique(faceColTypes, return_index=True)
+        for colTypeIndex in usedColTypeIndices[np.argsort(firstFaces)].tolist():
+            colType = colTypes[colTypeIndex]
+            isColType = faceColTypes == colTypeIndex
             if colType not in collisionDict:
                 collisionDict[colType] = []
-            collisionDict[colType].append((((x1, y1, z1), (x2, y2, z2), (x3, y3, z3)), specialParam, obj.room_num))
+            specialParams = [materialParams[materialIndex] for materialIndex in triMaterials[isColType].tolist()]
+            collisionDict[colType].append((corners[isColType], specialParams, obj.room_num))
 
     if includeChildren:
         for child in obj.children:
@@ -460,16 +531,83 @@ def addCollisionTriangles(obj, collisionDict, includeChildren, transformMatrix,
             )
 
 
-def roundPosition(position):
-    return (int(round(position[0])), int(round(position[1])), int(round(position[2])))
-
+# Static surface partition of the game (surface_load.c): the level boundaries are split in square cells along x and z,
+# and every surface is added to the floor, ceiling or wall list of each cell its bounds touch, with a 50 units margin.
+LEVEL_BOUNDARY_MAX = 0x2000
+CELL_SIZE = 0x400
+NUM_CELLS = 2 * LEVEL_BOUNDARY_MAX // CELL_SIZE
+
+# surfaces added to more cells than this are listed in the collision report
+REPORT_MAX_CELLS_PER_SURFACE = 4
+REPORT_MAX_LISTED_SURFACES = 50
+
+
+def getCellIndices(coords, isUpper):
+    # same as lower_cell_index / upper_cell_index, coordinates are s16
+    coords = ((np.asarray(coords, dtype=np.int64) + LEVEL_BOUNDARY_MAX + 0x8000) & 0xFFFF) - 0x8000
+    coords = np.maximum(coords, 0)
+    indices = coords // CELL_SIZE
+    if isUpper:
+        return np.minimum(indices + (coords % CELL_SIZE > CELL_SIZE - 50), NUM_CELLS - 1)
+    return np.maximum(indices - (coords % CELL_SIZE < 50), 0)
+
+
+def getCollisionReport(collision: Collision):
+    positions = np.array([vertex.position for vertex in collision.vertices], dtype=np.int64).reshape(-1, 3)
+    triangles = [(colType, triangle) for colType, triangles in collision.triangles.items() for triangle in triangles]
+    corners = positions[np.array([triangle.indices for _, triangle in triangles], dtype=np.int64).reshape(-1, 3)]
+
+    # surfaces are sorted in lists by their normal like in read_surface_data, too small ones are skipped
+    edges1 = corners[:, 1] - corners[:, 0]
+    edges2 = corners[:, 2] - corners[:, 1]
+    nx = edges1[:, 1] * edges2[:, 2] - edges1[:, 2] * edges2[:, 1]
+    ny = edges1[:, 2] * edges2[:, 0] - edges1[:, 0] * edges2[:, 2]
+    nz = edges1[:, 0] * edges2[:, 1] - edges1[:, 1] * edges2[:, 0]
+    mag = np.sqrt((nx * nx + ny * ny + nz * nz).astype(np.float64))
+    isValid = mag >= 0.0001
+    normalY = np.divide(ny, mag, out=np.zeros_like(mag), where=isValid)
+    surfaceLists = {"floors": isValid & (normalY > 0.01), "ceilings": isValid & (normalY < -0.01)}
+    surfaceLists["walls"] = isValid & ~(surfaceLists["floors"] | surfaceLists["ceilings"])
+
+    # cell bounds of every surface, along x and z
+    lower = getCellIndices(corners[:, :, [0, 2]].min(axis=1), False)
+    upper = getCellIndices(corners[:, :, [0, 2]].max(axis=1), True)
+    cellCounts = np.prod(np.maximum(upper - lower + 1, 0), axis=1) * isValid
+
+    horizontalPositions = positions[:, [0, 2]]
+    isOutOfBounds = np.any(
+        (horizontalPositions < -LEVEL_BOUNDARY_MAX) | (horizontalPositions >= LEVEL_BOUNDARY_MAX), axis=1
+    )
 
-def collisionVertIndex(vert, vertArray):
-    for i in range(len(vertArray)):
-        colVert = vertArray[i]
-        if colVert.position == vert:
-            return i
-    return None
+    report = {
+        "name": collision.name,
+        "partition": {"axes": ["x", "z"], "cell_size": CELL_SIZE, "cells_per_axis": NUM_CELLS},
+        "vertices": len(positions),
+        "triangles": len(triangles),
+        "out_of_bounds_vertices": int(np.count_nonzero(isOutOfBounds)),
+    }
+    for listName, isInList in surfaceLists.items():
+        report[listName] = getPartitionStats(getGridBoxCounts(lower[isInList], upper[isInList], (NUM_CELLS,) * 2))
+    report["all"] = getPartitionStats(getGridBoxCounts(lower[isValid], upper[isValid], (NUM_CELLS,) * 2))
+
+    straddling = np.flatnonzero(cellCounts > REPORT_MAX_CELLS_PER_SURFACE)
+    straddling = straddling[np.argsort(-cellCounts[straddling], kind="stable")]
+    report["straddling_surfaces"] = {
+        "max_cells_per_surface": REPORT_MAX_CELLS_PER_SURFACE,
+        "count": len(straddling),
+        "surfaces": [
+            {
+                "index": index,
+                "type": triangles[index][0],
+                "list": next(listName for listName, isInList in surfaceLists.items() if isInList[index]),
+                "cells": int(cellCounts[index]),
+                "cell_min": lower[index].tolist(),
+                "cell_max": upper[index].tolist(),
+            }
+            for index in straddling[:REPORT_MAX_LISTED_SURFACES].tolist()
+        ],
+    }
+    return report
 
 
 class SM64_ExportCollision(bpy.types.Operator):
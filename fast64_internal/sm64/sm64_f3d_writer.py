@@ -412,12 +412,12 @@ def sm64ExportF3DtoC(
 
     if texSeparate:
         texCFile = open(os.path.join(modelDirPath, "texture.inc.c"), "w", newline="\n")
-        texCFile.write(texC.source)
+        texC.write_source(texCFile)
         texCFile.close()
 
     modelPath = os.path.join(modelDirPath, "model.inc.c")
     outFile = open(modelPath, "w", newline="\n")
-    outFile.write(staticData.source)
+    staticData.write_source(outFile)
     outFile.close()
 
     headerPath = os.path.join(modelDirPath, "header.h")
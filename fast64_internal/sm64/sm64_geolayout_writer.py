@@ -712,13 +712,13 @@ def saveGeolayoutC(
 
     modelPath = os.path.join(geoDirPath, "model.inc.c")
     modelFile = open(modelPath, "w", newline="\n")
-    modelFile.write(staticData.source)
+    staticData.write_source(modelFile)
     modelFile.close()
 
     if texSeparate:
         texPath = os.path.join(geoDirPath, "texture.inc.c")
         texFile = open(texPath, "w", newline="\n")
-        texFile.write(texC.source)
+        texC.write_source(texFile)
         texFile.close()
 
     fModel.freePalettes()
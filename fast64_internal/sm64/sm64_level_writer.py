@@ -7,7 +7,7 @@ from ..panels import SM64_Panel
 from ..operators import ObjectDataExporter
 from .sm64_constants import cameraTriggerNames, levelIDNames, enumLevelNames
 from .sm64_objects import exportAreaCommon, backgroundSegments
-from .sm64_collision import exportCollisionCommon
+from .sm64_collision import exportCollisionCommon, getCollisionReport
 from .sm64_f3d_writer import SM64Model, SM64GfxFormatter
 from .sm64_geolayout_writer import setRooms, convertObjectToGeolayout
 from .sm64_f3d_writer import modifyTexScrollFiles, modifyTexScrollHeadersGroup
@@ -34,6 +34,7 @@ from ..utility import (
     makeWriteInfoBox,
     writeMaterialFiles,
     getPathAndLevel,
+    writeJSONFile,
 )
 
 from ..f3d.f3d_gbi import (
@@ -797,6 +798,8 @@ def export_area_c(
     saveDataToFile(os.path.join(areaDir, "collision.inc.c"), collisionC.source)
     level_data.script_data += include_proto("collision.inc.c")
     level_data.header_data += collisionC.header
+    if bpy.context.scene.fast64.sm64.write_collision_report:
+        writeJSONFile(os.path.join(areaDir, "collision_report.json"), getCollisionReport(collision))
 
     # Write rooms
     if area_root.enableRoomSwitch:
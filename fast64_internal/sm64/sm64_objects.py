@@ -411,8 +411,16 @@ class SM64_Special_Object:
         self.position = position
         self.rotation = rotation
 
+    def size(self):
+        size = 2 + 2 * len(self.position)
+        if self.rotation is not None:
+            size += 2
+            if self.bparam is not None:
+                size += 2
+        return size
+
     def to_binary(self):
-        data = int(self.preset).to_bytes(2, "big")
+        data = bytearray(int(self.preset).to_bytes(2, "big"))
         if len(self.position) > 3:
             raise PluginError("Object position should not be " + str(len(self.position) + " fields long."))
         for index in self.position:
@@ -586,6 +594,9 @@ class CollisionWaterBox:
         self.high = (position[0] + scale[0] * emptyScale, position[2] + scale[1] * emptyScale)
         self.height = position[1] + scale[2] * emptyScale
 
+    def size(self):
+        return 12
+
     def to_binary(self):
         data = bytearray([0x00, 0x00 if self.waterBoxType == "Water" else 0x32])
         data.extend(int(round(self.low[0])).to_bytes(2, "big", signed=True))
@@ -1,4 +1,5 @@
-import bpy, random, string, os, math, traceback, re, os, mathutils, ast, operator
+import bpy, random, string, os, math, traceback, re, os, mathutils, ast, operator, functools, json
+import numpy as np
 from math import pi, ceil, degrees, radians, copysign
 from mathutils import *
 from .utility_anim import *
@@ -157,6 +158,12 @@ def writeFile(filepath, data):
     datafile.close()
 
 
+def writeJSONFile(filepath, data):
+    with open(filepath, "w", newline="\n", encoding="utf-8") as datafile:
+        json.dump(data, datafile, indent=2)
+        datafile.write("\n")
+
+
 def checkObjectReference(obj, title):
     if obj.name not in bpy.context.view_layer.objects:
         raise PluginError(
@@ -347,34 +354,74 @@ def propertyGroupEquals(oldProp, newProp):
 
 def writeCData(data, headerPath, sourcePath):
     sourceFile = open(sourcePath, "w", newline="\n", encoding="utf-8")
-    sourceFile.write(data.source)
+    data.write_source(sourceFile)
     sourceFile.close()
 
     headerFile = open(headerPath, "w", newline="\n", encoding="utf-8")
-    headerFile.write(data.header)
+    data.write_header(headerFile)
     headerFile.close()
 
 
 def writeCDataSourceOnly(data, sourcePath):
     sourceFile = open(sourcePath, "w", newline="\n", encoding="utf-8")
-    sourceFile.write(data.source)
+    data.write_source(sourceFile)
     sourceFile.close()
 
 
 def writeCDataHeaderOnly(data, headerPath):
     headerFile = open(headerPath, "w", newline="\n", encoding="utf-8")
-    headerFile.write(data.header)
+    data.write_header(headerFile)
     headerFile.close()
 
 
 class CData:
+    """
+    Source and header text, stored as lists of chunks so that appending never copies what is already there.
+    Reading source or header joins the chunks, prefer add_source/add_header and write_source/write_header for large data.
+    """
+
     def __init__(self):
-        self.source = ""
-        self.header = ""
+        self.source_chunks: list[str] = []
+        self.header_chunks: list[str] = []
+
+    @property
+    def source(self) -> str:
+        if len(self.source_chunks) != 1:
+            self.source_chunks = ["".join(self.source_chunks)]
+        return self.source_chunks[0]
+
+    @source.setter
+    def source(self, value: str):
+        self.source_chunks = [value]
+
+    @property
+    def header(self) -> str:
+        if len(self.header_chunks) != 1:
+            self.header_chunks = ["".join(self.header_chunks)]
+        return self.header_chunks[0]
+
+    @header.setter
+    def header(self, value: str):
+        self.header_chunks = [value]
+
+    def add_source(self, *chunks: str):
+        self.source_chunks.extend(chunks)
+
+    def add_header(self, *chunks: str):
+        self.header_chunks.extend(chunks)
+
+    def extend_source(self, lines: Iterable[str]):
+        self.source_chunks.extend(lines)
+
+    def write_source(self, file):
+        file.writelines(self.source_chunks)
+
+    def write_header(self, file):
+        file.writelines(self.header_chunks)
 
     def append(self, other):
-        self.source += other.source
-        self.header += other.header
+        self.source_chunks.extend(other.source_chunks)
+        self.header_chunks.extend(other.header_chunks)
 
 
 class CScrollData(CData):
@@ -586,6 +633,98 @@ def getIA16Tuple(color):
     return (int(round(intensity * 0xFF)) << 8) | int(alpha * 0xFF)
 
 
+def getImagePixels(image: bpy.types.Image) -> np.ndarray:
+    # A single foreach_get is much faster than image.pixels[:] or indexing image.pixels
+    pixels = np.empty(len(image.pixels), dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    return pixels
+
+
+# Vectorized versions of the functions above, taking an (n, 4) array of colors.
+# np.rint rounds half to even like round() does, so both give the exact same values.
+def getRGBA16Array(colors: np.ndarray) -> np.ndarray:
+    colors = np.asarray(colors, dtype=np.float64)
+    rgb = np.rint(colors[:, :3] * 0x1F).astype(np.int64) & 0x1F
+    return (rgb[:, 0] << 11) | (rgb[:, 1] << 6) | (rgb[:, 2] << 1) | (colors[:, 3] > 0.5)
+
+
+RGB_TO_LUM_COEF_ARRAY = np.array(RGB_TO_LUM_COEF, dtype=np.float32)
+
+
+def colorsToLuminance(colors: np.ndarray) -> np.ndarray:
+    # Vector.dot multiplies in single precision and sums the products in double precision, last component first.
+    # Do the same here, otherwise values that land on a rounding boundary could encode differently.
+    products = (np.asarray(colors, dtype=np.float32)[:, :3] * RGB_TO_LUM_COEF_ARRAY).astype(np.float64)
+    return (products[:, 2] + products[:, 1]) + products[:, 0]
+
+
+def getIA16Array(colors: np.ndarray) -> np.ndarray:
+    intensity = colorsToLuminance(colors)
+    alpha = np.asarray(colors, dtype=np.float64)[:, 3]
+    return (np.rint(intensity * 0xFF).astype(np.int64) << 8) | (alpha * 0xFF).astype(np.int64)
+
+
+def transformPositions(transform: Matrix, positions: np.ndarray) -> np.ndarray:
+    # Same as transform @ Vector(position) for every row of an (n, 3) array, with the translation applied.
+    # Matrix @ Vector multiplies in single precision and sums the products in double precision,
+    # doing the same keeps positions that land on a rounding boundary rounding the same way.
+    matrix = np.array(transform, dtype=np.float32)
+    products = matrix[None, :3, :3] * np.asarray(positions, dtype=np.float32)[:, None, :]
+    sums = products[:, :, 0].astype(np.float64) + products[:, :, 1] + products[:, :, 2] + matrix[None, :3, 3]
+    return sums.astype(np.float32)
+
+
+def getUniqueRows(rows: np.ndarray):
+    """
+    Hash based replacement for searching a list for every row, ex. to weld collision vertices.
+    Returns the index of the first occurrence of every unique row of a 2D array, in order of first use,
+    and the index of every row in that list.
+    """
+    _, firstIndices, inverse = np.unique(rows, axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(firstIndices)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return firstIndices[order], rank[inverse.reshape(-1)]
+
+
+def getGridBoxCounts(lower: np.ndarray, upper: np.ndarray, shape: tuple[int, ...]) -> np.ndarray:
+    """
+    Returns how many of the (n, d) inclusive boxes of cell indices cover every cell of a grid with the given shape,
+    ex. to count the collision triangles in every cell of a spatial partition.
+    Boxes are added to a difference array at their corners, then summed along every axis.
+    """
+    lower = np.asarray(lower, dtype=np.int64).reshape(-1, len(shape))
+    upper = np.asarray(upper, dtype=np.int64).reshape(-1, len(shape))
+    isValid = np.all(lower <= upper, axis=1)
+    lower, upper = lower[isValid], upper[isValid] + 1
+    diff = np.zeros([size + 1 for size in shape], dtype=np.int64)
+    for corner in range(1 << len(shape)):
+        useUpper = [(corner >> axis) & 1 == 1 for axis in range(len(shape))]
+        cornerIndices = tuple(upper[:, axis] if isUpper else lower[:, axis] for axis, isUpper in enumerate(useUpper))
+        np.add.at(diff, cornerIndices, -1 if sum(useUpper) % 2 == 1 else 1)
+    for axis in range(len(shape)):
+        diff = np.cumsum(diff, axis=axis)
+    return diff[tuple(slice(0, size) for size in shape)]
+
+
+def getPartitionStats(cellCounts: np.ndarray, hotspotCount: int = 10) -> dict:
+    """Returns JSON friendly statistics about the triangle count of every cell of a spatial partition grid"""
+    flatCounts = cellCounts.reshape(-1)
+    usedCounts = flatCounts[flatCounts > 0]
+    hotspots = [index for index in np.argsort(-flatCounts, kind="stable")[:hotspotCount].tolist() if flatCounts[index]]
+    return {
+        "cells": int(flatCounts.size),
+        "used_cells": int(usedCounts.size),
+        "entries": int(flatCounts.sum()),
+        "max_per_cell": int(flatCounts.max(initial=0)),
+        "mean_per_used_cell": round(float(usedCounts.mean()), 2) if usedCounts.size > 0 else 0,
+        "hotspots": [
+            {"cell": [int(i) for i in np.unravel_index(index, cellCounts.shape)], "triangles": int(flatCounts[index])}
+            for index in hotspots
+        ],
+    }
+
+
 def convertRadiansToS16(value):
     value = math.degrees(value)
     # ??? Why is this negative?
@@ -1733,6 +1872,81 @@ def removeComments(text: str):
     return re.sub(pattern, replacer, text)
 
 
+class CSymbol:
+    def __init__(self, type: str, name: str, start: int, typeStart: int, nameStart: int):
+        self.type = type
+        self.name = name
+        # span of the definition, from its storage qualifiers (if any) to its terminating semicolon
+        self.start = start
+        self.end = start
+        self.typeStart = typeStart
+        self.nameStart = nameStart
+
+
+class CSymbolTable:
+    """
+    Index of the top level definitions (`type name[...] = ...;`) of some C source, built in one pass.
+    Comments, strings, preprocessor lines and anything inside braces are skipped, the first definition of a name wins.
+    """
+
+    tokenRegex = re.compile(
+        r"(?P<string>\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*')"
+        r"|(?P<comment>//[^\n]*|/\*[\s\S]*?\*/)"
+        r"|(?P<preprocessor>^[ \t]*#[^\n]*(?:\\\n[^\n]*)*)"
+        r"|(?P<definition>\b(?:(?:static|const|extern|volatile)\s+)*(?P<type>[A-Za-z_]\w*)[\s\*]+(?P<name>[A-Za-z_]\w*)\s*(?:\[[^\]\n]*\]\s*)*=)"
+        r"|(?P<semicolon>;)",
+        re.MULTILINE,
+    )
+
+    def __init__(self, data: str):
+        self.data = data
+        self.symbols: dict[str, CSymbol] = {}
+
+        depth = 0
+        tokenEnd = 0
+        pending: Optional[CSymbol] = None
+        for match in self.tokenRegex.finditer(data):
+            # braces only ever show up between tokens, counting them there is much faster than tokenizing each one
+            tokenStart = match.start()
+            depth = max(depth + data.count("{", tokenEnd, tokenStart) - data.count("}", tokenEnd, tokenStart), 0)
+            tokenEnd = match.end()
+
+            token = match.lastgroup
+            if depth > 0:
+                continue
+            elif token == "definition":
+                name = match.group("name")
+                pending = CSymbol(match.group("type"), name, match.start(), match.start("type"), match.start("name"))
+                self.symbols.setdefault(name, pending)
+            elif token == "semicolon" and pending is not None:
+                pending.end = match.end()
+                pending = None
+        if pending is not None:
+            pending.end = len(data)
+
+    def search(self, name: str, pattern: str, flags: int = 0) -> Optional[re.Match]:
+        """
+        Same as re.search(pattern, data, flags) for a pattern describing the definition of name, but starts
+        matching at the indexed definition: at its storage qualifiers, its type, then its name, so patterns with
+        or without an optional `static` still match from the same place as a search.
+        Falls back to searching all of the data if that does not match.
+        """
+        regex = re.compile(pattern, flags)
+        symbol = self.symbols.get(name)
+        if symbol is not None:
+            for start in dict.fromkeys((symbol.start, symbol.typeStart, symbol.nameStart)):
+                match = regex.match(self.data, start)
+                if match is not None:
+                    return match
+        return regex.search(self.data)
+
+
+@functools.lru_cache(maxsize=8)
+def getCSymbolTable(data: str) -> CSymbolTable:
+    """Symbol table of data, cached since importers look up many names in the same source"""
+    return CSymbolTable(data)
+
+
 binOps = {
     ast.Add: operator.add,
     ast.Sub: operator.sub,
@@ -1,4 +1,5 @@
 import bpy, math, mathutils
+import numpy as np
 from bpy.utils import register_class, unregister_class
 
 from typing import TYPE_CHECKING
@@ -53,6 +54,13 @@ def getTranslationRelativeToRest(bone: bpy.types.Bone, inputVector: mathutils.Ve
     return actualTranslation.decompose()[0]
 
 
+def getTranslationsRelativeToRest(bone: bpy.types.Bone, translations: np.ndarray) -> np.ndarray:
+    """Same as getTranslationRelativeToRest, for (frames, 3) translations"""
+    zUpToYUp = mathutils.Quaternion((1, 0, 0), math.radians(-90.0)).to_matrix().to_4x4()
+    transform = np.array((zUpToYUp @ bone.matrix_local).inverted())
+    return translations @ transform[:3, :3].T + transform[:3, 3]
+
+
 def getRotationRelativeToRest(bone: bpy.types.Bone, inputEuler: mathutils.Euler) -> mathutils.Euler:
     if bone.parent is None:
         parentRotation = mathutils.Quaternion((1, 0, 0), math.radians(90.0)).to_matrix().to_4x4()
@@ -141,6 +149,260 @@ def saveTranslationFrame(frameData, translation):
         frameData[i].frames.append(min(int(round(translation[i])), 2**16 - 1))
 
 
+def setKeyframes(fcurve: bpy.types.FCurve, values, interpolation: str = None):
+    """
+    Keys each value on its own frame starting from 0, adding all the keyframes at once instead of calling
+    keyframe_points.insert for each frame, which also recalculates the handles every time.
+    keyframe_points.add ignores the new keyframe preferences insert uses, so the interpolation (unless given)
+    and handle types are set from them here, with foreach_set as well.
+    """
+
+    editPreferences = bpy.context.preferences.edit
+    if interpolation is None:
+        interpolation = editPreferences.keyframe_new_interpolation_type
+    handleType = editPreferences.keyframe_new_handle_type
+
+    values = np.asarray(values, dtype=np.float32)
+    keyframes = fcurve.keyframe_points
+    keyframes.add(len(values))
+    keyframes.foreach_set("co", np.column_stack((np.arange(len(values), dtype=np.float32), values)).ravel())
+    # foreach_set takes the values of enum items, not their names
+    keyframeProperties = bpy.types.Keyframe.bl_rna.properties
+    for propName, itemName in (
+        ("interpolation", interpolation),
+        ("handle_left_type", handleType),
+        ("handle_right_type", handleType),
+    ):
+        itemValue = keyframeProperties[propName].enum_items[itemName].value
+        keyframes.foreach_set(propName, np.full(len(keyframes), itemValue, dtype=np.int32))
+    fcurve.update()
+
+
+def getEulerFrameValues(rotations: np.ndarray):
+    """
+    Converts (frames, 3, 3) rotation matrices to the values saveQuaternionFrame would save for each frame,
+    as a (frames, 3) array.
+    Columns are normalized and the XYZ euler solution with the smallest sum of absolute angles is kept, like
+    mathutils' to_quaternion().to_euler().
+    """
+
+    rotations = rotations / np.linalg.norm(rotations, axis=1, keepdims=True)
+    cy = np.hypot(rotations[:, 0, 0], rotations[:, 1, 0])
+    isSingular = cy <= 16 * np.finfo(np.float32).eps
+
+    euler1 = np.column_stack(
+        (
+            np.where(
+                isSingular,
+                np.arctan2(-rotations[:, 1, 2], rotations[:, 1, 1]),
+                np.arctan2(rotations[:, 2, 1], rotations[:, 2, 2]),
+            ),
+            np.arctan2(-rotations[:, 2, 0], cy),
+            np.where(isSingular, 0, np.arctan2(rotations[:, 1, 0], rotations[:, 0, 0])),
+        )
+    )
+    euler2 = np.column_stack(
+        (
+            np.arctan2(-rotations[:, 2, 1], -rotations[:, 2, 2]),
+            np.arctan2(-rotations[:, 2, 0], -cy),
+            np.arctan2(-rotations[:, 1, 0], -rotations[:, 0, 0]),
+        )
+    )
+    useEuler2 = ~isSingular & (np.abs(euler1).sum(axis=1) > np.abs(euler2).sum(axis=1))
+    eulers = np.where(useEuler2[:, None], euler2, euler1)
+
+    values = (np.degrees(eulers) % 360) / 360
+    return np.minimum(np.rint(values * (2**16 - 1)).astype(np.int64), 2**16 - 1)
+
+
+def getTranslationFrameValues(translations: np.ndarray):
+    """Converts (frames, 3) translations to the values saveTranslationFrame would save for each frame"""
+
+    return np.minimum(np.rint(translations).astype(np.int64), 2**16 - 1)
+
+
+def saveFrameValues(frameData, values: np.ndarray):
+    for i in range(3):
+        frameData[i].frames.extend(values[:, i].tolist())
+
+
+# Euler rotation modes, the rotation about the first axis is applied first
+EULER_AXES = {"X": 0, "Y": 1, "Z": 2}
+
+
+def getAxisRotationMatrices(axis: int, angles: np.ndarray):
+    matrices = np.zeros((len(angles), 3, 3))
+    first, second = (axis + 1) % 3, (axis + 2) % 3
+    cos, sin = np.cos(angles), np.sin(angles)
+    matrices[:, axis, axis] = 1
+    matrices[:, first, first] = cos
+    matrices[:, first, second] = -sin
+    matrices[:, second, first] = sin
+    matrices[:, second, second] = cos
+    return matrices
+
+
+def getQuaternionMatrices(quaternions: np.ndarray):
+    lengths = np.linalg.norm(quaternions, axis=1, keepdims=True)
+    # a zero quaternion is evaluated as a 180 degree rotation around X
+    quaternions = np.where(lengths > 0, quaternions / np.where(lengths > 0, lengths, 1), (0, 1, 0, 0))
+    w, x, y, z = quaternions.T
+    return np.stack(
+        (
+            np.column_stack((1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y))),
+            np.column_stack((2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x))),
+            np.column_stack((2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y))),
+        ),
+        axis=1,
+    )
+
+
+def getAxisAngleMatrices(axisAngles: np.ndarray):
+    angles, axes = axisAngles[:, 0], axisAngles[:, 1:]
+    lengths = np.linalg.norm(axes, axis=1)
+    # a zero axis is evaluated as no rotation
+    halfAngles = np.where(lengths > 0, angles / 2, 0)
+    axes = axes / np.where(lengths > 0, lengths, 1)[:, None]
+    return getQuaternionMatrices(np.column_stack((np.cos(halfAngles), axes * np.sin(halfAngles)[:, None])))
+
+
+class ActionSampler:
+    """
+    Evaluates the pose of an armature at a range of frames straight from the F-curves of its active action,
+    instead of calling scene.frame_set for every frame, which evaluates the whole scene.
+    This is only valid when nothing but the action moves the bones, so canSample must be checked first.
+    """
+
+    def __init__(self, armatureObj: bpy.types.Object, action: bpy.types.Action, frame_start: int, frame_count: int):
+        self.armatureObj = armatureObj
+        self.frames = range(frame_start, frame_start + frame_count)
+        # when several F-curves animate the same channel, the last one is applied
+        self.fcurves = {
+            (fcurve.data_path, fcurve.array_index): fcurve
+            for fcurve in action.fcurves
+            if not fcurve.mute and (fcurve.group is None or not fcurve.group.mute)
+        }
+        self.poseMatrices: dict[str, np.ndarray] = {}
+
+    def getNLAChannels(self):
+        """Returns the channels animated by the NLA tracks, or None if they can't be listed"""
+
+        animData = self.armatureObj.animation_data
+        channels = set()
+        if not animData.use_nla:
+            return channels
+        for track in animData.nla_tracks:
+            if track.mute:
+                continue
+            for strip in track.strips:
+                if strip.mute:
+                    continue
+                if strip.type != "CLIP" or strip.action is None:
+                    return None
+                channels.update((fcurve.data_path, fcurve.array_index) for fcurve in strip.action.fcurves)
+        return channels
+
+    def getBoneChannels(self, poseBone: bpy.types.PoseBone):
+        if poseBone.rotation_mode == "QUATERNION":
+            rotationProp = ("rotation_quaternion", 4)
+        elif poseBone.rotation_mode == "AXIS_ANGLE":
+            rotationProp = ("rotation_axis_angle", 4)
+        else:
+            rotationProp = ("rotation_euler", 3)
+        return [
+            (poseBone.path_from_id(propName), i)
+            for propName, size in (("location", 3), rotationProp, ("scale", 3))
+            for i in range(size)
+        ]
+
+    def canSample(self, boneNames: list[str], extraChannels: tuple[tuple[str, int], ...] = ()):
+        """
+        Returns whether the pose of the given bones (and extra object channels) only depends on the action.
+        Constraints, drivers, NLA tracks animating channels the action doesn't, and non default bone inheritance
+        all need the full scene evaluation.
+        """
+
+        animData = self.armatureObj.animation_data
+        if (
+            animData.use_tweak_mode
+            or animData.action_blend_type != "REPLACE"
+            or animData.action_influence != 1
+            or len(animData.drivers) > 0
+            or self.armatureObj.data.pose_position != "POSE"
+        ):
+            return False
+        armatureAnimData = self.armatureObj.data.animation_data
+        if armatureAnimData is not None and (armatureAnimData.action is not None or len(armatureAnimData.drivers) > 0):
+            return False
+
+        channels = list(extraChannels)
+        for boneName in boneNames:
+            bone = self.armatureObj.data.bones[boneName]
+            while bone is not None:
+                poseBone = self.armatureObj.pose.bones[bone.name]
+                if (
+                    len(poseBone.constraints) > 0
+                    or not bone.use_inherit_rotation
+                    or bone.inherit_scale != "FULL"
+                    or not bone.use_local_location
+                    or bone.use_relative_parent
+                ):
+                    return False
+                channels.extend(self.getBoneChannels(poseBone))
+                bone = bone.parent
+
+        nlaChannels = self.getNLAChannels()
+        if nlaChannels is None:
+            return False
+        # the action replaces whatever the NLA tracks set on the channels it animates
+        return all(channel in self.fcurves or channel not in nlaChannels for channel in channels)
+
+    def sampleProperty(self, owner, propName: str):
+        """Returns the (frames, n) values of a property, or its current value on every frame if not animated"""
+
+        dataPath = owner.path_from_id(propName)
+        value = getattr(owner, propName)
+        value = list(value) if hasattr(value, "__len__") else [value]
+        values = np.empty((len(self.frames), len(value)))
+        for i in range(len(value)):
+            fcurve = self.fcurves.get((dataPath, i))
+            values[:, i] = [fcurve.evaluate(frame) for frame in self.frames] if fcurve is not None else value[i]
+        return values
+
+    def getBasisMatrices(self, poseBone: bpy.types.PoseBone):
+        """Returns the (frames, 4, 4) matrix_basis of a bone"""
+
+        if poseBone.rotation_mode == "QUATERNION":
+            rotations = getQuaternionMatrices(self.sampleProperty(poseBone, "rotation_quaternion"))
+        elif poseBone.rotation_mode == "AXIS_ANGLE":
+            rotations = getAxisAngleMatrices(self.sampleProperty(poseBone, "rotation_axis_angle"))
+        else:
+            eulers = self.sampleProperty(poseBone, "rotation_euler")
+            rotations = np.broadcast_to(np.identity(3), (len(self.frames), 3, 3))
+            for axisName in poseBone.rotation_mode:
+                axis = EULER_AXES[axisName]
+                rotations = getAxisRotationMatrices(axis, eulers[:, axis]) @ rotations
+
+        matrices = np.zeros((len(self.frames), 4, 4))
+        matrices[:, :3, :3] = rotations * self.sampleProperty(poseBone, "scale")[:, None, :]
+        matrices[:, :3, 3] = self.sampleProperty(poseBone, "location")
+        matrices[:, 3, 3] = 1
+        return matrices
+
+    def getPoseMatrices(self, boneName: str):
+        """Returns the (frames, 4, 4) armature space pose matrices of a bone, like PoseBone.matrix"""
+
+        if boneName not in self.poseMatrices:
+            bone = self.armatureObj.data.bones[boneName]
+            basisMatrices = self.getBasisMatrices(self.armatureObj.pose.bones[boneName])
+            if bone.parent is None:
+                self.poseMatrices[boneName] = np.array(bone.matrix_local) @ basisMatrices
+            else:
+                restMatrix = np.linalg.inv(np.array(bone.parent.matrix_local)) @ np.array(bone.matrix_local)
+                self.poseMatrices[boneName] = self.getPoseMatrices(bone.parent.name) @ restMatrix @ basisMatrices
+        return self.poseMatrices[boneName]
+
+
 def getFrameInterval(action: bpy.types.Action):
     scene = bpy.context.scene
 
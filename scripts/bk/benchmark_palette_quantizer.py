@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+"""
+Benchmarks the NumPy CI4/CI8 palette quantizer used by the BK exporter against the
+per-pixel reference implementation (ColorPixel based), and checks that both produce
+the same palette and indices. Does not need Blender.
+
+Usage:
+python scripts/bk/benchmark_palette_quantizer.py [texture size, default 64] [repetitions, default 3]
+"""
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "fast64_internal", "bk"))
+from bk_utility import binjo_utils
+
+args = sys.argv[1:]
+size = int(args[0]) if len(args) > 0 else 64
+repetitions = int(args[1]) if len(args) > 1 else 3
+
+
+def make_test_textures(size):
+    rng = np.random.default_rng(0x42)
+    y, x = np.mgrid[0:size, 0:size]
+    gradient = np.stack([x / size, y / size, (x + y) / (2 * size), np.ones(x.shape)], axis=-1)
+    noise = rng.random((size, size, 4))
+    noise[..., 3] = noise[..., 3] > 0.2
+    base_colors = rng.random((12, 4))
+    clustered = base_colors[rng.integers(0, 12, (size, size))]
+    clustered[..., :3] = np.clip(clustered[..., :3] + rng.normal(0, 0.02, (size, size, 3)), 0, 1)
+    return {"gradient": gradient, "noise": noise, "clustered": clustered}
+
+
+def run_reference(float_pixels, color_cnt):
+    byte_pixels = [((round(255 * val) >> 3) << 3) for val in float_pixels]
+    color_pixels = [binjo_utils.ColorPixel(*byte_pixels[4 * px : 4 * px + 4]) for px in range(len(byte_pixels) // 4)]
+    palette = binjo_utils.approx_palette_by_most_used_with_diversity(color_pixels, color_cnt, diversity_threshold=3)
+    indices = binjo_utils.convert_IMG_pixels_into_palette_indices(color_pixels, palette)
+    return [(cpx.r, cpx.g, cpx.b, cpx.a) for cpx in palette], indices
+
+
+def run_numpy(float_pixels, color_cnt):
+    color_array = binjo_utils.convert_float_pixels_to_color_array(float_pixels)
+    palette = binjo_utils.quantize_color_array_by_most_used_with_diversity(
+        color_array, color_cnt, diversity_threshold=3
+    )
+    indices = binjo_utils.convert_color_array_into_palette_indices(color_array, palette)
+    return [tuple(int(ch) for ch in color) for color in palette], indices.tolist()
+
+
+def time_call(func, *func_args):
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        result = func(*func_args)
+    return result, (time.perf_counter() - start) / repetitions
+
+
+for name, texture in make_test_textures(size).items():
+    float_pixels = texture.astype(np.float32).flatten()
+    for tex_type, color_cnt in (("CI4", 0x10), ("CI8", 0x100)):
+        reference, reference_time = time_call(run_reference, float_pixels.tolist(), color_cnt)
+        vectorized, vectorized_time = time_call(run_numpy, float_pixels, color_cnt)
+        match = "identical" if reference == vectorized else "MISMATCH"
+        print(
+            f"{name:>10} {size}x{size} {tex_type}: reference {reference_time * 1000:9.2f}ms, "
+            f"numpy {vectorized_time * 1000:7.2f}ms ({reference_time / vectorized_time:6.1f}x) -- {match}"
+        )
@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+"""
+Regression check for the vectorized geo-cube binning of the BK collision exporter
+(ModelBIN_ColSeg.populate_from_collision_tri_list): bins a random tri soup with both the
+vectorized engine and a plain per-tri reference loop, and checks that every cube ends up with the
+same tris. The reference runs its own scalar SAT, projecting all 8 cube corners onto each of the
+13 separating axes, and is also checked against binjo_utils.tri_intersects_cube. Does not need Blender.
+
+Usage:
+python scripts/bk/check_collision_binning.py [tri count, default 2000] [cube scale, default 500]
+"""
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "fast64_internal", "bk"))
+from bk_utility import binjo_utils
+from bk_utility.binjo_model_bin_vertex_seg import ModelBIN_VtxSeg, ModelBIN_VtxElem
+from bk_utility.binjo_model_bin_collision_seg import ModelBIN_ColSeg, ModelBIN_GeoCubeElem, ModelBIN_TriElem
+
+args = sys.argv[1:]
+tri_cnt = int(args[0]) if len(args) > 0 else 2000
+cube_scale = int(args[1]) if len(args) > 1 else 500
+
+
+def make_tri_soup(tri_cnt):
+    rng = np.random.default_rng(0x42)
+    # mostly small tris (within one or two cubes), and a few huge ones that span many cubes
+    centers = rng.integers(-8000, 8000, (tri_cnt, 1, 3))
+    extents = np.where(rng.random((tri_cnt, 1, 1)) < 0.1, 4000, 300)
+    coords = np.clip(
+        centers + rng.integers(-1, 2, (tri_cnt, 3, 3)) * rng.integers(0, extents + 1, (tri_cnt, 3, 3)), -0x7FFF, 0x7FFF
+    )
+
+    vtx_list = []
+    for x, y, z in coords.reshape(-1, 3).tolist():
+        vtx = ModelBIN_VtxElem()
+        vtx.x, vtx.y, vtx.z = x, y, z
+        vtx_list.append(vtx)
+    vtx_seg = ModelBIN_VtxSeg()
+    vtx_seg.populate_from_vtx_list(vtx_list)
+
+    tri_list = []
+    for idx in range(0, tri_cnt):
+        tri = ModelBIN_TriElem()
+        tri.build_from_parameters((3 * idx) + 0, (3 * idx) + 1, (3 * idx) + 2, coll_type=0x0100)
+        tri.link_vertex_objects(vtx_seg.vtx_list)
+        tri_list.append(tri)
+    return tri_list
+
+
+def cross(u, v):
+    return (u[1] * v[2] - u[2] * v[1], u[2] * v[0] - u[0] * v[2], u[0] * v[1] - u[1] * v[0])
+
+
+def dot(u, v):
+    return u[0] * v[0] + u[1] * v[1] + u[2] * v[2]
+
+
+# scalar SAT between a tri and the axis-aligned cube [cube_min, cube_min + cube_scale]; touching counts
+def reference_tri_intersects_cube(tri_coords, cube_min, cube_scale):
+    corners = [
+        (cube_min[0] + dx * cube_scale, cube_min[1] + dy * cube_scale, cube_min[2] + dz * cube_scale)
+        for dx in (0, 1)
+        for dy in (0, 1)
+        for dz in (0, 1)
+    ]
+    edges = [tuple(tri_coords[(i + 1) % 3][k] - tri_coords[i][k] for k in range(3)) for i in range(3)]
+    cube_normals = [(1, 0, 0), (0, 1, 0), (0, 0, 1)]
+    axes = cube_normals + [cross(edges[0], edges[1])]
+    axes += [cross(normal, edge) for normal in cube_normals for edge in edges]
+    for axis in axes:
+        tri_proj = [dot(vtx, axis) for vtx in tri_coords]
+        cube_proj = [dot(corner, axis) for corner in corners]
+        if min(tri_proj) > max(cube_proj) or max(tri_proj) < min(cube_proj):
+            return False
+    return True
+
+
+# per-tri binning loop: every cube within the bounds of a tri gets the scalar SAT check
+def bin_reference(tri_list, cube_scale):
+    coords = ModelBIN_ColSeg.get_tri_coords(tri_list)
+    min_ids = np.floor(coords.min(axis=(0, 1)) / cube_scale).astype(int)
+    max_ids = np.floor(coords.max(axis=(0, 1)) / cube_scale).astype(int)
+    stride_y = max_ids[0] - min_ids[0] + 1
+    stride_z = stride_y * (max_ids[1] - min_ids[1] + 1)
+    geo_cube_list = []
+    for z_id in range(min_ids[2], max_ids[2] + 1):
+        for y_id in range(min_ids[1], max_ids[1] + 1):
+            for x_id in range(min_ids[0], max_ids[0] + 1):
+                geo_cube_list.append(ModelBIN_GeoCubeElem(x_id=x_id, y_id=y_id, z_id=z_id, cube_scale=cube_scale))
+    candidate_cnt = 0
+    scalar_mismatches = 0
+    for tri, tri_coords in zip(tri_list, coords):
+        tri_min_ids = np.floor(tri_coords.min(axis=0) / cube_scale).astype(int)
+        tri_max_ids = np.floor(tri_coords.max(axis=0) / cube_scale).astype(int)
+        tri_coords = tri_coords.tolist()
+        for z_id in range(tri_min_ids[2], tri_max_ids[2] + 1):
+            for y_id in range(tri_min_ids[1], tri_max_ids[1] + 1):
+                for x_id in range(tri_min_ids[0], tri_max_ids[0] + 1):
+                    cube_id = (x_id - min_ids[0]) + ((y_id - min_ids[1]) * stride_y) + ((z_id - min_ids[2]) * stride_z)
+                    cube_min = (x_id * cube_scale, y_id * cube_scale, z_id * cube_scale)
+                    intersects = reference_tri_intersects_cube(tri_coords, cube_min, cube_scale)
+                    scalar_mismatches += intersects != binjo_utils.tri_intersects_cube(tri, geo_cube_list[cube_id])
+                    candidate_cnt += 1
+                    if intersects:
+                        geo_cube_list[cube_id].intersecting_tri_list.append(tri)
+    return [[id(tri) for tri in cube.intersecting_tri_list] for cube in geo_cube_list], candidate_cnt, scalar_mismatches
+
+
+tri_list = make_tri_soup(tri_cnt)
+
+start = time.perf_counter()
+reference, candidate_cnt, scalar_mismatches = bin_reference(tri_list, cube_scale)
+reference_time = time.perf_counter() - start
+
+start = time.perf_counter()
+col_seg = ModelBIN_ColSeg()
+col_seg.populate_from_collision_tri_list(tri_list, cube_scale=cube_scale)
+vectorized_time = time.perf_counter() - start
+vectorized = [[id(tri) for tri in cube.intersecting_tri_list] for cube in col_seg.geo_cube_list]
+
+# the flat tri-list and the cube headers have to agree with the per-cube lists too
+flat_ok = [id(tri) for tri in col_seg.tri_list] == [tri_id for cube in vectorized for tri_id in cube]
+headers_ok = all(
+    col_seg.tri_list[cube.starting_tri_ID : cube.starting_tri_ID + cube.tri_cnt] == cube.intersecting_tri_list
+    for cube in col_seg.geo_cube_list
+)
+match = (reference == vectorized) and flat_ok and headers_ok and scalar_mismatches == 0
+
+print(f"{tri_cnt} tris, cube scale {cube_scale}: {col_seg.geo_cube_cnt} cubes, {col_seg.tri_cnt} listed tris")
+print(f"  reference:  {reference_time:8.3f}s")
+print(f"  vectorized: {vectorized_time:8.3f}s  ({reference_time / max(vectorized_time, 1e-9):.1f}x)")
+# the bounding cubes of a tri are only candidates; the SAT has to reject the ones the tri passes by
+print(f"  SAT rejected {candidate_cnt - col_seg.tri_cnt} of {candidate_cnt} bounding cube candidates")
+print(f"  tri_intersects_cube mismatches: {scalar_mismatches}")
+print(f"  cube membership matches: {match}")
+sys.exit(0 if match else 1)
@@ -0,0 +1,165 @@
+import os
+import sys
+
+import numpy as np
+
+"""
+Parity check for the vectorized BK texel decoders (binjo_utils.convert_img_data_to_pixels): decodes random
+texture data of every format in Dicts.TEX_TYPES with both the vectorized decoder and the per-texel reference
+loop it replaced, and checks that palettes and pixels are identical. Does not need Blender.
+
+Usage:
+python scripts/bk/check_texel_decoders.py [rounds per format, default 20]
+"""
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "fast64_internal", "bk"))
+from bk_utility import binjo_utils
+from bk_utility.binjo_dicts import Dicts
+
+args = sys.argv[1:]
+round_cnt = int(args[0]) if len(args) > 0 else 20
+
+
+def read_bytes(data, offset, cnt):
+    value = 0
+    for byte in data[offset : (offset + cnt)]:
+        value = (value << 8) + byte
+    return value
+
+
+# the per-texel decoder the vectorized one replaced
+def reference_convert_img_data_to_pixels(bin_data, tex_type, w, h):
+    if tex_type == Dicts.TEX_TYPES["CI4"]:  # C4 or CI4; 16 RGB5551-colors, pixels are encoded per row as 4bit IDs
+        # first parse the color palette
+        color_palette = np.zeros((0x10, 4), dtype=np.uint8)
+        for i in range(0, 0x10):
+            color_value = read_bytes(bin_data, (i * 2), 2)
+            # RGB5551
+            color_palette[i, 0] = int(((color_value >> 0xB) & 0b011111) / 0b011111 * 0xFF)  # R
+            color_palette[i, 1] = int(((color_value >> 0x6) & 0b011111) / 0b011111 * 0xFF)  # G
+            color_palette[i, 2] = int(((color_value >> 0x1) & 0b011111) / 0b011111 * 0xFF)  # B
+            # and grab alpha from final bit
+            color_palette[i, 3] = (color_value & 0b0001) * 0xFF
+
+        # then parse the image data
+        pixel_data = np.zeros((h, w, 4), dtype=np.uint8)
+        for y in range(0, h):
+            for x in range(0, w):
+                # calc the pixel index
+                px_id = (y * w) + x
+                # NOTE: this grabs the full byte, but the actual ID is only one nibble of that -> split it
+                pal_id = read_bytes(bin_data, (0x20 + (px_id // 2)), 1)
+                if px_id % 2 == 0:
+                    pal_id = (pal_id >> 4) & 0b1111
+                else:
+                    pal_id = (pal_id >> 0) & 0b1111
+                # NOTE: the python Image constructors expect the colors to be in RGB...
+                pixel_data[y, x, 0] = color_palette[pal_id, 0]
+                pixel_data[y, x, 1] = color_palette[pal_id, 1]
+                pixel_data[y, x, 2] = color_palette[pal_id, 2]
+                pixel_data[y, x, 3] = color_palette[pal_id, 3]
+        return color_palette, pixel_data
+
+    if tex_type == Dicts.TEX_TYPES["CI8"]:  # C8 or CI8; 32 RGBA5551-colors, pixels are encoded per row as 8bit IDs
+        # first parse the color palette
+        color_palette = np.zeros((0x100, 4), dtype=np.uint8)
+        for i in range(0, 0x100):
+            color_value = read_bytes(bin_data, (i * 2), 2)
+            # RGB5551
+            color_palette[i, 0] = int(((color_value >> 0xB) & 0b011111) / 0b011111 * 0xFF)  # R
+            color_palette[i, 1] = int(((color_value >> 0x6) & 0b011111) / 0b011111 * 0xFF)  # G
+            color_palette[i, 2] = int(((color_value >> 0x1) & 0b011111) / 0b011111 * 0xFF)  # B
+            # and grab alpha from final bit
+            color_palette[i, 3] = (color_value & 0b0001) * 0xFF
+
+        # then parse the image data
+        pixel_data = np.zeros((h, w, 4), dtype=np.uint8)
+        for y in range(0, h):
+            for x in range(0, w):
+                # calc the pixel index
+                px_id = (y * w) + x
+                pal_id = read_bytes(bin_data, (0x200 + px_id), 1)
+                # NOTE: the python Image constructors expect the colors to be in RGB...
+                pixel_data[y, x, 0] = color_palette[pal_id, 0]  # R
+                pixel_data[y, x, 1] = color_palette[pal_id, 1]  # G
+                pixel_data[y, x, 2] = color_palette[pal_id, 2]  # B
+                pixel_data[y, x, 3] = color_palette[pal_id, 3]  # A
+        return color_palette, pixel_data
+
+    if tex_type == Dicts.TEX_TYPES["RGBA16"]:  # RGBA16 or RGBA5551 without a palette; pixels stored as a 16bit texel
+        # parse the image data
+        pixel_data = np.zeros((h, w, 4), dtype=np.uint8)
+        for y in range(0, h):
+            for x in range(0, w):
+                # calc the pixel index
+                px_id = (y * w) + x
+                color_value = read_bytes(bin_data, (px_id * 2), 2)
+                # NOTE: the python Image constructors expect the colors to be in RGB...
+                pixel_data[y, x, 0] = int(((color_value >> 0xB) & 0b011111) / 0b011111 * 0xFF)  # R
+                pixel_data[y, x, 1] = int(((color_value >> 0x6) & 0b011111) / 0b011111 * 0xFF)  # G
+                pixel_data[y, x, 2] = int(((color_value >> 0x1) & 0b011111) / 0b011111 * 0xFF)  # B
+                pixel_data[y, x, 3] = (color_value & 0b1) * 0xFF  # A
+        return None, pixel_data
+
+    if tex_type == Dicts.TEX_TYPES["RGBA32"]:  # RGBA32 or RGBA8888 without a palette; pixels stored as a 32bit texel
+        # parse the image data
+        pixel_data = np.zeros((h, w, 4), dtype=np.uint8)
+        for y in range(0, h):
+            for x in range(0, w):
+                # calc the pixel index
+                px_id = (y * w) + x
+                # NOTE: the python Image constructors expect the colors to be in RGB...
+                pixel_data[y, x, 0] = int(bin_data[(px_id * 4) + 0])  # R
+                pixel_data[y, x, 1] = int(bin_data[(px_id * 4) + 1])  # G
+                pixel_data[y, x, 2] = int(bin_data[(px_id * 4) + 2])  # B
+                pixel_data[y, x, 3] = int(bin_data[(px_id * 4) + 3])  # A
+        return None, pixel_data
+
+    if tex_type == Dicts.TEX_TYPES["IA8"]:  # IA8 - each byte is a pixel; a nibble of intensity and a nibble of alpha
+        # parse the image data
+        pixel_data = np.zeros((h, w, 4), dtype=np.uint8)
+        for y in range(0, h):
+            for x in range(0, w):
+                # calc the pixel index
+                px_id = (y * w) + x
+                # in IA8, the first nibble is the intensity => every color-value
+                # NOTE: This math looks pretty weird, but the 2nd summand is just to interpolate the values from
+                #       a nibble into a byte, to avoid rounding oddities
+                intensity = int(((bin_data[px_id] << 0) & 0b11110000) + ((bin_data[px_id] >> 4) & 0b00001111))
+                alpha = int(((bin_data[px_id] << 4) & 0b11110000) + ((bin_data[px_id] >> 0) & 0b00001111))
+
+                # NOTE: the python Image constructors expect the colors to be in RGB...
+                pixel_data[y, x, 0] = intensity  # R
+                pixel_data[y, x, 1] = intensity  # G
+                pixel_data[y, x, 2] = intensity  # B
+                pixel_data[y, x, 3] = alpha  # A
+        return None, pixel_data
+
+
+# (w, h) pairs, including odd texel counts for the nibble-packed CI4 format
+SIZES = ((1, 1), (3, 5), (7, 7), (16, 16), (32, 64), (64, 32), (33, 17))
+# palette bytes in front of the texels
+PALETTE_SIZES = {"CI4": 0x20, "CI8": 0x200}
+
+rng = np.random.default_rng(0x42)
+failures = []
+for tex_name, tex_type in Dicts.TEX_TYPES.items():
+    texel_bits = {"CI4": 4, "CI8": 8, "RGBA16": 16, "RGBA32": 32, "IA8": 8}[tex_name]
+    for round_id in range(round_cnt):
+        w, h = SIZES[round_id % len(SIZES)]
+        data_size = PALETTE_SIZES.get(tex_name, 0) + ((w * h * texel_bits) + 7) // 8
+        bin_data = rng.integers(0, 0x100, data_size, dtype=np.uint8).tobytes()
+
+        ref_palette, ref_pixels = reference_convert_img_data_to_pixels(bin_data, tex_type, w, h)
+        palette, pixels = binjo_utils.convert_img_data_to_pixels(bin_data, tex_type, w, h)
+        palette_ok = (ref_palette is None and palette is None) or (
+            ref_palette is not None and palette is not None and np.array_equal(ref_palette, palette)
+        )
+        pixels_ok = pixels.dtype == ref_pixels.dtype and np.array_equal(ref_pixels, pixels)
+        if not (palette_ok and pixels_ok):
+            failures.append(f"{tex_name} {w}x{h} (round {round_id})")
+    print(f"  {tex_name:<7} {round_cnt} rounds checked")
+
+for failure in failures:
+    print(f"  MISMATCH: {failure}")
+print(f"texel decoders identical: {len(failures) == 0}")
+sys.exit(0 if len(failures) == 0 else 1)
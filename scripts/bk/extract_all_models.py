@@ -0,0 +1,29 @@
+import argparse
+import os
+import sys
+
+"""
+Extracts every map model listed in binjo_model_LU.map_model_lookup from a Banjo-Kazooie ROM
+into decompressed BIN files, plus a manifest.json with sizes, segment offsets and timings.
+Does not need Blender (only numpy).
+
+Usage:
+python scripts/bk/extract_all_models.py <rom path> <output dir> [--jobs N] [--index 0x01 --index 0x02 ...] [--verbose]
+"""
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "fast64_internal", "bk"))
+from bk_utility import binjo_batch_extract
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract all BK map models from a ROM.")
+    parser.add_argument("rom_path")
+    parser.add_argument("output_dir")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: cpu count)")
+    parser.add_argument("--index", action="append", type=lambda val: int(val, 0), help="only extract these indices")
+    parser.add_argument("--verbose", action="store_true", help="show the per-model parser output")
+    args = parser.parse_args()
+
+    manifest = binjo_batch_extract.extract_all_models(
+        args.rom_path, args.output_dir, model_indices=args.index, max_workers=args.jobs, quiet=not args.verbose
+    )
+    sys.exit(1 if manifest["failed_cnt"] > 0 else 0)
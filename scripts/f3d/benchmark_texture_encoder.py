@@ -0,0 +1,162 @@
+import importlib
+import os
+import sys
+import time
+
+import bpy
+import numpy as np
+
+"""
+Benchmarks the NumPy texture encoder of f3d_texture_writer on a 256 texture scene, against the per-pixel
+encoders it replaced, and checks that both write byte-identical texture and palette data.
+Needs to be run in blender, from a fast64 checkout.
+
+Usage:
+blender --background --factory-startup --python-exit-code 1 --python scripts/f3d/benchmark_texture_encoder.py -- [texture count, default 256] [max texture size, default 64]
+"""
+args = sys.argv[(sys.argv.index("--") + 1) :] if "--" in sys.argv else []
+texture_count = int(args[0]) if len(args) > 0 else 256
+max_size = int(args[1]) if len(args) > 1 else 64
+
+repo_path = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+sys.path.insert(0, os.path.dirname(repo_path))
+package = os.path.basename(repo_path)
+utility = importlib.import_module(f"{package}.fast64_internal.utility")
+texture_writer = importlib.import_module(f"{package}.fast64_internal.f3d.f3d_texture_writer")
+FImage = importlib.import_module(f"{package}.fast64_internal.f3d.f3d_gbi").FImage
+
+NON_CI_FORMATS = ["RGBA16", "RGBA32", "IA4", "IA8", "IA16", "I4", "I8"]
+CI_FORMATS = [("CI4", "RGBA16"), ("CI4", "IA16"), ("CI8", "RGBA16"), ("CI8", "IA16")]
+
+
+# the per-pixel encoders the NumPy ones replaced
+def reference_pixel_fields(image, pixels, field_cnt):
+    width, height = image.size
+    # N64 is -Y, Blender is +Y
+    for j in reversed(range(height)):
+        for i in range(width):
+            start = (j * width + i) * image.channels
+            yield pixels[start : start + field_cnt] if field_cnt <= image.channels else [
+                pixels[start + field] for field in range(field_cnt)
+            ]
+
+
+def reference_ci_colors(image, pal_format):
+    colors = []
+    for fields in reference_pixel_fields(image, image.pixels[:], image.channels):
+        color = [1, 1, 1, 1]
+        color[: len(fields)] = fields
+        colors.append(utility.getRGBA16Tuple(color) if pal_format == "RGBA16" else utility.getIA16Tuple(color))
+    return colors
+
+
+def reference_palette(image, pal_format):
+    palette = []
+    for color in reference_ci_colors(image, pal_format):
+        if color not in palette:
+            palette.append(color)
+    return palette
+
+
+def reference_nibbles(texture):
+    data = [((texture[i * 2] & 0xF) << 4) | (texture[i * 2 + 1] & 0xF) for i in range(len(texture) // 2)]
+    if len(texture) % 2 == 1:
+        data.append((texture[-1] & 0xF) << 4)
+    return bytearray(data)
+
+
+def reference_ci_texture(image, palette, pal_format, tex_format):
+    texture = [palette.index(color) for color in reference_ci_colors(image, pal_format)]
+    return reference_nibbles(texture) if tex_format == "CI4" else bytearray(texture)
+
+
+def reference_texture(image, tex_format):
+    pixels = image.pixels[:]
+    lum = utility.colorToLuminance
+    if tex_format == "RGBA16":
+        return bytearray(
+            b"".join(utility.getRGBA16Tuple(p).to_bytes(2, "big") for p in reference_pixel_fields(image, pixels, 4))
+        )
+    if tex_format == "RGBA32":
+        fields = reference_pixel_fields(image, pixels, image.channels)
+        return bytearray(int(round(val * 0xFF)) & 0xFF for p in fields for val in p)
+    if tex_format == "IA4":
+        texture = [
+            ((int(round(lum(p[:3]) * 0x7)) & 0x7) << 1) | (1 if p[3] > 0.5 else 0)
+            for p in reference_pixel_fields(image, pixels, 4)
+        ]
+        return reference_nibbles(texture)
+    if tex_format == "IA8":
+        return bytearray(
+            ((int(round(lum(p[:3]) * 0xF)) & 0xF) << 4) | (int(round(p[3] * 0xF)) & 0xF)
+            for p in reference_pixel_fields(image, pixels, 4)
+        )
+    if tex_format == "IA16":
+        return bytearray(
+            val
+            for p in reference_pixel_fields(image, pixels, 4)
+            for val in (int(round(lum(p[:3]) * 0xFF)) & 0xFF, int(round(p[3] * 0xFF)) & 0xFF)
+        )
+    if tex_format == "I4":
+        return reference_nibbles([int(round(lum(p) * 0xF)) & 0xF for p in reference_pixel_fields(image, pixels, 3)])
+    return bytearray(int(round(lum(p) * 0xFF)) & 0xFF for p in reference_pixel_fields(image, pixels, 3))
+
+
+def make_test_images(texture_count, max_size):
+    rng = np.random.default_rng(0x42)
+    images = []
+    for idx in range(texture_count):
+        width, height = (int(val) for val in rng.choice([size for size in (8, 16, 32, 64, 128) if size <= max_size], 2))
+        image = bpy.data.images.new(f"benchmark_{idx}", width, height, alpha=True)
+        if idx % 3 == 0:
+            # few distinct colors, so that the image also fits in a CI palette
+            colors = rng.integers(0, 32, (12, 4)) / 31
+            pixels = colors[rng.integers(0, len(colors), width * height)]
+        else:
+            pixels = rng.random((width * height, 4))
+        image.pixels.foreach_set(pixels.astype(np.float32).ravel())
+        images.append(image)
+    return images
+
+
+images = make_test_images(texture_count, max_size)
+reference_time = vectorized_time = 0
+mismatches = []
+for image in images:
+    for tex_format in NON_CI_FORMATS:
+        start = time.perf_counter()
+        reference = reference_texture(image, tex_format)
+        reference_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        fImage = FImage(image.name, None, None, image.size[0], image.size[1], None)
+        texture_writer.writeNonCITextureData(image, fImage, tex_format)
+        vectorized_time += time.perf_counter() - start
+        if fImage.data != reference:
+            mismatches.append((image.name, tex_format))
+
+    for tex_format, pal_format in CI_FORMATS:
+        start = time.perf_counter()
+        reference_pal = reference_palette(image, pal_format)
+        reference = (
+            reference_ci_texture(image, reference_pal, pal_format, tex_format) if len(reference_pal) <= 256 else None
+        )
+        reference_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        palette = texture_writer.getColorsUsedInImage(image, pal_format)
+        fImage = FImage(image.name, None, None, image.size[0], image.size[1], None)
+        if len(palette) <= 256:
+            texture_writer.writeCITextureData(image, fImage, palette, pal_format, tex_format)
+        vectorized_time += time.perf_counter() - start
+        if palette != reference_pal or (reference is not None and fImage.data != reference):
+            mismatches.append((image.name, tex_format, pal_format))
+
+pixel_count = sum(image.size[0] * image.size[1] for image in images)
+print(f"{len(images)} textures, {pixel_count} pixels, {len(NON_CI_FORMATS) + len(CI_FORMATS)} formats each")
+print(f"  reference:  {reference_time:8.3f}s")
+print(f"  vectorized: {vectorized_time:8.3f}s  ({reference_time / max(vectorized_time, 1e-9):.1f}x)")
+print(f"  byte-identical: {not mismatches}")
+for mismatch in mismatches[:10]:
+    print(f"  mismatch: {mismatch}")
+sys.exit(1 if mismatches else 0)
@@ -0,0 +1,298 @@
+import ast
+import copy
+import math
+import os
+import random
+import struct
+import sys
+import types
+from typing import List, Optional
+
+"""
+Golden check of the vertex buffer lookups of TriangleConverter: replays random triangle streams through the converter,
+and through the same converter with the lookups it had before its vertex buffer was indexed (scanning the buffer with
+== in vertInBuffer/addFace, and list.index() in createTriangleCommands), then checks that both write identical
+command lists and vertices. Also checks findInVertexBuffer directly against a scan of the buffer.
+Streams contain duplicate verts, verts one float step apart (including around 0 and bucket boundaries), large
+coordinates, several vertex groups and materials, and half of them start from existing vertex data split in
+material regions.
+
+Runs in a plain python interpreter: the converter is loaded from the source of fast64_internal/f3d/f3d_writer.py,
+with a stand-in for mathutils.Vector that compares like it does (within one float step), and stand-ins for the GBI
+macros that record their parameters.
+
+Usage:
+python scripts/f3d/check_triangle_converter.py [stream count, default 300]
+"""
+stream_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+repo_path = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+with open(os.path.join(repo_path, "fast64_internal", "f3d", "f3d_writer.py")) as writer_file:
+    writer_tree = ast.parse(writer_file.read())
+CONVERTER_DEFINITIONS = {
+    "VERTEX_BUCKET_CELL_SIZE",
+    "FLT_EPSILON",
+    "F3DVert",
+    "BufferVertex",
+    "indexVertexBuffer",
+    "findInVertexBuffer",
+    "TriangleConverter",
+    "createTriangleCommands",
+}
+
+
+def float_bits(value: float) -> int:
+    # single precision floats in the same order as their values, like mathutils compares them
+    bits = struct.unpack("<i", struct.pack("<f", value))[0]
+    return bits if bits >= 0 else -(bits & 0x7FFFFFFF)
+
+
+def next_float(value: float, steps: int = 1) -> float:
+    bits = float_bits(value) + steps
+    return struct.unpack("<f", struct.pack("<i", bits if bits >= 0 else (-bits) | -0x80000000))[0]
+
+
+class Vector:
+    """mathutils.Vector stand-in: single precision values, == allows one float step of difference"""
+
+    def __init__(self, values):
+        self.values = tuple(struct.unpack("<f", struct.pack("<f", value))[0] for value in values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __eq__(self, other):
+        if not isinstance(other, Vector) or len(other) != len(self):
+            return False
+        return all(abs(float_bits(a) - float_bits(b)) <= 1 for a, b in zip(self.values, other.values))
+
+    def freeze(self):
+        return self
+
+
+class PluginError(Exception):
+    pass
+
+
+def load_converter():
+    namespace = {
+        "Vector": Vector,
+        "Optional": Optional,
+        "List": List,
+        "math": math,
+        "copy": copy,
+        "PluginError": PluginError,
+        "bpy": types.SimpleNamespace(types=types.SimpleNamespace(Material=object)),
+        "TriangleConverterInfo": object,
+        "FTriGroup": object,
+        "GfxList": object,
+        "GbiMacro": object,
+        "Vtx": object,
+        "LoopConvertInfo": lambda *args: None,
+        "isTexturePointSampled": lambda material: True,
+        "SPVertex": lambda vertList, offset, count, index: ("SPVertex", offset, count, index),
+        "SPMatrix": lambda matrix, param: ("SPMatrix", matrix, param),
+        "SP1Triangle": lambda *indices: ("SP1Triangle",) + indices,
+        "SP2Triangles": lambda *indices: ("SP2Triangles",) + indices,
+        "SPEndDisplayList": lambda: ("SPEndDisplayList",),
+    }
+    nodes = [
+        node
+        for node in writer_tree.body
+        if getattr(node, "name", None) in CONVERTER_DEFINITIONS
+        or isinstance(node, ast.Assign)
+        and any(getattr(target, "id", None) in CONVERTER_DEFINITIONS for target in node.targets)
+    ]
+    exec(compile(ast.Module(nodes, type_ignores=[]), "f3d_writer.py", "exec"), namespace)
+    # vertices are compared by the values they were built from
+    namespace["F3DVert"].toVtx = lambda self, *args, **kwargs: (
+        tuple(self.position),
+        tuple(self.uv),
+        self.stOffset,
+        None if self.rgb is None else tuple(self.rgb),
+        None if self.normal is None else tuple(self.normal),
+        self.alpha,
+    )
+    return namespace
+
+
+# the lookups the converter had before its vertex buffer was indexed
+def reference_vert_in_buffer_range(self, bufferVert, start, end):
+    return bufferVert in self.vertBuffer[start:end]
+
+
+def make_reference_create_triangle_commands(namespace):
+    def createTriangleCommands(triangles, vertexBuffer, useSP2Triangle):
+        triangles = copy.deepcopy(triangles)
+        commands = []
+
+        def getIndices(tri):
+            return [vertexBuffer.index(v) for v in tri]
+
+        t = 0
+        while t < len(triangles):
+            firstTriIndices = getIndices(triangles[t])
+            t += 1
+            if useSP2Triangle and t < len(triangles):
+                commands.append(namespace["SP2Triangles"](*firstTriIndices, 0, *getIndices(triangles[t]), 0))
+                t += 1
+            else:
+                commands.append(namespace["SP1Triangle"](*firstTriIndices, 0))
+        return commands
+
+    return createTriangleCommands
+
+
+indexed = load_converter()
+reference = load_converter()
+reference["TriangleConverter"].vertInBufferRange = reference_vert_in_buffer_range
+reference["createTriangleCommands"] = make_reference_create_triangle_commands(reference)
+
+cell_size = indexed["VERTEX_BUCKET_CELL_SIZE"]
+BASE_VALUES = [0.0, 0.1, 0.2, 1.0, 3.0, -2.5, 100.0, 12345.678, -1e-40, 1e-7, cell_size * 3, -cell_size * 7]
+
+
+def random_value(rng: random.Random) -> float:
+    value = rng.choice(BASE_VALUES)
+    # near a bucket boundary of the sum of the fields
+    return next_float(value, rng.choice([-1, 0, 1])) if rng.random() < 0.3 else value
+
+
+def nudge(rng: random.Random, values):
+    return [next_float(value, rng.choice([-1, 1])) if rng.random() < 0.5 else value for value in values]
+
+
+def random_vert_values(rng: random.Random, pool: list):
+    if pool and rng.random() < 0.6:
+        position, uv, rgb, normal, alpha = rng.choice(pool)
+        if rng.random() < 0.5:
+            position = nudge(rng, position)
+        if rng.random() < 0.2:
+            uv = nudge(rng, uv)
+        if normal is not None and rng.random() < 0.2:
+            normal = nudge(rng, normal)
+        return position, uv, rgb, normal, alpha
+    # a vert has colors, normals or both
+    rgb, normal = rng.choice(
+        [
+            (None, (0.0, 0.0, 1.0)),
+            ((1.0, 1.0, 1.0), None),
+            ((0.5, 0.25, 0.5), None),
+            ((0.5, 0.25, 0.5), (0.0, 0.6, 0.8)),
+        ]
+    )
+    values = (
+        [random_value(rng) for _ in range(3)],
+        [rng.choice([0.0, 0.5, 1.0, random_value(rng)]) for _ in range(2)],
+        rgb,
+        normal,
+        rng.choice([1.0, 0.5]),
+    )
+    pool.append(values)
+    return values
+
+
+def make_vert(namespace, values):
+    position, uv, rgb, normal, alpha = values
+    return namespace["F3DVert"](Vector(position), Vector(uv), rgb, None if normal is None else Vector(normal), alpha)
+
+
+def random_stream(rng: random.Random):
+    pool = []
+    loop_verts = [random_vert_values(rng, pool) for _ in range(rng.randint(5, 150))]
+    vertex_groups = [rng.choice([None, None, 1, 2]) for _ in loop_verts]
+    faces = [
+        (
+            [rng.randrange(len(loop_verts)) for _ in range(3)],
+            rng.choice([0, 0, 1]),
+            rng.choice([None, (0.5, 0.5)]),
+        )
+        for _ in range(rng.randint(1, 250))
+    ]
+
+    existing_verts = material_regions = None
+    if rng.random() < 0.5:
+        existing_verts = []
+        material_regions = {}
+        for material_index in (0, 1):
+            start = len(existing_verts)
+            for _ in range(rng.randint(0, 5)):
+                existing_verts.append((random_vert_values(rng, pool), material_index))
+            material_regions[material_index] = (start, len(existing_verts))
+    return loop_verts, vertex_groups, faces, existing_verts, material_regions, rng.choice([16, 32]), rng.random() < 0.5
+
+
+def convert(namespace, stream):
+    loop_verts, vertex_groups, faces, existing_verts, material_regions, vert_load_size, old_gbi = stream
+    namespace["getF3DVert"] = lambda loop, face, convertInfo, mesh: make_vert(namespace, loop_verts[loop.index])
+
+    info = types.SimpleNamespace(
+        mesh=types.SimpleNamespace(
+            loops=[types.SimpleNamespace(index=i, vertex_index=i) for i in range(len(loop_verts))]
+        ),
+        obj=types.SimpleNamespace(data=types.SimpleNamespace(uv_layers={"UVMap": types.SimpleNamespace(data=None)})),
+        vertexGroupInfo=types.SimpleNamespace(vertexGroups=vertex_groups),
+        f3d=types.SimpleNamespace(vert_load_size=vert_load_size, F3D_OLD_GBI=old_gbi, F3DEX_GBI_3=False),
+        getTransformMatrix=lambda groupIndex: None,
+        getMatrixAddrFromGroup=lambda groupIndex: f"limb_{groupIndex}",
+    )
+    material = types.SimpleNamespace(f3d_mat=types.SimpleNamespace(tex_scale=(1, 1), use_cel_shading=False))
+    tri_group = types.SimpleNamespace(
+        triList=types.SimpleNamespace(commands=[]), vertexList=types.SimpleNamespace(vertices=[])
+    )
+    existing_data = None
+    if existing_verts is not None:
+        existing_data = [
+            namespace["BufferVertex"](make_vert(namespace, values), None, index) for values, index in existing_verts
+        ]
+
+    converter = namespace["TriangleConverter"](
+        info, (32, 32), material, None, tri_group, existing_data, material_regions
+    )
+    for loop_indices, material_index, st_offset in faces:
+        converter.addFace(types.SimpleNamespace(loops=loop_indices, material_index=material_index), st_offset)
+    converter.finish(True)
+    return tri_group.triList.commands, tri_group.vertexList.vertices
+
+
+def check_find_in_vertex_buffer(rng: random.Random):
+    pool = []
+    BufferVertex = indexed["BufferVertex"]
+    vertex_buffer = [
+        BufferVertex(make_vert(indexed, random_vert_values(rng, pool)), rng.choice([None, 1]), rng.choice([0, 1]))
+        for _ in range(rng.randint(0, 64))
+    ]
+    buckets = {}
+    indexed["indexVertexBuffer"](vertex_buffer, buckets)
+    for _ in range(64):
+        vert = BufferVertex(
+            make_vert(indexed, random_vert_values(rng, pool)), rng.choice([None, 1]), rng.choice([0, 1])
+        )
+        start = rng.randint(0, len(vertex_buffer))
+        end = rng.randint(start, len(vertex_buffer))
+        expected = next((i for i in range(start, end) if vertex_buffer[i] == vert), None)
+        if indexed["findInVertexBuffer"](vert, vertex_buffer, buckets, start, end) != expected:
+            return False
+    return True
+
+
+mismatches = 0
+for seed in range(stream_count):
+    stream = random_stream(random.Random(seed))
+    if convert(indexed, stream) != convert(reference, stream):
+        mismatches += 1
+        print(f"Stream {seed}: output differs from the buffer scans")
+    if not check_find_in_vertex_buffer(random.Random(-seed - 1)):
+        mismatches += 1
+        print(f"Buffer {seed}: findInVertexBuffer differs from a scan of the buffer")
+
+if mismatches:
+    print(f"{mismatches} mismatches")
+    sys.exit(1)
+print(f"{stream_count} streams identical to the buffer scans")
@@ -0,0 +1,198 @@
+import ast
+import os
+import re
+import sys
+from typing import Optional
+
+"""
+Checks that CSymbolTable.search finds the same matches (span and groups) as a plain re.search over the whole source,
+for the patterns the importers look symbols up with, on a generated C file with static, const and extern definitions,
+pointers, comments and strings.
+Runs in a plain python interpreter: CSymbol and CSymbolTable are loaded from the source of fast64_internal/utility.py,
+which can't be imported without blender.
+
+Usage:
+python scripts/oot/check_symbol_table.py
+"""
+
+repo_path = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+with open(os.path.join(repo_path, "fast64_internal", "utility.py")) as utility_file:
+    utility_tree = ast.parse(utility_file.read())
+namespace = {"re": re, "Optional": Optional}
+exec(
+    compile(
+        ast.Module(
+            [node for node in utility_tree.body if getattr(node, "name", None) in ("CSymbol", "CSymbolTable")],
+            type_ignores=[],
+        ),
+        "utility.py",
+        "exec",
+    ),
+    namespace,
+)
+CSymbolTable = namespace["CSymbolTable"]
+
+source = """#include "ultra64.h"
+// StandardLimb gFooCommentedLimb = { { 1, 2, 3 }, 0x01, 0x02, NULL };
+/* static u8 gFooUnused[] = { 0 }; */
+const char* gFooString = "static Gfx gFooUnusedDL[] = { 0 };";
+
+static u64 gFooTex[] = {
+    0x0000000000000000, 0x0101010101010101,
+};
+
+static const u16 gFooTLUT[] = { 0x0001, 0x0002 };
+
+extern Vtx gFooExternVtx[];
+
+Vtx gFooVtx[4] = {
+    VTX(1, 2, 3, 0, 0, 0xFF, 0xFF, 0xFF, 0xFF),
+    VTX(4, 5, 6, 0, 0, 0xFF, 0xFF, 0xFF, 0xFF),
+};
+
+static Vtx gFooStaticVtx[] = {
+    VTX(7, 8, 9, 0, 0, 0xFF, 0xFF, 0xFF, 0xFF),
+};
+
+Gfx gFooDL[] = {
+    gsSPVertex(gFooVtx, 4, 0),
+    gsSP1Triangle(0, 1, 2, 0),
+    gsSPEndDisplayList(),
+};
+
+static Gfx gFooStaticDL[] = {
+    gsSPEndDisplayList(),
+};
+
+static Lights1 gFooLights = gdSPDefLights1(0x7F, 0x7F, 0x7F, 0xFF, 0xFF, 0xFF, 0x49, 0x49, 0x49);
+
+StandardLimb gFooRootLimb = { { 0, 10, 0 }, 0x01, LIMB_DONE, gFooDL };
+static LodLimb gFooLodLimb = { { 1, 2, 3 }, LIMB_DONE, 0x02, { gFooDL, gFooStaticDL } };
+
+void* gFooLimbs[] = {
+    &gFooRootLimb,
+    &gFooLodLimb,
+};
+
+static void* gFooStaticLimbs[2] = { &gFooRootLimb, &gFooLodLimb };
+
+FlexSkeletonHeader gFooSkel = { { gFooLimbs, ARRAY_COUNT(gFooLimbs) }, 2 };
+static SkeletonHeader gFooStaticSkel = { gFooStaticLimbs, ARRAY_COUNT(gFooStaticLimbs) };
+
+static s16 gFooFrameData[6] = { 0x0000, 0x4000, 0xC000, 0x0001, 0x0002, 0x0003 };
+JointIndex gFooJointIndices[2] = {
+    { 0x0000, 0x0001, 0x0002, },
+    { 0x0003, 0x0004, 0x0005, },
+};
+
+static SurfaceType gFooSurfaceTypes[] = {
+    { 0x00000000, 0x000007C0 },
+};
+"""
+
+
+# the patterns of the lookups routed through CSymbolTable.search
+def limbs_pattern(name):
+    return (r"(static\s*)?void\s*\*\s*" + re.escape(name) + r"\s*\[\s*[0-9]*\s*\]\s*=\s*\{([^\}]*)\}\s*;\s*", re.DOTALL)
+
+
+def skeleton_pattern(name):
+    return (
+        r"(Flex)?SkeletonHeader\s*"
+        + re.escape(name)
+        + r"\s*=\s*\{\s*\{?\s*([^,\s]*)\s*,\s*([^,\s\}]*)\s*\}?\s*(,\s*([^,\s]*))?\s*\}\s*;\s*",
+        0,
+    )
+
+
+def limb_type_pattern(name):
+    return (r"([A-Za-z0-9\_]*)Limb\s*" + re.escape(name), 0)
+
+
+def dl_pattern(name):
+    return (r"Gfx\s*" + re.escape(name) + r"\s*\[\s*\w*\s*\]\s*=\s*\{([^\}]*)\}", 0)
+
+
+def vtx_pattern(name):
+    return (r"Vtx\s*" + re.escape(name) + r"\s*\[\s*[0-9x]*\s*\]\s*=\s*\{([^;]*);", re.DOTALL)
+
+
+def lights_pattern(name):
+    return (
+        r"Lights([0-9n])\s*" + re.escape(name) + r"\s*=\s*gdSPDefLights[0-9]\s*\(([^\)]*)\)\s*;\s*",
+        re.DOTALL,
+    )
+
+
+def texture_pattern(name):
+    return (
+        r"([A-Za-z0-9\_]+)\s*" + re.escape(name) + r"\s*\[\s*[0-9a-fA-Fx]*\s*\]\s*=\s*\{([^\}]*)\s*\}\s*;\s*",
+        re.DOTALL,
+    )
+
+
+def frame_data_pattern(name):
+    return (re.escape(name) + r"\s*\[\s*[0-9]*\s*\]\s*=\s*\{([^\}]*)\}", re.DOTALL)
+
+
+def joint_indices_pattern(name):
+    return (re.escape(name) + r"\s*\[\s*[0-9]*\s*\]\s*=\s*\{([^;]*);", re.DOTALL)
+
+
+def data_pattern(name):
+    return (rf"SurfaceType\s*{re.escape(name)}\s*\[[\s0-9A-Za-z_]*\]\s*=\s*\{{(.*?)\}}\s*;", re.DOTALL)
+
+
+lookups = [
+    ("gFooLimbs", limbs_pattern),
+    ("gFooStaticLimbs", limbs_pattern),
+    ("gFooSkel", skeleton_pattern),
+    ("gFooStaticSkel", skeleton_pattern),
+    ("gFooRootLimb", limb_type_pattern),
+    ("gFooLodLimb", limb_type_pattern),
+    ("gFooCommentedLimb", limb_type_pattern),
+    ("gFooDL", dl_pattern),
+    ("gFooStaticDL", dl_pattern),
+    ("gFooVtx", vtx_pattern),
+    ("gFooStaticVtx", vtx_pattern),
+    ("gFooExternVtx", vtx_pattern),
+    ("gFooLights", lights_pattern),
+    ("gFooTex", texture_pattern),
+    ("gFooTLUT", texture_pattern),
+    ("gFooFrameData", frame_data_pattern),
+    ("gFooJointIndices", joint_indices_pattern),
+    ("gFooSurfaceTypes", data_pattern),
+    ("gFooMissing", dl_pattern),
+]
+
+
+def describe(match: Optional[re.Match]):
+    return None if match is None else (match.span(), match.groups())
+
+
+symbol_table = CSymbolTable(source)
+mismatches = 0
+for name, get_pattern in lookups:
+    pattern, flags = get_pattern(name)
+    expected = describe(re.search(pattern, source, flags))
+    result = describe(symbol_table.search(name, pattern, flags))
+    if result != expected:
+        mismatches += 1
+        print(f"{name}: {result} instead of {expected}")
+
+# ootRemoveSkeleton cuts the whole match out, static included
+removed = source.replace(symbol_table.search("gFooStaticLimbs", *limbs_pattern("gFooStaticLimbs")).group(0), "")
+if "static static" in removed or "static FlexSkeletonHeader" in removed:
+    mismatches += 1
+    print("Removing gFooStaticLimbs leaves its static qualifier behind")
+
+for name, symbol_type in [("gFooTLUT", "u16"), ("gFooStaticLimbs", "void"), ("gFooLodLimb", "LodLimb")]:
+    symbol = symbol_table.symbols[name]
+    if symbol.type != symbol_type or not source.startswith("static", symbol.start):
+        mismatches += 1
+        print(f"{name} is indexed as {symbol.type} from {source[symbol.start:symbol.nameStart]!r}")
+
+if mismatches:
+    print(f"{mismatches} mismatches")
+    sys.exit(1)
+print(f"{len(lookups)} lookups identical to re.search")
@@ -0,0 +1,150 @@
+import importlib
+import os
+import sys
+import time
+
+import bpy
+import mathutils
+import numpy as np
+
+"""
+Benchmarks the NumPy collision extraction of sm64_collision.exportCollisionCommon on a ~50k triangle level,
+against the per-triangle extraction and linear vertex search it replaced, and checks that both give the exact same
+C collision, rooms and binary data.
+Needs to be run in blender, from a fast64 checkout.
+
+Usage:
+blender --background --factory-startup --python-exit-code 1 --python scripts/sm64/benchmark_collision_export.py -- [grid size, default 159]
+"""
+args = sys.argv[(sys.argv.index("--") + 1) :] if "--" in sys.argv else []
+grid_size = int(args[0]) if len(args) > 0 else 159
+
+repo_path = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+sys.path.insert(0, os.path.dirname(repo_path))
+package = os.path.basename(repo_path)
+importlib.import_module(package).register()
+utility = importlib.import_module(f"{package}.fast64_internal.utility")
+sm64_collision = importlib.import_module(f"{package}.fast64_internal.sm64.sm64_collision")
+
+
+# the per-triangle extraction and linear vertex search the NumPy ones replaced
+def reference_add_triangles(obj, collision_dict, include_children, transform):
+    if obj.type == "MESH" and not obj.ignore_collision:
+        obj.data.calc_loop_triangles()
+        for face in obj.data.loop_triangles:
+            material = obj.material_slots[face.material_index].material
+            col_type = material.collision_type if material.collision_all_options else material.collision_type_simple
+            if col_type == "Custom":
+                col_type = material.collision_custom
+            special_param = material.collision_param if material.use_collision_param else None
+
+            corners = [
+                tuple(int(round(val)) for val in transform @ obj.data.vertices[vert].co) for vert in face.vertices
+            ]
+            (x1, y1, z1), (x2, y2, z2), (x3, y3, z3) = corners
+            nx = (y2 - y1) * (z3 - z2) - (z2 - z1) * (y3 - y2)
+            ny = (z2 - z1) * (x3 - x2) - (x2 - x1) * (z3 - z2)
+            nz = (x2 - x1) * (y3 - y2) - (y2 - y1) * (x3 - x2)
+            if nx * nx + ny * ny + nz * nz <= 0:
+                continue
+            collision_dict.setdefault(col_type, []).append((corners, special_param, obj.room_num))
+
+    if include_children:
+        for child in obj.children:
+            reference_add_triangles(child, collision_dict, include_children, transform @ child.matrix_local)
+
+
+def reference_export(obj, transform, name):
+    collision_dict = {}
+    temp_obj, all_objs = utility.duplicateHierarchy(obj, None, True, None)
+    try:
+        reference_add_triangles(temp_obj, collision_dict, True, transform)
+    finally:
+        utility.cleanupDuplicatedObjects(all_objs)
+
+    collision = sm64_collision.Collision(name + "_collision")
+    for col_type, faces in collision_dict.items():
+        collision.triangles[col_type] = []
+        for corners, special_param, room in faces:
+            indices = []
+            for corner in corners:
+                index = next((i for i, vert in enumerate(collision.vertices) if vert.position == corner), None)
+                if index is None:
+                    collision.vertices.append(sm64_collision.CollisionVertex(corner))
+                    index = len(collision.vertices) - 1
+                indices.append(index)
+            collision.triangles[col_type].append(sm64_collision.CollisionTriangle(indices, special_param, room))
+    return collision
+
+
+def make_material(name, col_type, custom=None, param=None):
+    material = bpy.data.materials.new(name)
+    material.collision_all_options = True
+    material.collision_type = col_type
+    if custom is not None:
+        material.collision_custom = custom
+    if param is not None:
+        material.use_collision_param = True
+        material.collision_param = param
+    return material
+
+
+def make_grid(name, size, rng, materials):
+    # a bumpy grid, with some flat spots so that rounding creates degenerate triangles and shared vertices
+    xs, ys = np.meshgrid(np.linspace(-1, 1, size), np.linspace(-1, 1, size))
+    zs = np.where(rng.random((size, size)) < 0.2, 0, rng.normal(0, 0.02, (size, size)))
+    verts = np.column_stack((xs.ravel(), ys.ravel(), zs.ravel()))
+    quads = [
+        (y * size + x, y * size + x + 1, (y + 1) * size + x + 1, (y + 1) * size + x)
+        for y in range(size - 1)
+        for x in range(size - 1)
+    ]
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(verts.tolist(), [], quads)
+    for material in materials:
+        mesh.materials.append(material)
+    mesh.polygons.foreach_set("material_index", rng.integers(0, len(materials), len(quads)).astype(np.int32))
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+rng = np.random.default_rng(0x42)
+materials = [
+    make_material("default", "SURFACE_DEFAULT"),
+    make_material("burning", "SURFACE_BURNING"),
+    make_material("custom", "Custom", custom="SURFACE_SLOW"),
+    make_material("param", "SURFACE_DEFAULT", param="0x0010"),
+]
+level = make_grid("level", grid_size, rng, materials)
+level.scale = (40, 40, 40)
+room = make_grid("room", max(grid_size // 8, 2), rng, materials[1:])
+room.room_num = 1
+room.parent = level
+room.location = (0.1, 0.2, 0.5)
+room.rotation_euler = (0.3, 0.2, 0.1)
+bpy.context.view_layer.update()
+
+transform = mathutils.Matrix.Diagonal(mathutils.Vector((300, 300, 300))).to_4x4()
+
+start = time.perf_counter()
+reference = reference_export(level, transform, "level")
+reference_time = time.perf_counter() - start
+
+start = time.perf_counter()
+collision = sm64_collision.exportCollisionCommon(level, transform, False, True, "level", None)
+vectorized_time = time.perf_counter() - start
+
+matches = {
+    "C": collision.to_c().source == reference.to_c().source,
+    "rooms": collision.to_c_rooms().source == reference.to_c_rooms().source,
+    "binary": collision.to_binary() == reference.to_binary(),
+}
+
+tri_count = sum(len(triangles) for triangles in collision.triangles.values())
+print(f"{tri_count} triangles, {len(collision.vertices)} vertices, {len(collision.triangles)} collision types")
+print(f"  reference:  {reference_time:8.3f}s")
+print(f"  vectorized: {vectorized_time:8.3f}s  ({reference_time / max(vectorized_time, 1e-9):.1f}x)")
+for output, match in matches.items():
+    print(f"  {output} identical: {match}")
+sys.exit(0 if all(matches.values()) else 1)